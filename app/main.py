@@ -1,15 +1,40 @@
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+import asyncio
 import os
+import time
+from .services.log import configure_logging, get_logger
+from .services.tracing import configure_tracing, server_span
+
+# Before the routers are imported: services log while they initialize
+configure_logging()
+configure_tracing()
+logger = get_logger("main")
+
 from .routers.dids import router as dids_router
 from .routers.vcs import router as vcs_router
 from .routers.oac import router as oac_router
 from .routers.variables import router as variables_router
 from .routers.groups import router as groups_router
 from .routers.croissants import router as croissants_router
+from .routers.export import router as export_router
+from .routers.imports import router as imports_router
+from .services.metrics import HTTP_REQUEST_SECONDS, HTTP_IN_FLIGHT, METRICS_ENABLED, render_latest
+from .services import jsonio
+from .services.qdrant_service import qdrant_service
+from .services.static_assets import PrecompressedStaticFiles, SpaIndex, find_static_dir
+
+class JsonioResponse(JSONResponse):
+    """orjson-encoded when available, with the standard library for values orjson rejects (see jsonio)"""
 
-app = FastAPI(title="ODRL API", description="API wrapper for OYDID CLI with VC Capabilities")
+    def render(self, content) -> bytes:
+        return jsonio.dumps_bytes(content)
+
+app = FastAPI(
+    title="ODRL API",
+    description="API wrapper for OYDID CLI with VC Capabilities",
+    default_response_class=JsonioResponse
+)
 
 # API Routers with /api prefix
 app.include_router(dids_router, prefix="/api")
@@ -18,6 +43,49 @@ app.include_router(oac_router, prefix="/api")
 app.include_router(variables_router, prefix="/api")
 app.include_router(groups_router, prefix="/api")
 app.include_router(croissants_router, prefix="/api")
+app.include_router(export_router, prefix="/api")
+app.include_router(imports_router, prefix="/api")
+
+@app.on_event("startup")
+async def build_keyword_indexes():
+    """Build the BM25 keyword indexes before serving, instead of on the first keyword/hybrid search"""
+    try:
+        await asyncio.to_thread(qdrant_service.build_keyword_indexes)
+    except Exception as e:
+        # Searches build the indexes lazily if Qdrant is not reachable yet
+        logger.warning("Keyword index build at startup failed", extra={"error": str(e)})
+
+@app.middleware("http")
+async def request_timing(request: Request, call_next):
+    """Record request latency and a server span by route template (not raw path) to keep cardinality bounded"""
+    start = time.perf_counter()
+    HTTP_IN_FLIGHT.inc()
+    status = 500
+    with server_span(request.method, request.headers, **{"http.request.method": request.method}) as current:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = request.scope.get("route")
+            route = getattr(route, "path", None) or ("static" if not request.url.path.startswith("/api") else "unmatched")
+            HTTP_REQUEST_SECONDS.labels(
+                method=request.method,
+                route=route,
+                status=str(status)
+            ).observe(time.perf_counter() - start)
+            if current is not None:
+                current.update_name(f"{request.method} {route}")
+                current.set_attribute("http.route", route)
+                current.set_attribute("http.response.status_code", status)
+
+@app.get("/api/metrics", include_in_schema=False)
+async def metrics():
+    if not METRICS_ENABLED:
+        return JSONResponse(status_code=503, content={"detail": "prometheus_client is not installed"})
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
 
 @app.get("/api/health")
 async def health_check():
@@ -38,35 +106,22 @@ async def oydid_health():
     except Exception as e:
         return {"status": "error", "detail": str(e)}
 
-# Serve Frontend Static Files
+# Serve Frontend Static Files, resolved once at startup
 # Priority 1: Docker build location (outside bind mount)
 docker_static_dir = "/frontend_dist"
 # Priority 2: Local development location
 local_static_dir = os.path.join(os.path.dirname(__file__), "static")
 
-if os.path.exists(docker_static_dir):
-    static_dir = docker_static_dir
-    app.mount("/", StaticFiles(directory=static_dir, html=True), name="static")
-elif os.path.exists(local_static_dir):
-    static_dir = local_static_dir
-    app.mount("/", StaticFiles(directory=static_dir, html=True), name="static")
+static_dir = find_static_dir([docker_static_dir, local_static_dir])
+spa_index = SpaIndex.load(static_dir)
+if static_dir:
+    app.mount("/", PrecompressedStaticFiles(directory=static_dir), name="static")
 else:
-    static_dir = None
-    print("Warning: Static files not found")
+    logger.warning("Static files not found")
 
-# Catch-all route for SPA (React Router)
+# Catch-all route for SPA (React Router), answered from memory
 @app.exception_handler(404)
 async def custom_404_handler(request, __):
-    if request.url.path.startswith("/api"):
+    if request.url.path.startswith("/api") or spa_index is None:
         return JSONResponse(status_code=404, content={"detail": "Not Found"})
-
-    # Re-evaluate static_dir in case it wasn't set globally or to be safe
-    current_static_dir = None
-    if os.path.exists(docker_static_dir):
-        current_static_dir = docker_static_dir
-    elif os.path.exists(local_static_dir):
-        current_static_dir = local_static_dir
-        
-    if current_static_dir and os.path.exists(os.path.join(current_static_dir, "index.html")):
-        return FileResponse(os.path.join(current_static_dir, "index.html"))
-    return {"detail": "Not Found"}
+    return spa_index.response(request)
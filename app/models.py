@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Literal
 
 class DidCreateRequest(BaseModel):
     payload: Dict[str, Any]
@@ -19,6 +19,11 @@ class DidResolveRestrictedRequest(BaseModel):
     private_key: str  # The encrypted private key needed for decryption
     key_pwd: Optional[str] = None  # Optional password if the key is double encrypted
 
+class DidResolveBatchRequest(BaseModel):
+    dids: List[str]
+    mode: Literal["w3c", "json"] = "w3c"  # W3C DID document (--w3c-did) or the OYDID document and log (--json-output)
+    use_cache: bool = True
+
 class VariableRequest(BaseModel):
     name: str
     description: Optional[str] = ""
@@ -34,12 +39,17 @@ class Membership(BaseModel):
 
 class GroupRequest(BaseModel):
     name: str
+    type: Literal["Organization", "FormalOrganization", "OrganizationalUnit", "OrganizationalCollaboration"] = "Organization"
     description: Optional[str] = ""
     members: Optional[list[Membership]] = []
 
 class GroupUpdateRequest(GroupRequest):
     did: str
 
+class GroupMembersDiffRequest(BaseModel):
+    add: Optional[list[Membership]] = []
+    remove: Optional[list[str]] = []
+
 class CroissantRequest(BaseModel):
     url: Optional[str] = None
     description: Optional[str] = ""
@@ -66,3 +76,10 @@ class OrcidVcRequest(BaseModel):
     token: str
     orcid: str
     subject_did: str
+
+class VcBatchItem(BaseModel):
+    provider: Literal["google", "github", "orcid", "ssh"]
+    request: Dict[str, Any]  # Body of the matching single-item endpoint (e.g. SshVcRequest)
+
+class VcBatchRequest(BaseModel):
+    items: List[VcBatchItem]
@@ -1,38 +1,41 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from ..models import CroissantRequest, CroissantUpdateRequest
 from ..services.oydid import run_oydid_command
+from ..services import jsonio
 from ..services.qdrant_service import qdrant_service
+from ..services.payloads import build_croissant_payload
+from ..services.dedup import check_duplicate, duplicate_response
+from ..services.metrics import observe_fetch
+from ..services.log import get_logger
 import json
 import requests
 from datetime import datetime
 
 router = APIRouter(prefix="/croissants", tags=["Croissants"])
+logger = get_logger("croissants")
 
 @router.post("/create")
-async def create_croissant(request: CroissantRequest):
+async def create_croissant(
+    request: CroissantRequest,
+    dedup: bool = Query(None, description="Return an existing DID for the same URL or near-identical content (default: DEDUP_ON_CREATE)")
+):
     """Create a new Croissant DID"""
-    payload = {
-        "type": "Croissant",
-        "description": request.description,
-        "timestamp": datetime.now().isoformat()
-    }
-    
     # If URL is provided, try to fetch JSON-LD
+    jsonld = None
     if request.url:
         try:
-            response = requests.get(request.url, timeout=15)
+            with observe_fetch("croissant", request.url):
+                response = requests.get(request.url, timeout=15)
             response.raise_for_status()
             jsonld = response.json()
-            # Merge JSON-LD into payload
-            payload.update(jsonld)
-            payload["url"] = request.url # Ensure URL is preserved if not in JSON-LD
         except Exception as e:
-            print(f"Warning: Failed to fetch JSON-LD from {request.url}: {e}")
-            payload["url"] = request.url
-            
-    # If a payload was provided directly, merge it
-    if request.payload:
-        payload.update(request.payload)
+            logger.warning("Failed to fetch JSON-LD", extra={"url": request.url, "error": str(e)})
+
+    payload = build_croissant_payload(request, jsonld)
+
+    duplicate = check_duplicate(payload, override=dedup)
+    if duplicate:
+        return duplicate_response(duplicate)
 
     result = run_oydid_command(["create", "--json-output"], input_data=payload)
     
@@ -41,14 +44,14 @@ async def create_croissant(request: CroissantRequest):
         raise HTTPException(status_code=400, detail=f"OYDID Error: {error_detail}")
         
     try:
-        did_data = json.loads(result.stdout)
+        did_data = jsonio.loads(result.stdout)
         did = did_data.get("did")
         
         # Store in Qdrant
         try:
             qdrant_service.upsert_document(did, payload)
         except Exception as e:
-            print(f"Warning: Failed to store in Qdrant: {e}")
+            logger.warning("Failed to store in Qdrant", extra={"did": did, "error": str(e)})
             
         return did_data
     except json.JSONDecodeError:
@@ -73,12 +76,12 @@ async def update_croissant(did: str, request: CroissantRequest):
         raise HTTPException(status_code=400, detail=f"Update failed: {error_detail}")
         
     try:
-        did_data = json.loads(result.stdout)
+        did_data = jsonio.loads(result.stdout)
         # Update in Qdrant
         try:
             qdrant_service.upsert_document(did, payload)
         except Exception as e:
-            print(f"Warning: Failed to update in Qdrant: {e}")
+            logger.warning("Failed to update in Qdrant", extra={"did": did, "error": str(e)})
             
         return did_data
     except json.JSONDecodeError:
@@ -1,7 +1,17 @@
-from fastapi import APIRouter, HTTPException, Query
-from ..models import DidCreateRequest, DidCreateRestrictedRequest, DidResolveRestrictedRequest, DidUpdateRequest
-from ..services.oydid import run_oydid_command
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response
+from ..models import DidCreateRequest, DidCreateRestrictedRequest, DidResolveRestrictedRequest, DidUpdateRequest, DidResolveBatchRequest
+from ..services.oydid import run_oydid_command, run_oydid_command_async
+from ..services import jsonio
 from ..services.qdrant_service import qdrant_service
+from ..services.dedup import check_duplicate, duplicate_response
+from ..services.did_cache import did_cache
+from ..services.http_cache import cached_json_response, etag_base, not_modified
+from ..services.metrics import observe_fetch
+from ..services.log import get_logger, debug_sampled
+from ..services.ratelimit import AsyncRateLimiter
+from ..services.tracing import span
+import asyncio
 import json
 import requests
 import os
@@ -13,13 +23,19 @@ from rdflib.namespace import DCTERMS, RDFS, FOAF, RDF, OWL, SKOS
 SCHEMA = Namespace("http://schema.org/")
 
 router = APIRouter(prefix="/did", tags=["DIDs"])
+logger = get_logger("dids")
+
+DID_RESOLVE_BATCH_MAX = int(os.getenv("DID_RESOLVE_BATCH_MAX", 1000))
+# Shared by all batches, so concurrent batches don't multiply the number of oydid processes
+resolve_limiter = AsyncRateLimiter(max_concurrency=int(os.getenv("DID_RESOLVE_CONCURRENCY", 16)))
+RESOLVE_MODES = {"w3c": "--w3c-did", "json": "--json-output"}
 
 def parse_rdf_metadata(content, content_type="text/turtle", target_url=None):
     g = Graph()
     try:
         g.parse(data=content, format=content_type)
     except Exception as e:
-        print(f"Error parsing RDF: {e}")
+        logger.warning("Error parsing RDF", extra={"error": str(e)})
         return None
 
     metadata = {"titles": {}, "descriptions": {}, "properties": {}}
@@ -91,8 +107,38 @@ def parse_rdf_metadata(content, content_type="text/turtle", target_url=None):
 
     return metadata
 
+def cli_json_response(stdout: str, request: Request = None, did: str = None, variant: str = None, from_log: bool = True):
+    """
+    CLI JSON output passed through as-is (no parse / re-encode of large documents); anything else is wrapped.
+    With a request, the response carries an ETag for (did, variant) and is compressed when large.
+    """
+    if not jsonio.looks_like_json(stdout):
+        return {"raw_output": stdout}
+    if request is None:
+        return Response(content=stdout, media_type="application/json")
+    return cached_json_response(request, did, variant, stdout, etag_base(stdout, from_log))
+
+def pair_concepts(concepts, language):
+    """English (or untagged) title paired with the `language` title of each concept, sorted by the English title"""
+    pairs = []
+    for c in concepts:
+        titles = c.get("titles", {})
+        en_title = titles.get("en", titles.get("default", []))
+        target_title = titles.get(language, [])
+        if en_title and target_title:
+            pairs.append({
+                "en": en_title[0],
+                language: target_title[0]
+            })
+    pairs.sort(key=lambda x: x["en"])
+    return pairs
+
 @router.get("/create_from_url")
-async def create_did_from_url(url: str, token: str = Query(None, description="Optional DID token")):
+async def create_did_from_url(
+    url: str,
+    token: str = Query(None, description="Optional DID token"),
+    dedup: bool = Query(None, description="Return an existing DID for the same URL or near-identical content (default: DEDUP_ON_CREATE)")
+):
     """
     Create a DID with payload derived from a URL.
     Extracts title and timestamp. Supports RDF Turtle.
@@ -102,7 +148,8 @@ async def create_did_from_url(url: str, token: str = Query(None, description="Op
 
     try:
         # 1. Fetch URL
-        response = requests.get(url, timeout=10)
+        with observe_fetch("bookmark", url):
+            response = requests.get(url, timeout=10)
         response.raise_for_status()
         
         # 2. Check Content Type / Extension
@@ -116,7 +163,8 @@ async def create_did_from_url(url: str, token: str = Query(None, description="Op
         }
         
         if is_turtle:
-            rdf_meta = parse_rdf_metadata(response.text, content_type="turtle", target_url=url)
+            with span("parse_rdf_metadata", bytes=len(response.content)):
+                rdf_meta = parse_rdf_metadata(response.text, content_type="turtle", target_url=url)
             if rdf_meta:
                  payload["rdf"] = rdf_meta
                  titles = rdf_meta.get("titles", {})
@@ -147,6 +195,11 @@ async def create_did_from_url(url: str, token: str = Query(None, description="Op
             
         if token:
             payload["token"] = token
+
+        # 4. Reuse an existing DID for the same URL / near-identical content
+        duplicate = check_duplicate(payload, override=dedup)
+        if duplicate:
+            return {**duplicate_response(duplicate), "doc": None, "stored_payload": None}
         
         # 5. Create DID
         result = run_oydid_command(["create", "--json-output"], input_data=payload)
@@ -154,14 +207,14 @@ async def create_did_from_url(url: str, token: str = Query(None, description="Op
         if result.returncode != 0:
             raise HTTPException(status_code=500, detail=f"OYDID creation failed: {result.stderr}")
             
-        did_data = json.loads(result.stdout)
+        did_data = jsonio.loads(result.stdout)
         did = did_data.get("did")
         
         # Store in Qdrant
         try:
             qdrant_service.upsert_document(did, payload)
         except Exception as e:
-            print(f"Warning: Failed to store in Qdrant: {e}")
+            logger.warning("Failed to store in Qdrant", extra={"did": did, "error": str(e)})
         
         return {
             "did": did,
@@ -180,7 +233,8 @@ async def fetch_jsonld(url: str):
     Fetch JSON-LD from a URL (Backend proxy to avoid CORS).
     """
     try:
-        response = requests.get(url, timeout=15)
+        with observe_fetch("jsonld", url):
+            response = requests.get(url, timeout=15)
         response.raise_for_status()
         return response.json()
     except requests.RequestException as e:
@@ -189,7 +243,7 @@ async def fetch_jsonld(url: str):
         raise HTTPException(status_code=500, detail=f"Error parsing JSON: {str(e)}")
 
 @router.get("/share/{did}")
-async def share_did(did: str, language: str = Query(None), token: str = Query(None)):
+async def share_did(request: Request, did: str, language: str = Query(None), token: str = Query(None)):
     """
     Resolve a DID and return its bookmark payload.
     Supports filtering by language for RDF payloads.
@@ -205,13 +259,18 @@ async def share_did(did: str, language: str = Query(None), token: str = Query(No
         if not language and len(parts) > 1:
             language = parts[1]
 
-    result = run_oydid_command(["read", did, "--json-output"])
+    variant = f"share:{language or ''}"
+    cached = not_modified(request, did, variant)
+    if cached:
+        return cached
+
+    result = await run_oydid_command_async(["read", did, "--json-output"])
     
     if result.returncode != 0:
         raise HTTPException(status_code=404, detail=f"DID not found or error: {result.stderr}")
         
     try:
-        did_doc = json.loads(result.stdout)
+        did_doc = jsonio.loads(result.stdout)
         doc = did_doc.get("doc", {})
         log = did_doc.get("log", [])
         
@@ -236,29 +295,7 @@ async def share_did(did: str, language: str = Query(None), token: str = Query(No
         
         if language and target_payload.get("is_rdf") and "rdf" in target_payload:
             rdf_data = target_payload["rdf"]
-            concepts = rdf_data.get("concepts", [])
-            
-            # 1. Main Title
-            # Try to find the title of the focus node (if hint exists) or just the first concept with that language?
-            # Creating a "pairs" output for properties
-            pairs = []
-            
-            for c in concepts:
-                titles = c.get("titles", {})
-                en_title = titles.get("en", titles.get("default", []))
-                target_title = titles.get(language, [])
-                
-                if en_title and target_title:
-                    # Create pair
-                    pairs.append({
-                        "en": en_title[0],
-                        language: target_title[0]
-                    })
-            
-            # Sort pairs by english title for consistency?
-            pairs.sort(key=lambda x: x["en"])
-            
-            payload["concepts"] = pairs
+            payload["concepts"] = pair_concepts(rdf_data.get("concepts", []), language)
             # Keep top-level title as well for the bookmark itself
             # Try to grab the main hint from metadata if preserved, or just keep what was in payload["title"]
             # existing logic preserved payload["title"] from create step which used the hint.
@@ -266,7 +303,8 @@ async def share_did(did: str, language: str = Query(None), token: str = Query(No
         elif not language and target_payload.get("is_rdf"):
              payload["rdf_metadata"] = target_payload.get("rdf")
 
-        return payload
+        # Payloads carrying an access token must not land in shared caches
+        return cached_json_response(request, did, variant, payload, etag_base(result.stdout), private=bool(payload["token"]))
     except json.JSONDecodeError:
         return {"raw_output": result.stdout}
 
@@ -310,8 +348,15 @@ def get_did_w3c_and_keys(did: str, did_data: dict) -> dict:
     return response_data
 
 @router.post("/create")
-async def create_did(request: DidCreateRequest):
+async def create_did(
+    request: DidCreateRequest,
+    dedup: bool = Query(None, description="Return an existing DID for near-identical content (default: DEDUP_ON_CREATE)")
+):
     """Create a new DID"""
+    duplicate = check_duplicate(request.payload, collection=request.collection, override=dedup)
+    if duplicate:
+        return duplicate_response(duplicate)
+
     result = run_oydid_command(["create", "--json-output"], input_data=request.payload)
     
     if result.returncode != 0:
@@ -323,16 +368,17 @@ async def create_did(request: DidCreateRequest):
         if request.collection:
             request.payload["collection"] = request.collection
 
-        did_data = json.loads(result.stdout)
+        did_data = jsonio.loads(result.stdout)
         did = did_data.get("did")
         
         # Store in Qdrant
         try:
             qdrant_service.upsert_document(did, request.payload, collection=request.collection)
         except Exception as e:
-            print(f"Warning: Failed to store in Qdrant: {e}")
+            logger.warning("Failed to store in Qdrant", extra={"did": did, "error": str(e)})
             
-        return get_did_w3c_and_keys(did, did_data)
+        with span("w3c_readback", did=did):
+            return get_did_w3c_and_keys(did, did_data)
         
     except json.JSONDecodeError:
         return {"raw_output": result.stdout}
@@ -349,7 +395,7 @@ async def create_restricted_did(request: DidCreateRestrictedRequest):
         raise HTTPException(status_code=400, detail=f"Encryption failed for target DID {request.target_did}: {error_detail}")
         
     try:
-        encrypted_payload = json.loads(encrypt_result.stdout)
+        encrypted_payload = jsonio.loads(encrypt_result.stdout)
     except json.JSONDecodeError:
         # If output is not json but a JWE string or something
         encrypted_payload = {"jwe": encrypt_result.stdout.strip()}
@@ -371,15 +417,16 @@ async def create_restricted_did(request: DidCreateRestrictedRequest):
         if request.collection:
             final_payload["collection"] = request.collection
 
-        did_data = json.loads(result.stdout)
+        did_data = jsonio.loads(result.stdout)
         did = did_data.get("did")
         
         try:
             qdrant_service.upsert_document(did, final_payload, collection=request.collection)
         except Exception as e:
-            print(f"Warning: Failed to store in Qdrant: {e}")
+            logger.warning("Failed to store in Qdrant", extra={"did": did, "error": str(e)})
             
-        return get_did_w3c_and_keys(did, did_data)
+        with span("w3c_readback", did=did):
+            return get_did_w3c_and_keys(did, did_data)
         
     except json.JSONDecodeError:
         return {"raw_output": result.stdout}
@@ -398,7 +445,7 @@ async def resolve_restricted_did(request: DidResolveRestrictedRequest):
         raise HTTPException(status_code=404, detail=f"DID not found or error: {error_detail}")
 
     try:
-        did_data = json.loads(result.stdout)
+        did_data = jsonio.loads(result.stdout)
         doc = did_data.get("doc", {})
         encrypted_data = doc.get("encrypted_data")
         
@@ -433,7 +480,7 @@ async def resolve_restricted_did(request: DidResolveRestrictedRequest):
             raise HTTPException(status_code=400, detail=f"Decryption failed: {error_detail}")
             
         try:
-            decrypted_payload = json.loads(decrypt_result.stdout)
+            decrypted_payload = jsonio.loads(decrypt_result.stdout)
             return {
                 "did": did,
                 "decrypted_payload": decrypted_payload,
@@ -450,44 +497,96 @@ async def resolve_restricted_did(request: DidResolveRestrictedRequest):
         raise HTTPException(status_code=500, detail="Invalid JSON from DID resolver")
 
 @router.get("/{did}")
-async def read_did(did: str):
+async def read_did(request: Request, did: str):
     """Read a DID Document"""
     # Sanitize DID to handle malformed URL params (e.g. &language=fr inside path)
     if "&" in did:
         did_original = did
         did = did.split("&")[0]
-        print(f"DEBUG: Sanitized DID. Original: '{did_original}', Sanitized: '{did}'")
-    else:
-        print(f"DEBUG: DID received (no &): '{did}'")
+        debug_sampled(logger, "Sanitized DID", original=did_original, did=did)
 
-    result = run_oydid_command(["read", did, "--json-output"])
-    print(f"DEBUG: OYDID Read Result: ReturnCode={result.returncode}, Stderr='{result.stderr}', StdoutLen={len(result.stdout)}")
+    cached = not_modified(request, did, "read")
+    if cached:
+        return cached
+
+    result = await run_oydid_command_async(["read", did, "--json-output"])
+    debug_sampled(logger, "OYDID read", did=did, returncode=result.returncode, stdout_len=len(result.stdout))
     
     if result.returncode != 0:
         error_detail = getattr(result, "error_msg", result.stderr)
         raise HTTPException(status_code=404, detail=f"DID not found or error: {error_detail}")
         
+    return cli_json_response(result.stdout, request, did, "read")
+
+async def _resolve_for_batch(did: str, mode: str) -> tuple:
+    """(did, document, None) or (did, None, error)"""
+    async with resolve_limiter:
+        result = await run_oydid_command_async(["read", did, RESOLVE_MODES[mode]])
+    if result.returncode != 0:
+        return did, None, {"status_code": 404, "error": getattr(result, "error_msg", result.stderr)}
     try:
-        return json.loads(result.stdout)
+        return did, jsonio.loads(result.stdout), None
     except json.JSONDecodeError:
-        return {"raw_output": result.stdout}
+        return did, None, {"status_code": 500, "error": "Invalid JSON from DID resolver"}
+
+@router.post("/resolve/batch")
+async def resolve_did_batch(request: DidResolveBatchRequest):
+    """
+    Resolve many DIDs in one call. Duplicates are resolved once, cached resolutions are
+    reused (unless use_cache is false) and the rest run concurrently within a shared bound.
+    Returns documents in `results` and per-DID failures in `errors`, keyed by DID.
+    """
+    dids = list(dict.fromkeys(did.split("&")[0] for did in request.dids if did))
+    if len(dids) > DID_RESOLVE_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {DID_RESOLVE_BATCH_MAX} DIDs")
+
+    results, errors, pending = {}, {}, []
+    for did in dids:
+        cached = did_cache.get((did, request.mode)) if request.use_cache else None
+        if cached is not None:
+            results[did] = cached
+        else:
+            pending.append(did)
+    cached_count = len(results)
+
+    for did, document, error in await asyncio.gather(*(_resolve_for_batch(did, request.mode) for did in pending)):
+        if error:
+            errors[did] = error
+        else:
+            results[did] = document
+            did_cache.set((did, request.mode), document)
+
+    return {
+        "mode": request.mode,
+        "results": results,
+        "errors": errors,
+        "stats": {
+            "requested": len(request.dids),
+            "unique": len(dids),
+            "cached": cached_count,
+            "resolved": len(results) - cached_count,
+            "failed": len(errors)
+        }
+    }
 
 @router.get("/resolve/{did}")
-async def resolve_did(did: str):
+async def resolve_did(request: Request, did: str):
     """Resolve a DID to its full W3C DID Document."""
     if "&" in did:
         did = did.split("&")[0]
 
-    result = run_oydid_command(["read", did, "--w3c-did"])
+    cached = not_modified(request, did, "w3c")
+    if cached:
+        return cached
+
+    result = await run_oydid_command_async(["read", did, "--w3c-did"])
     
     if result.returncode != 0:
         error_detail = getattr(result, "error_msg", result.stderr)
         raise HTTPException(status_code=404, detail=f"DID not found or error: {error_detail}")
         
-    try:
-        return json.loads(result.stdout)
-    except json.JSONDecodeError:
-        return {"raw_output": result.stdout}
+    # The W3C document carries no log, so its ETag hashes the document itself
+    return cli_json_response(result.stdout, request, did, "w3c", from_log=False)
 
 @router.get("/validate/{did}")
 async def validate_did(did: str, public_key: str = Query(None, description="Public key multibase to check against the DID")):
@@ -497,14 +596,14 @@ async def validate_did(did: str, public_key: str = Query(None, description="Publ
     if "&" in did:
         did = did.split("&")[0]
 
-    result = run_oydid_command(["read", did, "--w3c-did"])
+    result = await run_oydid_command_async(["read", did, "--w3c-did"])
     
     if result.returncode != 0:
         error_detail = getattr(result, "error_msg", result.stderr)
         raise HTTPException(status_code=404, detail=f"DID not found or invalid: {error_detail}")
         
     try:
-        did_doc = json.loads(result.stdout)
+        did_doc = jsonio.loads(result.stdout)
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Invalid JSON returned from resolver")
         
@@ -540,7 +639,7 @@ async def update_did(request: DidUpdateRequest):
         raise HTTPException(status_code=400, detail=f"Update failed: {error_detail}")
         
     try:
-        return json.loads(result.stdout)
+        return jsonio.loads(result.stdout)
     except json.JSONDecodeError:
         return {"raw_output": result.stdout}
 
@@ -554,6 +653,6 @@ async def revoke_did(did: str):
         raise HTTPException(status_code=400, detail=f"Revocation failed: {error_detail}")
         
     try:
-        return json.loads(result.stdout)
+        return jsonio.loads(result.stdout)
     except json.JSONDecodeError:
         return {"raw_output": result.stdout}
@@ -0,0 +1,92 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from ..services.qdrant_service import qdrant_service
+import asyncio
+import json
+import uuid
+import zlib
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+async def iter_points(collection: str, after: Optional[str], batch_size: int):
+    """Scroll a collection page by page off the event loop; only one page is held in memory"""
+    offset = after
+    while True:
+        points, next_offset = await asyncio.to_thread(qdrant_service.scroll_page, collection, offset, batch_size)
+        for point in points:
+            # Qdrant offsets are inclusive; `after` is the last id the client already has
+            if after is not None and str(point.id) == after:
+                continue
+            yield point
+        if next_offset is None:
+            break
+        offset = next_offset
+
+async def ndjson_lines(collections: list, after: Optional[str], batch_size: int):
+    for coll in collections:
+        async for point in iter_points(coll, after, batch_size):
+            payload = point.payload or {}
+            yield json.dumps({
+                "id": str(point.id),
+                "collection": coll,
+                "did": payload.get("did"),
+                "json_ld": payload.get("json_ld")
+            }) + "\n"
+        # `after` applies to the first collection only
+        after = None
+
+async def gzip_stream(lines, flush_every: int = 256):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    pending = 0
+    async for line in lines:
+        chunk = compressor.compress(line.encode())
+        pending += 1
+        if pending >= flush_every:
+            # Sync flush so the client receives data while the export runs
+            chunk += compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+@router.get("/{collection}")
+async def export_collection(
+    collection: str,
+    request: Request,
+    after: Optional[str] = Query(None, description="Resume after this point id (the `id` of the last line received)"),
+    gzip: Optional[bool] = Query(None, description="Force gzip on/off; defaults to Accept-Encoding"),
+    batch_size: int = Query(256, ge=1, le=2048, description="Points fetched per Qdrant scroll page")
+):
+    """
+    Stream every point of a collection as NDJSON: `{"id", "collection", "did", "json_ld"}` per line.
+    Use `all` to export every collection. Interrupted exports can be resumed with `after`.
+    """
+    if collection == "all":
+        collections = list(qdrant_service.collections)
+    elif collection in qdrant_service.collections:
+        collections = [collection]
+    else:
+        raise HTTPException(status_code=404, detail=f"Unknown collection: {collection}")
+
+    if after is not None and len(collections) > 1:
+        raise HTTPException(status_code=400, detail="`after` is only supported when exporting a single collection")
+    if after is not None:
+        # Checked before the response starts; Qdrant would otherwise reject it mid-stream
+        try:
+            after = str(uuid.UUID(after))
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid `after` point id: {after!r}")
+
+    if gzip is None:
+        gzip = "gzip" in request.headers.get("accept-encoding", "").lower()
+
+    lines = ndjson_lines(collections, after, batch_size)
+    headers = {
+        "Content-Disposition": f'attachment; filename="{collection}.ndjson{".gz" if gzip else ""}"',
+        "Vary": "Accept-Encoding"
+    }
+    if gzip:
+        # A .gz file download, not a transfer encoding: clients keep the bytes compressed
+        return StreamingResponse(gzip_stream(lines), media_type="application/gzip", headers=headers)
+    return StreamingResponse(lines, media_type="application/x-ndjson", headers=headers)
@@ -1,29 +1,62 @@
-from fastapi import APIRouter, HTTPException
-from ..models import GroupRequest, GroupUpdateRequest
+from fastapi import APIRouter, HTTPException, Query
+from ..models import GroupRequest, GroupUpdateRequest, GroupMembersDiffRequest
 from ..services.oydid import run_oydid_command
+from ..services import jsonio
 from ..services.qdrant_service import qdrant_service
+from ..services.membership import membership_index, MEMBERSHIP_INDEX_REFRESH
+from ..services.group_pages import group_pager
+from ..services.payloads import build_group_payload
+from ..services.log import get_logger
+from typing import Optional
 import json
-from datetime import datetime
+import threading
+import time
 
 router = APIRouter(prefix="/groups", tags=["Groups"])
+logger = get_logger("groups")
+
+_refresh_lock = threading.Lock()
+_refresh_thread: Optional[threading.Thread] = None
+
+def ensure_membership_index():
+    """
+    Build the membership index from the stored group DIDs on first use. With
+    MEMBERSHIP_INDEX_REFRESH set, a stale index is served while it is rebuilt in the
+    background, so writes handled by other workers show up.
+    """
+    global _refresh_thread
+    if not membership_index.built:
+        rebuild_membership_index()
+    elif MEMBERSHIP_INDEX_REFRESH > 0 and time.monotonic() - membership_index.built_at > MEMBERSHIP_INDEX_REFRESH:
+        with _refresh_lock:
+            if _refresh_thread is None or not _refresh_thread.is_alive():
+                _refresh_thread = threading.Thread(target=_refresh_membership_index, daemon=True)
+                _refresh_thread.start()
+
+def _refresh_membership_index():
+    try:
+        rebuild_membership_index()
+    except Exception as e:
+        logger.warning("Membership index refresh failed", extra={"error": str(e)})
+
+def rebuild_membership_index() -> int:
+    def paged_members(did):
+        # Members of paged groups live in their MembershipPage DIDs
+        try:
+            return group_pager.load(did).all_members()
+        except Exception as e:
+            logger.warning("Failed to load membership pages", extra={"did": did, "error": str(e)})
+            return {}
+
+    documents = (point.payload for point in qdrant_service.scroll_documents("groups"))
+    count = membership_index.rebuild(documents, paged_members)
+    logger.info("Rebuilt membership index", extra={"groups": count})
+    return count
 
 @router.post("/create")
 async def create_group(request: GroupRequest):
     """Create a new Organization (Group) DID"""
-    payload = {
-        "@context": "http://www.w3.org/ns/org#",
-        "type": "Organization",
-        "name": request.name,
-        "description": request.description,
-        "hasMember": [
-            {
-                "type": "Membership",
-                "member": m.member,
-                "role": m.role
-            } for m in request.members
-        ],
-        "timestamp": datetime.now().isoformat()
-    }
+    payload = build_group_payload(request)
     
     result = run_oydid_command(["create", "--json-output"], input_data=payload)
     
@@ -32,14 +65,16 @@ async def create_group(request: GroupRequest):
         raise HTTPException(status_code=400, detail=f"OYDID Error: {error_detail}")
         
     try:
-        did_data = json.loads(result.stdout)
+        did_data = jsonio.loads(result.stdout)
         did = did_data.get("did")
-        
-        # Store in Qdrant
-        try:
-            qdrant_service.upsert_document(did, payload)
-        except Exception as e:
-            print(f"Warning: Failed to store in Qdrant: {e}")
+        if did:
+            membership_index.set_group(did, payload)
+
+            # Store in Qdrant
+            try:
+                qdrant_service.upsert_document(did, payload)
+            except Exception as e:
+                logger.warning("Failed to store in Qdrant", extra={"did": did, "error": str(e)})
             
         return did_data
     except json.JSONDecodeError:
@@ -48,36 +83,85 @@ async def create_group(request: GroupRequest):
 @router.put("/{did}")
 async def update_group(did: str, request: GroupRequest):
     """Update an existing Organization (Group) DID"""
-    payload = {
-        "@context": "http://www.w3.org/ns/org#",
-        "type": "Organization",
-        "name": request.name,
-        "description": request.description,
-        "hasMember": [
-            {
-                "type": "Membership",
-                "member": m.member,
-                "role": m.role
-            } for m in request.members
-        ],
-        "timestamp": datetime.now().isoformat(),
-        "updated_at": datetime.now().isoformat()
-    }
-    
-    result = run_oydid_command(["update", did, "--json-output"], input_data=payload)
-    
-    if result.returncode != 0:
-        error_detail = getattr(result, "error_msg", result.stderr)
-        raise HTTPException(status_code=400, detail=f"Update failed: {error_detail}")
-        
+    payload = build_group_payload(request, updated=True)
+
+    # Paged groups keep their MembershipPage DIDs; the member list is applied to them as a diff
+    outcome = group_pager.replace(did, payload)
+    result = outcome["result"]
+
+    membership_index.set_group(did, payload)
+
     try:
-        did_data = json.loads(result.stdout)
+        did_data = jsonio.loads(result.stdout)
         # Update in Qdrant
         try:
-            qdrant_service.upsert_document(did, payload)
+            qdrant_service.upsert_document(did, outcome["group_doc"])
         except Exception as e:
-            print(f"Warning: Failed to update in Qdrant: {e}")
+            logger.warning("Failed to update in Qdrant", extra={"did": did, "error": str(e)})
             
         return did_data
     except json.JSONDecodeError:
         return {"raw_output": result.stdout}
+
+def apply_membership_diff(did: str, add: dict, remove: list) -> dict:
+    summary = group_pager.apply_diff(did, add, remove)
+
+    membership_index.remove_members(did, summary["removed"])
+    membership_index.add_members(did, {**summary["added"], **summary["updated"]})
+
+    # Only re-index the group document when it was rewritten (migration or new pages)
+    group_doc = summary.pop("group_doc")
+    if group_doc:
+        try:
+            qdrant_service.upsert_document(did, group_doc)
+        except Exception as e:
+            logger.warning("Failed to update in Qdrant", extra={"did": did, "error": str(e)})
+
+    return {"group": did, **summary}
+
+@router.patch("/{did}/members")
+async def update_group_members(did: str, request: GroupMembersDiffRequest):
+    """
+    Add, re-role or remove members without rewriting the whole group.
+    Membership is stored in paged MembershipPage DIDs; only the pages holding
+    changed members are updated.
+    """
+    add = {m.member: m.role for m in request.add}
+    return apply_membership_diff(did, add, request.remove)
+
+@router.delete("/{did}/members/{member_did}")
+async def remove_group_member(did: str, member_did: str):
+    """Remove a single member from a group"""
+    summary = apply_membership_diff(did, {}, [member_did])
+    if not summary["removed"]:
+        raise HTTPException(status_code=404, detail=f"{member_did} is not a member of {did}")
+    return summary
+
+@router.get("/memberships/{member_did}")
+async def get_memberships(member_did: str, transitive: bool = Query(False, description="Include groups reached through nested OrganizationalUnits")):
+    """List the groups a DID is a member of, with its role in each"""
+    ensure_membership_index()
+    return {
+        "member": member_did,
+        "groups": membership_index.groups_of(member_did, transitive=transitive)
+    }
+
+@router.get("/{did}/members")
+async def get_group_members(did: str, transitive: bool = Query(False, description="Include members of nested groups")):
+    """List the members of a group from the membership index"""
+    ensure_membership_index()
+    if not membership_index.is_group(did):
+        raise HTTPException(status_code=404, detail=f"Group not found in membership index: {did}")
+    return {
+        "group": did,
+        "members": membership_index.members_of(did, transitive=transitive)
+    }
+
+@router.post("/index/rebuild")
+async def rebuild_index():
+    """Rebuild the membership index from the stored group DIDs"""
+    try:
+        rebuild_membership_index()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Rebuild failed: {str(e)}")
+    return {"status": "rebuilt", **membership_index.stats()}
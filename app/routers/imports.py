@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Query, Request
+from ..services.importer import run_import, iter_lines, IMPORT_WORKERS
+from ..services.log import get_logger
+import json
+import os
+import uuid
+
+router = APIRouter(prefix="/import", tags=["Import"])
+logger = get_logger("imports")
+
+IMPORT_DEAD_LETTER_DIR = os.getenv("IMPORT_DEAD_LETTER_DIR", "import_dead_letters")
+MAX_INLINE_DEAD_LETTERS = 100
+
+@router.post("")
+async def import_ndjson(
+    request: Request,
+    workers: int = Query(IMPORT_WORKERS, ge=1, le=64, description="Concurrent oydid create processes"),
+    index: bool = Query(True, description="Index the created DIDs in Qdrant")
+):
+    """
+    Bulk import an NDJSON request body of `{"kind": "variable|group|policy|croissant", "data": {...}}` rows.
+    The body is processed as a stream. Failed rows are written to a dead-letter file; the first
+    few are also returned inline together with the final progress/throughput report.
+    """
+    job_id = str(uuid.uuid4())
+    os.makedirs(IMPORT_DEAD_LETTER_DIR, exist_ok=True)
+    dead_letter_path = os.path.join(IMPORT_DEAD_LETTER_DIR, f"{job_id}.ndjson")
+    inline = []
+
+    with open(dead_letter_path, "w") as dl:
+        def dead_letter(entry):
+            dl.write(json.dumps(entry) + "\n")
+            if len(inline) < MAX_INLINE_DEAD_LETTERS:
+                inline.append(entry)
+
+        def progress(report):
+            logger.info("Import progress", extra={"job_id": job_id, "report": report})
+
+        report = await run_import(
+            iter_lines(request.stream()),
+            dead_letter,
+            progress=progress,
+            workers=workers,
+            index=index
+        )
+
+    if not report["failed"]:
+        os.remove(dead_letter_path)
+
+    return {
+        "job_id": job_id,
+        "report": report,
+        "dead_letter_file": dead_letter_path if report["failed"] else None,
+        "dead_letters": inline
+    }
@@ -1,11 +1,17 @@
-from fastapi import APIRouter, HTTPException, Body, Query
-from typing import Dict, Any, List, Optional
+from fastapi import APIRouter, HTTPException, Body, Query, Request
+from typing import Dict, Any, List, Optional, Literal
 from ..models_oac import OacPolicyCreateRequest
-from ..services.oydid import run_oydid_command
+from ..services.oydid import run_oydid_command, run_oydid_command_async
+from ..services import jsonio
+from ..services.http_cache import cached_json_response, etag_base, not_modified
 from ..services.qdrant_service import qdrant_service
+from ..services.payloads import build_policy_payload
+from ..services.log import get_logger
 import json
+from datetime import datetime
 
 router = APIRouter(prefix="/oac", tags=["ODRL Access Control Profile"])
+logger = get_logger("oac")
 
 @router.post("/policy")
 async def create_oac_policy(policy: OacPolicyCreateRequest):
@@ -15,7 +21,7 @@ async def create_oac_policy(policy: OacPolicyCreateRequest):
     """
     try:
         # Prepare payload
-        policy_dict = policy.dict(by_alias=True)
+        policy_dict = build_policy_payload(policy)
         
         # Use OYDID to create a DID with this policy as payload
         result = run_oydid_command(["create", "--json-output"], input_data=policy_dict)
@@ -23,14 +29,14 @@ async def create_oac_policy(policy: OacPolicyCreateRequest):
         if result.returncode != 0:
             raise HTTPException(status_code=500, detail=f"OYDID creation failed: {result.stderr}")
             
-        did_data = json.loads(result.stdout)
+        did_data = jsonio.loads(result.stdout)
         did = did_data.get("did")
         
         # Store in Qdrant (auto-routes to 'policy' collection)
         try:
             qdrant_service.upsert_document(did, policy_dict)
         except Exception as e:
-            print(f"Warning: Failed to store in Qdrant: {e}")
+            logger.warning("Failed to store in Qdrant", extra={"did": did, "error": str(e)})
             
         return {
             "status": "created",
@@ -42,17 +48,21 @@ async def create_oac_policy(policy: OacPolicyCreateRequest):
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/policy/{uid}")
-async def get_oac_policy(uid: str):
+async def get_oac_policy(request: Request, uid: str):
     """Retrieve an OAC policy by its UID (which is a DID)."""
+    cached = not_modified(request, uid, "policy")
+    if cached:
+        return cached
+
     # Use OYDID to read the DID
-    result = run_oydid_command(["read", uid, "--json-output"])
+    result = await run_oydid_command_async(["read", uid, "--json-output"])
     
     if result.returncode != 0:
         raise HTTPException(status_code=404, detail=f"Policy not found: {result.stderr}")
         
     try:
-        did_doc = json.loads(result.stdout)
-        return did_doc.get("doc", {})
+        did_doc = jsonio.loads(result.stdout)
+        return cached_json_response(request, uid, "policy", did_doc.get("doc", {}), etag_base(result.stdout))
         
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Failed to decode OYDID response")
@@ -60,15 +70,40 @@ async def get_oac_policy(uid: str):
 @router.get("/search")
 async def search_oac_policies(
     q: str, 
-    collection: Optional[str] = Query(None, description="Qdrant collection to search in (policy, prompts, variables, croissant, dids)")
+    collection: Optional[str] = Query(None, description="Qdrant collection to search in (policy, prompts, variables, croissant, dids)"),
+    mode: Literal["vector", "keyword", "hybrid"] = Query("vector", description="vector (semantic), keyword (BM25) or hybrid (both, rank-fused); keyword/hybrid answer exact identifier matches directly"),
+    type: Optional[str] = Query(None, description="Filter by payload type (e.g. Variable, Offer, Organization)"),
+    creator: Optional[str] = Query(None, description="Filter by dcterms:creator"),
+    target: Optional[str] = Query(None, description="Filter by permission target"),
+    action: Optional[str] = Query(None, description="Filter by permission action"),
+    restricted_to: Optional[str] = Query(None, description="Filter restricted DIDs by target DID"),
+    created_after: Optional[str] = Query(None, description="Only documents with timestamp >= this ISO 8601 datetime"),
+    created_before: Optional[str] = Query(None, description="Only documents with timestamp <= this ISO 8601 datetime")
 ):
     """
     Search for DIDs in Qdrant based on keywords.
     Returns both DID and JSON-LD with similarity measure.
+    Structured filters are applied inside Qdrant using payload indexes.
     """
+    for name, value in (("created_after", created_after), ("created_before", created_before)):
+        if value:
+            try:
+                datetime.fromisoformat(value.replace("Z", "+00:00"))
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"{name} must be an ISO 8601 datetime")
+
+    filters = {
+        "type": type,
+        "creator": creator,
+        "target": target,
+        "action": action,
+        "restricted_to": restricted_to,
+        "timestamp_from": created_after,
+        "timestamp_to": created_before
+    }
     try:
         # Search across all collections if not provided
-        results = qdrant_service.search_documents(q, collection=collection)
+        results = qdrant_service.search_documents(q, collection=collection, mode=mode, filters=filters)
         return results
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
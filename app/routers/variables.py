@@ -1,23 +1,19 @@
 from fastapi import APIRouter, HTTPException
 from ..models import VariableRequest, VariableUpdateRequest
 from ..services.oydid import run_oydid_command
+from ..services import jsonio
 from ..services.qdrant_service import qdrant_service
+from ..services.payloads import build_variable_payload
+from ..services.log import get_logger
 import json
-from datetime import datetime
 
 router = APIRouter(prefix="/variables", tags=["Variables"])
+logger = get_logger("variables")
 
 @router.post("/create")
 async def create_variable(request: VariableRequest):
     """Create a new Variable DID"""
-    payload = {
-        "type": "Variable",
-        "name": request.name,
-        "description": request.description,
-        "unit": request.unit,
-        "context": request.context,
-        "timestamp": datetime.now().isoformat()
-    }
+    payload = build_variable_payload(request)
     
     result = run_oydid_command(["create", "--json-output"], input_data=payload)
     
@@ -26,14 +22,14 @@ async def create_variable(request: VariableRequest):
         raise HTTPException(status_code=400, detail=f"OYDID Error: {error_detail}")
         
     try:
-        did_data = json.loads(result.stdout)
+        did_data = jsonio.loads(result.stdout)
         did = did_data.get("did")
         
         # Store in Qdrant
         try:
             qdrant_service.upsert_document(did, payload)
         except Exception as e:
-            print(f"Warning: Failed to store in Qdrant: {e}")
+            logger.warning("Failed to store in Qdrant", extra={"did": did, "error": str(e)})
             
         return did_data
     except json.JSONDecodeError:
@@ -42,15 +38,7 @@ async def create_variable(request: VariableRequest):
 @router.put("/{did}")
 async def update_variable(did: str, request: VariableRequest):
     """Update an existing Variable DID"""
-    payload = {
-        "type": "Variable",
-        "name": request.name,
-        "description": request.description,
-        "unit": request.unit,
-        "context": request.context,
-        "timestamp": datetime.now().isoformat(),
-        "updated_at": datetime.now().isoformat()
-    }
+    payload = build_variable_payload(request, updated=True)
     
     result = run_oydid_command(["update", did, "--json-output"], input_data=payload)
     
@@ -59,12 +47,12 @@ async def update_variable(did: str, request: VariableRequest):
         raise HTTPException(status_code=400, detail=f"Update failed: {error_detail}")
         
     try:
-        did_data = json.loads(result.stdout)
+        did_data = jsonio.loads(result.stdout)
         # Update in Qdrant as well
         try:
             qdrant_service.upsert_document(did, payload)
         except Exception as e:
-            print(f"Warning: Failed to update in Qdrant: {e}")
+            logger.warning("Failed to update in Qdrant", extra={"did": did, "error": str(e)})
             
         return did_data
     except json.JSONDecodeError:
@@ -1,83 +1,86 @@
 from fastapi import APIRouter, HTTPException
-from ..models import GoogleVcRequest, SshVcRequest, GitHubVcRequest, OrcidVcRequest
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from ..models import GoogleVcRequest, SshVcRequest, GitHubVcRequest, OrcidVcRequest, VcBatchRequest
 from ..services.oydid import run_oydid_command
+from ..services import jsonio
 from ..services.issuer import get_issuer_did
+from ..services.sshsig import verify_sshsig, SshSigError, SshSigUnsupported
+from ..services.ratelimit import AsyncRateLimiter
+from ..services.metrics import observe_fetch
+from ..services.log import get_logger
+import asyncio
 import os
 import json
 import subprocess
+import tempfile
 import requests
 from google.oauth2 import id_token
 from google.auth.transport import requests as google_requests
 
 router = APIRouter(prefix="/vc", tags=["Verifiable Credentials"])
+logger = get_logger("vcs")
 
-@router.post("/google")
-async def issue_google_vc(request: GoogleVcRequest):
-    """Issue a VC for a Google Account"""
-    issuer_did = get_issuer_did()
-    if not issuer_did:
-        raise HTTPException(status_code=500, detail="Issuer DID not initialized")
-
-    # 1. Verify Google Token
-    try:
-        client_id = os.getenv("GOOGLE_CLIENT_ID")
-        id_info = id_token.verify_oauth2_token(
-            request.token, 
-            google_requests.Request(), 
-            audience=client_id,
-            clock_skew_in_seconds=10
-        )
-        email = id_info.get("email")
-        if not email:
-            raise HTTPException(status_code=400, detail="Token does not contain email")
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid Google Token: {str(e)}")
-
-    # 2. Create VC Payload
-    vc_payload = {
-        "sub": request.subject_did,
-        "vc": {
-            "@context": ["https://www.w3.org/2018/credentials/v1"],
-            "type": ["VerifiableCredential", "EmailCredential"],
-            "credentialSubject": {
-                "id": request.subject_did,
-                "email": email,
-                "provider": "google"
-            }
+def build_vc(subject_did: str, credential_type: str, claims: dict) -> dict:
+    """Build an unsigned W3C VC for the given subject and claims"""
+    return {
+        "@context": ["https://www.w3.org/2018/credentials/v1"],
+        "type": ["VerifiableCredential", credential_type],
+        "credentialSubject": {
+            "id": subject_did,
+            **claims
         }
     }
-    
-    # 3. Issue VC
+
+def issue_vc(issuer_did: str, vc: dict):
+    """Sign a VC with the issuer DID via oydid vc"""
     cmd = ["vc", "--issuer", issuer_did, "--json-output"]
-    result = run_oydid_command(cmd, input_data=vc_payload["vc"])
-    
+    result = run_oydid_command(cmd, input_data=vc)
+
     if result.returncode != 0:
         raise HTTPException(status_code=500, detail=f"Failed to issue VC: {result.stderr}")
-        
+
     try:
-        return json.loads(result.stdout)
+        return jsonio.loads(result.stdout)
     except json.JSONDecodeError:
         return {"raw_output": result.stdout}
 
-@router.post("/github")
-async def issue_github_vc(request: GitHubVcRequest):
-    """Issue a VC for a GitHub Account"""
-    issuer_did = get_issuer_did()
-    if not issuer_did:
-        raise HTTPException(status_code=500, detail="Issuer DID not initialized")
+def verify_google(request: GoogleVcRequest) -> dict:
+    """Verify a Google ID token and return the EmailCredential VC"""
+    try:
+        client_id = os.getenv("GOOGLE_CLIENT_ID")
+        with observe_fetch("google"):
+            id_info = id_token.verify_oauth2_token(
+                request.token,
+                google_requests.Request(),
+                audience=client_id,
+                clock_skew_in_seconds=10
+            )
+        email = id_info.get("email")
+        if not email:
+            raise HTTPException(status_code=400, detail="Token does not contain email")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid Google Token: {str(e)}")
+
+    return build_vc(request.subject_did, "EmailCredential", {
+        "email": email,
+        "provider": "google"
+    })
 
-    # 1. Verify GitHub Token
+def verify_github(request: GitHubVcRequest) -> dict:
+    """Verify a GitHub access token and return the GitHubCredential VC"""
     try:
         headers = {"Authorization": f"Bearer {request.token}", "Accept": "application/vnd.github.v3+json"}
-        response = requests.get("https://api.github.com/user", headers=headers)
-        
+        with observe_fetch("github"):
+            response = requests.get("https://api.github.com/user", headers=headers)
+
         if response.status_code != 200:
              raise HTTPException(status_code=400, detail=f"Invalid GitHub Token: {response.text}")
-        
+
         user_data = response.json()
         username = user_data.get("login")
         profile_url = user_data.get("html_url")
-        
+
         if not username:
              raise HTTPException(status_code=400, detail="Could not retrieve GitHub username")
 
@@ -86,117 +89,63 @@ async def issue_github_vc(request: GitHubVcRequest):
             raise e
         raise HTTPException(status_code=500, detail=f"GitHub verification failed: {str(e)}")
 
-    # 2. Create VC Payload
-    vc_payload = {
-        "sub": request.subject_did,
-        "vc": {
-            "@context": ["https://www.w3.org/2018/credentials/v1"],
-            "type": ["VerifiableCredential", "GitHubCredential"],
-            "credentialSubject": {
-                "id": request.subject_did,
-                "username": username,
-                "profile": profile_url,
-                "provider": "github"
-            }
-        }
-    }
-    
-    # 3. Issue VC
-    cmd = ["vc", "--issuer", issuer_did, "--json-output"]
-    result = run_oydid_command(cmd, input_data=vc_payload["vc"])
-    
-    if result.returncode != 0:
-        raise HTTPException(status_code=500, detail=f"Failed to issue VC: {result.stderr}")
-        
-    try:
-        return json.loads(result.stdout)
-    except json.JSONDecodeError:
-        return {"raw_output": result.stdout}
-
-@router.post("/orcid")
-async def issue_orcid_vc(request: OrcidVcRequest):
-    """Issue a VC for an ORCID iD"""
-    issuer_did = get_issuer_did()
-    if not issuer_did:
-        raise HTTPException(status_code=500, detail="Issuer DID not initialized")
+    return build_vc(request.subject_did, "GitHubCredential", {
+        "username": username,
+        "profile": profile_url,
+        "provider": "github"
+    })
 
-    # 1. Verify ORCID Token
+def verify_orcid(request: OrcidVcRequest) -> dict:
+    """Verify an ORCID token and iD and return the OrcidCredential VC"""
     try:
         headers = {"Authorization": f"Bearer {request.token}", "Accept": "application/json"}
         url = f"https://pub.orcid.org/v3.0/{request.orcid}/record"
-        
-        response = requests.get(url, headers=headers)
-        
+
+        with observe_fetch("orcid"):
+            response = requests.get(url, headers=headers)
+
         if response.status_code != 200:
              raise HTTPException(status_code=400, detail=f"Invalid ORCID Token or ID: {response.text}")
-        
+
         data = response.json()
         try:
             name = data.get("person", {}).get("name", {}).get("credit-name", {}).get("value")
         except:
             name = None
-            
+
     except Exception as e:
         if isinstance(e, HTTPException):
             raise e
         raise HTTPException(status_code=500, detail=f"ORCID verification failed: {str(e)}")
 
-    # 2. Create VC Payload
-    vc_payload = {
-        "sub": request.subject_did,
-        "vc": {
-            "@context": ["https://www.w3.org/2018/credentials/v1"],
-            "type": ["VerifiableCredential", "OrcidCredential"],
-            "credentialSubject": {
-                "id": request.subject_did,
-                "orcid": request.orcid,
-                "name": name,
-                "provider": "orcid"
-            }
-        }
-    }
-    
-    # 3. Issue VC
-    cmd = ["vc", "--issuer", issuer_did, "--json-output"]
-    result = run_oydid_command(cmd, input_data=vc_payload["vc"])
-    
-    if result.returncode != 0:
-        raise HTTPException(status_code=500, detail=f"Failed to issue VC: {result.stderr}")
-        
-    try:
-        return json.loads(result.stdout)
-    except json.JSONDecodeError:
-        return {"raw_output": result.stdout}
-
-@router.post("/ssh")
-async def issue_ssh_vc(request: SshVcRequest):
-    """Issue a VC for an SSH Key"""
-    issuer_did = get_issuer_did()
-    if not issuer_did:
-        raise HTTPException(status_code=500, detail="Issuer DID not initialized")
+    return build_vc(request.subject_did, "OrcidCredential", {
+        "orcid": request.orcid,
+        "name": name,
+        "provider": "orcid"
+    })
 
+def verify_ssh_signature_with_keygen(request: SshVcRequest):
+    """Verify an SSH signature by running ssh-keygen -Y verify"""
     principal = request.username
     allowed_signers_content = f"{principal} {request.public_key}"
-    
+
     try:
-        import tempfile
-        import os
         # Need to ensure temp files are cleaned up or use context managers carefully
         # In Docker /tmp is usually available
-        
+
         with tempfile.NamedTemporaryFile(mode='w', prefix="allowed_") as f_allowed, \
              tempfile.NamedTemporaryFile(mode='w', prefix="sig_") as f_sig, \
              tempfile.NamedTemporaryFile(mode='w', prefix="data_") as f_data:
-            
+
             f_allowed.write(allowed_signers_content)
             f_allowed.flush()
-            
+
             f_sig.write(request.signature)
             f_sig.flush()
-            
+
             f_data.write(request.subject_did)
             f_data.flush()
-            
+
             cmd = [
                 "ssh-keygen", "-Y", "verify",
                 "-f", f_allowed.name,
@@ -204,7 +153,7 @@ async def issue_ssh_vc(request: SshVcRequest):
                 "-n", "oydid",
                 "-s", f_sig.name
             ]
-            
+
             with open(f_data.name, 'r') as f_data_read:
                 verify_proc = subprocess.run(
                     cmd,
@@ -212,9 +161,9 @@ async def issue_ssh_vc(request: SshVcRequest):
                     capture_output=True,
                     text=True
                 )
-            
+
             if verify_proc.returncode != 0:
-                print(f"SSH Verify Error: {verify_proc.stderr}")
+                logger.warning("ssh-keygen verify failed", extra={"error": verify_proc.stderr})
                 raise HTTPException(status_code=400, detail=f"Signature verification failed: {verify_proc.stderr.strip()}")
 
     except Exception as e:
@@ -222,25 +171,132 @@ async def issue_ssh_vc(request: SshVcRequest):
             raise e
         raise HTTPException(status_code=500, detail=f"Verification process error: {str(e)}")
 
-    vc_payload = {
-        "sub": request.subject_did,
-        "vc": {
-            "@context": ["https://www.w3.org/2018/credentials/v1"],
-            "type": ["VerifiableCredential", "SshKeyCredential"],
-            "credentialSubject": {
-                "id": request.subject_did,
-                "sshPublicKey": request.public_key
-            }
-        }
-    }
-    
-    cmd = ["vc", "--issuer", issuer_did, "--json-output"]
-    result = run_oydid_command(cmd, input_data=vc_payload["vc"])
-    
-    if result.returncode != 0:
-        raise HTTPException(status_code=500, detail=f"Failed to issue VC: {result.stderr}")
-        
+def verify_ssh(request: SshVcRequest) -> dict:
+    """Verify an SSH signature over the subject DID and return the SshKeyCredential VC"""
+    # Verify in-process; fall back to ssh-keygen for key types we can't handle
     try:
-        return json.loads(result.stdout)
-    except json.JSONDecodeError:
-        return {"raw_output": result.stdout}
+        verify_sshsig(request.public_key, request.signature, request.subject_did.encode(), namespace="oydid")
+    except SshSigUnsupported:
+        verify_ssh_signature_with_keygen(request)
+    except SshSigError as e:
+        logger.warning("SSH signature verification failed", extra={"error": str(e)})
+        raise HTTPException(status_code=400, detail=f"Signature verification failed: {e}")
+
+    return build_vc(request.subject_did, "SshKeyCredential", {
+        "sshPublicKey": request.public_key
+    })
+
+def require_issuer_did() -> str:
+    issuer_did = get_issuer_did()
+    if not issuer_did:
+        raise HTTPException(status_code=500, detail="Issuer DID not initialized")
+    return issuer_did
+
+@router.post("/google")
+async def issue_google_vc(request: GoogleVcRequest):
+    """Issue a VC for a Google Account"""
+    issuer_did = require_issuer_did()
+    return issue_vc(issuer_did, verify_google(request))
+
+@router.post("/github")
+async def issue_github_vc(request: GitHubVcRequest):
+    """Issue a VC for a GitHub Account"""
+    issuer_did = require_issuer_did()
+    return issue_vc(issuer_did, verify_github(request))
+
+@router.post("/orcid")
+async def issue_orcid_vc(request: OrcidVcRequest):
+    """Issue a VC for an ORCID iD"""
+    issuer_did = require_issuer_did()
+    return issue_vc(issuer_did, verify_orcid(request))
+
+@router.post("/ssh")
+async def issue_ssh_vc(request: SshVcRequest):
+    """Issue a VC for an SSH Key"""
+    issuer_did = require_issuer_did()
+    return issue_vc(issuer_did, verify_ssh(request))
+
+# Batch issuance: provider -> (request model, verifier)
+VC_PROVIDERS = {
+    "google": (GoogleVcRequest, verify_google),
+    "github": (GitHubVcRequest, verify_github),
+    "orcid": (OrcidVcRequest, verify_orcid),
+    "ssh": (SshVcRequest, verify_ssh),
+}
+
+# Per-provider limits, shared by all batches so provider rate limits hold across requests.
+# Override with VC_BATCH_CONCURRENCY_<PROVIDER> and VC_BATCH_RATE_<PROVIDER> (calls/second).
+DEFAULT_PROVIDER_LIMITS = {
+    "google": (8, 0),
+    "github": (4, 10),
+    "orcid": (4, 8),
+    "ssh": (16, 0),
+}
+
+def _provider_limiter(name: str, concurrency: int, rate: float) -> AsyncRateLimiter:
+    concurrency = int(os.getenv(f"VC_BATCH_CONCURRENCY_{name.upper()}", concurrency))
+    rate = float(os.getenv(f"VC_BATCH_RATE_{name.upper()}", rate))
+    return AsyncRateLimiter(max_concurrency=concurrency, rate=rate, burst=concurrency)
+
+provider_limiters = {
+    name: _provider_limiter(name, concurrency, rate)
+    for name, (concurrency, rate) in DEFAULT_PROVIDER_LIMITS.items()
+}
+
+signing_limiter = AsyncRateLimiter(max_concurrency=int(os.getenv("VC_BATCH_SIGN_CONCURRENCY", 4)))
+
+VC_BATCH_MAX_ITEMS = int(os.getenv("VC_BATCH_MAX_ITEMS", 1000))
+
+async def _issue_batch_item(index: int, provider: str, params: dict, issuer_did: str) -> dict:
+    result = {"index": index, "provider": provider}
+    try:
+        model, verifier = VC_PROVIDERS[provider]
+        request = model(**params)
+        async with provider_limiters[provider]:
+            vc = await asyncio.to_thread(verifier, request)
+        async with signing_limiter:
+            credential = await asyncio.to_thread(issue_vc, issuer_did, vc)
+        result["status"] = "issued"
+        result["subject_did"] = request.subject_did
+        result["credential"] = credential
+    except ValidationError as e:
+        result["status"] = "error"
+        result["status_code"] = 422
+        result["error"] = json.loads(e.json())
+    except HTTPException as e:
+        result["status"] = "error"
+        result["status_code"] = e.status_code
+        result["error"] = e.detail
+    except Exception as e:
+        result["status"] = "error"
+        result["status_code"] = 500
+        result["error"] = str(e)
+    return result
+
+@router.post("/batch")
+async def issue_vc_batch(request: VcBatchRequest):
+    """
+    Issue many VCs in one call (e.g. onboarding a team).
+    Items are verified concurrently within per-provider limits and signed by the shared issuer DID.
+    Results are streamed as NDJSON, one line per item in completion order; use `index` to correlate.
+    """
+    if len(request.items) > VC_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {VC_BATCH_MAX_ITEMS} items")
+
+    # Resolve the issuer once for the whole batch
+    issuer_did = require_issuer_did()
+
+    async def stream_results():
+        tasks = [
+            asyncio.create_task(_issue_batch_item(i, item.provider, item.request, issuer_did))
+            for i, item in enumerate(request.items)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield jsonio.dumps(await next_done) + "\n"
+        finally:
+            # Client went away: stop work that has not started yet
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
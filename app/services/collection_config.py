@@ -0,0 +1,124 @@
+"""
+Per-collection Qdrant storage settings: on-disk vectors, HNSW parameters,
+scalar/binary quantization and search-time rescoring.
+
+Settings are read from the JSON file named by QDRANT_COLLECTION_CONFIG
+(see qdrant_collections.example.json). The "default" entry applies to every
+collection and is overridden field by field by a collection's own entry.
+Without a config file, collections keep Qdrant's defaults (float32 vectors in RAM).
+
+Existing collections can be migrated in place to their configured settings:
+    python -m app.services.collection_config migrate [collection ...]
+"""
+import json
+import os
+import sys
+from typing import Dict, Literal, Optional
+from pydantic import BaseModel
+from qdrant_client.http import models
+
+
+class QuantizationSettings(BaseModel):
+    type: Literal["scalar", "binary"]
+    quantile: Optional[float] = 0.99  # scalar only
+    always_ram: bool = True
+
+
+class HnswSettings(BaseModel):
+    m: Optional[int] = None
+    ef_construct: Optional[int] = None
+    full_scan_threshold: Optional[int] = None
+    on_disk: Optional[bool] = None
+
+
+class SearchSettings(BaseModel):
+    hnsw_ef: Optional[int] = None
+    rescore: bool = True
+    oversampling: Optional[float] = None
+
+
+class CollectionSettings(BaseModel):
+    on_disk: bool = False  # original vectors stored on disk (memmap)
+    on_disk_payload: bool = False
+    hnsw: HnswSettings = HnswSettings()
+    quantization: Optional[QuantizationSettings] = None
+    search: SearchSettings = SearchSettings()
+
+    def vector_params(self, dimension: int) -> models.VectorParams:
+        return models.VectorParams(size=dimension, distance=models.Distance.COSINE, on_disk=self.on_disk)
+
+    def hnsw_config(self) -> Optional[models.HnswConfigDiff]:
+        values = self.hnsw.dict(exclude_none=True)
+        return models.HnswConfigDiff(**values) if values else None
+
+    def quantization_config(self):
+        q = self.quantization
+        if q is None:
+            return None
+        if q.type == "binary":
+            return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=q.always_ram))
+        return models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+            type=models.ScalarType.INT8,
+            quantile=q.quantile,
+            always_ram=q.always_ram
+        ))
+
+    def search_params(self) -> Optional[models.SearchParams]:
+        s = self.search
+        quantization = None
+        if self.quantization is not None:
+            quantization = models.QuantizationSearchParams(rescore=s.rescore, oversampling=s.oversampling)
+        if s.hnsw_ef is None and quantization is None:
+            return None
+        return models.SearchParams(hnsw_ef=s.hnsw_ef, quantization=quantization)
+
+
+def _merge(base: dict, override: dict) -> dict:
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_collection_settings(path: Optional[str] = None) -> Dict[str, dict]:
+    path = path or os.getenv("QDRANT_COLLECTION_CONFIG")
+    if not path:
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+class CollectionConfigRegistry:
+    def __init__(self, raw: Dict[str, dict]):
+        self._raw = raw
+        self._cache: Dict[str, CollectionSettings] = {}
+
+    def get(self, collection: str) -> CollectionSettings:
+        if collection not in self._cache:
+            raw = _merge(self._raw.get("default", {}), self._raw.get(collection, {}))
+            self._cache[collection] = CollectionSettings(**raw)
+        return self._cache[collection]
+
+
+# Global instance
+collection_configs = CollectionConfigRegistry(load_collection_settings())
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] != "migrate":
+        print("Usage: python -m app.services.collection_config migrate [collection ...]")
+        return 2
+    from .qdrant_service import qdrant_service
+    collections = argv[1:] or qdrant_service.collections
+    for coll in collections:
+        qdrant_service.migrate_collection(coll)
+        print(f"Migrated {coll}: {collection_configs.get(coll).dict()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""
+Near-duplicate detection for the create endpoints.
+
+A new document is a duplicate of an indexed DID when it has the same normalized URL
+(`url_hash` payload field) or when its embedding is at least DEDUP_THRESHOLD cosine-similar
+to an existing one in the same collection (see QdrantService.find_duplicate). Documents
+carrying a `token` only match DIDs stored with the same token (`token_hash` payload field).
+Disabled unless DEDUP_ON_CREATE=true; the create endpoints accept `?dedup=` to override.
+"""
+import hashlib
+import os
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit, urlunsplit
+from .log import get_logger
+from .tracing import span
+
+DEDUP_ON_CREATE = os.getenv("DEDUP_ON_CREATE", "false").lower() in ("1", "true", "yes")
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.97))
+
+logger = get_logger("dedup")
+
+
+def dedup_enabled(override: Optional[bool] = None) -> bool:
+    return DEDUP_ON_CREATE if override is None else override
+
+
+def normalize_url(url: str) -> str:
+    """Lowercase scheme and host, drop the fragment, default ports and trailing slash"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not (scheme == "http" and parts.port == 80) and not (scheme == "https" and parts.port == 443):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/")
+    return urlunsplit((scheme, host, path, parts.query, ""))
+
+
+def url_hash(url: str) -> str:
+    return hashlib.sha256(normalize_url(url).encode()).hexdigest()
+
+
+def token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def check_duplicate(payload: Dict[str, Any], collection: Optional[str] = None, override: Optional[bool] = None) -> Optional[Dict[str, Any]]:
+    """Duplicate of `payload` among the indexed DIDs, if dedup is enabled; never fails the create"""
+    if not dedup_enabled(override):
+        return None
+    from .qdrant_service import qdrant_service
+    try:
+        with span("dedup.check", collection=collection):
+            return qdrant_service.find_duplicate(payload, collection)
+    except Exception as e:
+        logger.warning("Duplicate check failed", extra={"error": str(e)})
+        return None
+
+
+def duplicate_response(duplicate: Dict[str, Any]) -> Dict[str, Any]:
+    """Create-endpoint response returning the existing DID instead of a new one"""
+    return {
+        "did": duplicate["did"],
+        "deduplicated": True,
+        "match": duplicate["match"],
+        "score": duplicate["score"],
+        "collection": duplicate["collection"]
+    }
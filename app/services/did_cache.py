@@ -0,0 +1,61 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from .metrics import record_cache
+
+DID_CACHE_SIZE = int(os.getenv("DID_CACHE_SIZE", 10000))
+DID_CACHE_TTL = float(os.getenv("DID_CACHE_TTL", 60))
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire `ttl` seconds after they were stored"""
+
+    def __init__(self, max_size: int = DID_CACHE_SIZE, ttl: float = DID_CACHE_TTL, name: str = "did_resolve"):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.name = name
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                record_cache(self.name, True)
+                return entry[1]
+            if entry is not _MISSING:
+                del self._entries[key]
+        record_cache(self.name, False)
+        return default
+
+    def set(self, key: Hashable, value: Any):
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key_prefix: Optional[Hashable] = None):
+        """Drop entries whose key (or the first element of a tuple key) equals `key_prefix`; None clears all"""
+        with self._lock:
+            if key_prefix is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k == key_prefix or (isinstance(k, tuple) and k and k[0] == key_prefix)]:
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+# Resolved DID documents keyed by (did, mode); invalidated by run_oydid_command on update/revoke
+did_cache = TTLCache()
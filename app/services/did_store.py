@@ -0,0 +1,224 @@
+"""
+Local materialized DID store: a SQLite read replica of OYDID resolutions.
+
+With DID_STORE_PATH set, run_oydid_command answers plain `read <did> --json-output` and
+`read <did> --w3c-did` calls from the store and records the CLI output of every
+successful read. A create stores the new DID with both resolutions, read right after the
+write (DID_STORE_WRITE_THROUGH), so the first read does not start the CLI. An update drops
+the old DID's documents and stores the new DID with its resolutions in one transaction, and
+a revoke drops the documents and marks the DID revoked.
+
+The replica only sees changes made through this service. Entries older than
+DID_STORE_MAX_AGE seconds are resolved through the CLI again, which bounds how long a
+change by another writer of the OYDID location goes unnoticed; the checker compares the
+whole store at once:
+
+    python -m app.services.did_store check [--limit N] [--repair]
+
+The checker re-resolves stored DIDs through the CLI and reports (or, with --repair,
+fixes) documents that differ.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+DID_STORE_PATH = os.getenv("DID_STORE_PATH", "")
+# Resolutions older than this (seconds) are read through the CLI again; 0 keeps them until a local write
+DID_STORE_MAX_AGE = float(os.getenv("DID_STORE_MAX_AGE", 300))
+# Resolve DIDs right after a create / update so the store holds them before the first read
+DID_STORE_WRITE_THROUGH = os.getenv("DID_STORE_WRITE_THROUGH", "true").lower() in ("1", "true", "yes")
+
+# read flag -> column holding that command's stdout
+READ_COLUMNS = {"--json-output": "doc_json", "--w3c-did": "w3c_json"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dids (
+    did TEXT PRIMARY KEY,
+    doc_json TEXT,
+    w3c_json TEXT,
+    log_head TEXT,
+    log_length INTEGER,
+    revoked INTEGER NOT NULL DEFAULT 0,
+    superseded_by TEXT,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+def log_head(doc_stdout: str):
+    """(fingerprint of the last log entry, log length) of a --json-output resolution"""
+    try:
+        log = json.loads(doc_stdout).get("log")
+    except (ValueError, AttributeError):
+        return None, None
+    if not isinstance(log, list) or not log:
+        return None, None
+    return hashlib.sha256(json.dumps(log[-1], sort_keys=True).encode()).hexdigest(), len(log)
+
+
+class DidStore:
+    def __init__(self, path: str, max_age: float = DID_STORE_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets readers proceed while a write commits
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, did: str, flag: str) -> Optional[str]:
+        query = f"SELECT {READ_COLUMNS[flag]} FROM dids WHERE did = ? AND revoked = 0"
+        params = (did,)
+        if self.max_age > 0:
+            query += " AND updated_at >= ?"
+            params += (time.time() - self.max_age,)
+        row = self._conn().execute(query, params).fetchone()
+        return row[0] if row else None
+
+    def head(self, did: str) -> Optional[str]:
+        """`<log head>:<log length>` of the stored resolution (as http_cache.etag_base); None if unknown, stale or revoked"""
+        query = "SELECT log_head, log_length FROM dids WHERE did = ? AND revoked = 0 AND log_head IS NOT NULL"
+        params = (did,)
+        if self.max_age > 0:
+            query += " AND updated_at >= ?"
+            params += (time.time() - self.max_age,)
+        row = self._conn().execute(query, params).fetchone()
+        return f"{row[0]}:{row[1]}" if row else None
+
+    def put_read(self, did: str, flag: str, stdout: str, read_started: Optional[float] = None):
+        """
+        Store a CLI resolution. `read_started` (time.time() before the CLI ran) keeps a read
+        that raced with an update or revoke from overwriting the newer state.
+        """
+        column = READ_COLUMNS[flag]
+        head, length = log_head(stdout) if flag == "--json-output" else (None, None)
+        with self._conn() as conn:
+            conn.execute(
+                f"INSERT INTO dids (did, {column}, log_head, log_length, updated_at) VALUES (?, ?, ?, ?, ?) "
+                f"ON CONFLICT(did) DO UPDATE SET {column} = excluded.{column}, "
+                "log_head = COALESCE(excluded.log_head, log_head), log_length = COALESCE(excluded.log_length, log_length), "
+                "revoked = 0, updated_at = excluded.updated_at WHERE dids.updated_at <= excluded.updated_at",
+                (did, stdout, head, length, read_started or time.time())
+            )
+
+    def _put_resolutions(self, conn: sqlite3.Connection, did: str, docs: Dict[str, str], now: float):
+        """Insert `did`, with its resolutions ({read flag: CLI stdout}) if any"""
+        if not docs:
+            conn.execute("INSERT OR IGNORE INTO dids (did, updated_at) VALUES (?, ?)", (did, now))
+            return
+        doc_json = docs.get("--json-output")
+        head, length = log_head(doc_json) if doc_json else (None, None)
+        conn.execute(
+            "INSERT INTO dids (did, doc_json, w3c_json, log_head, log_length, updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(did) DO UPDATE SET doc_json = excluded.doc_json, w3c_json = excluded.w3c_json, "
+            "log_head = excluded.log_head, log_length = excluded.log_length, revoked = 0, superseded_by = NULL, "
+            "updated_at = excluded.updated_at",
+            (did, doc_json, docs.get("--w3c-did"), head, length, now)
+        )
+
+    def record_create(self, did: str, docs: Optional[Dict[str, str]] = None):
+        """Register a created DID with the resolutions read right after the create"""
+        with self._conn() as conn:
+            self._put_resolutions(conn, did, docs or {}, time.time())
+
+    def record_update(self, did: str, new_did: Optional[str], docs: Optional[Dict[str, str]] = None):
+        """
+        Drop the documents of `did` (reads go to the CLI again) and register `new_did` with the
+        resolutions read right after the update, atomically
+        """
+        now = time.time()
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT INTO dids (did, superseded_by, updated_at) VALUES (?, ?, ?) ON CONFLICT(did) DO UPDATE SET "
+                "doc_json = NULL, w3c_json = NULL, log_head = NULL, log_length = NULL, "
+                "superseded_by = excluded.superseded_by, updated_at = excluded.updated_at",
+                (did, new_did if new_did != did else None, now)
+            )
+            if new_did:
+                self._put_resolutions(conn, new_did, docs or {}, now)
+
+    def record_revoke(self, did: str):
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT INTO dids (did, revoked, updated_at) VALUES (?, 1, ?) ON CONFLICT(did) DO UPDATE SET "
+                "doc_json = NULL, w3c_json = NULL, log_head = NULL, log_length = NULL, revoked = 1, updated_at = excluded.updated_at",
+                (did, time.time())
+            )
+
+    def delete(self, did: str):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM dids WHERE did = ?", (did,))
+
+    def rows(self, limit: Optional[int] = None) -> Iterator[Dict]:
+        query = "SELECT did, doc_json, w3c_json FROM dids WHERE revoked = 0 AND (doc_json IS NOT NULL OR w3c_json IS NOT NULL) ORDER BY updated_at"
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        for did, doc_json, w3c_json in self._conn().execute(query).fetchall():
+            yield {"did": did, "--json-output": doc_json, "--w3c-did": w3c_json}
+
+    def stats(self) -> Dict[str, int]:
+        total, materialized, revoked = self._conn().execute(
+            "SELECT COUNT(*), SUM(doc_json IS NOT NULL OR w3c_json IS NOT NULL), SUM(revoked) FROM dids"
+        ).fetchone()
+        return {"dids": total, "materialized": materialized or 0, "revoked": revoked or 0}
+
+
+def _same_json(a: str, b: str) -> bool:
+    try:
+        return json.loads(a) == json.loads(b)
+    except ValueError:
+        return a == b
+
+
+def check_consistency(store: DidStore, limit: Optional[int] = None, repair: bool = False) -> List[Dict]:
+    """Re-resolve stored documents through the CLI (bypassing the store); returns the mismatches"""
+    from .oydid import run_oydid_command
+    mismatches = []
+    for row in store.rows(limit):
+        for flag in READ_COLUMNS:
+            stored = row[flag]
+            if stored is None:
+                continue
+            result = run_oydid_command(["read", row["did"], flag], replica=False)
+            if result.returncode != 0:
+                mismatches.append({"did": row["did"], "flag": flag, "problem": "unresolvable", "error": getattr(result, "error_msg", result.stderr)})
+                if repair:
+                    store.delete(row["did"])
+            elif not _same_json(stored, result.stdout):
+                mismatches.append({"did": row["did"], "flag": flag, "problem": "differs"})
+                if repair:
+                    store.put_read(row["did"], flag, result.stdout)
+    return mismatches
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] != "check" or not did_store:
+        print("Usage: DID_STORE_PATH=... python -m app.services.did_store check [--limit N] [--repair]")
+        return 2
+    limit = int(argv[argv.index("--limit") + 1]) if "--limit" in argv else None
+    mismatches = check_consistency(did_store, limit=limit, repair="--repair" in argv)
+    for mismatch in mismatches:
+        print(json.dumps(mismatch))
+    print(f"{len(mismatches)} mismatches; store: {json.dumps(did_store.stats())}")
+    return 1 if mismatches else 0
+
+
+# Global instance (None when the replica is disabled)
+did_store = DidStore(DID_STORE_PATH) if DID_STORE_PATH else None
+
+if __name__ == "__main__":
+    sys.exit(main())
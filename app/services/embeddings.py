@@ -0,0 +1,207 @@
+"""
+Embedding backends for the Qdrant index.
+
+A provider turns texts into dense vectors (lists of floats). The backend is chosen with
+EMBEDDING_PROVIDER (default "fastembed") and EMBEDDING_MODEL (default: fastembed's default model).
+ONNX intra-op parallelism is set with EMBEDDING_THREADS.
+
+EMBEDDING_PROCESSES > 0 runs inference in a separate process pool so it does not hold the
+GIL of the API worker. Concurrent callers are coalesced into one inference call by a
+MicroBatcher (EMBEDDING_MAX_BATCH texts, waiting at most EMBEDDING_BATCH_WAIT_MS).
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+from .metrics import EMBED_SECONDS, EMBED_BATCH_TEXTS, timed
+
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "fastembed")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL") or None
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", 0)) or None
+EMBEDDING_PROCESSES = int(os.getenv("EMBEDDING_PROCESSES", 0))
+EMBEDDING_MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", 64))
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", 5))
+
+
+class EmbeddingProvider:
+    """Interface of an embedding backend"""
+    model_name: str = ""
+
+    @property
+    def dimension(self) -> int:
+        return len(self.embed(["test"])[0])
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class FastEmbedProvider(EmbeddingProvider):
+    def __init__(self, model_name: Optional[str] = None, threads: Optional[int] = None):
+        from fastembed import TextEmbedding
+        kwargs = {"threads": threads}
+        if model_name:
+            kwargs["model_name"] = model_name
+        self._model = TextEmbedding(**kwargs)
+        self.model_name = getattr(self._model, "model_name", model_name or "default")
+        self._dimension = None
+
+    @property
+    def dimension(self) -> int:
+        if self._dimension is None:
+            self._dimension = len(self.embed(["test"])[0])
+        return self._dimension
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return [vector.tolist() for vector in self._model.embed(texts, batch_size=max(1, len(texts)))]
+
+
+# name -> factory(model_name, threads)
+EMBEDDING_PROVIDERS: Dict[str, Callable[..., EmbeddingProvider]] = {
+    "fastembed": FastEmbedProvider,
+}
+
+
+def register_provider(name: str, factory: Callable[..., EmbeddingProvider]):
+    EMBEDDING_PROVIDERS[name] = factory
+
+
+def create_provider(name: str = EMBEDDING_PROVIDER, model_name: Optional[str] = EMBEDDING_MODEL, threads: Optional[int] = EMBEDDING_THREADS) -> EmbeddingProvider:
+    if name not in EMBEDDING_PROVIDERS:
+        raise ValueError(f"Unknown embedding provider: {name!r} (available: {', '.join(EMBEDDING_PROVIDERS)})")
+    return EMBEDDING_PROVIDERS[name](model_name=model_name, threads=threads)
+
+
+# Per-process provider used by the process pool workers
+_worker_provider: Optional[EmbeddingProvider] = None
+
+
+def _init_worker(name: str, model_name: Optional[str], threads: Optional[int]):
+    global _worker_provider
+    _worker_provider = create_provider(name, model_name, threads)
+
+
+def _worker_embed(texts: List[str]) -> List[List[float]]:
+    return _worker_provider.embed(texts)
+
+
+def _worker_info():
+    return _worker_provider.model_name, _worker_provider.dimension
+
+
+class ProcessPoolProvider(EmbeddingProvider):
+    """Runs another provider in worker processes; each worker loads its own copy of the model"""
+
+    def __init__(self, name: str = EMBEDDING_PROVIDER, model_name: Optional[str] = EMBEDDING_MODEL, threads: Optional[int] = EMBEDDING_THREADS, processes: int = 1):
+        self._pool = ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(name, model_name, threads))
+        self.model_name, self._dimension = self._pool.submit(_worker_info).result()
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return self._pool.submit(_worker_embed, texts).result()
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class MicroBatcher(EmbeddingProvider):
+    """
+    Coalesces concurrent embed() calls from several threads into one provider call of up
+    to `max_batch` texts. The first request of a batch waits at most `max_wait_ms` for others.
+    """
+
+    def __init__(self, provider: EmbeddingProvider, max_batch: int = EMBEDDING_MAX_BATCH, max_wait_ms: float = EMBEDDING_BATCH_WAIT_MS):
+        self.provider = provider
+        self.model_name = provider.model_name
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending: List[tuple] = []  # (texts, future)
+        self._cond = threading.Condition()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    @property
+    def dimension(self) -> int:
+        return self.provider.dimension
+
+    def submit(self, texts: List[str]) -> Future:
+        future: Future = Future()
+        if not texts:
+            future.set_result([])
+            return future
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Embedding batcher is closed")
+            self._pending.append((list(texts), future))
+            self._cond.notify()
+        return future
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return self.submit(texts).result()
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        """Embed without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(texts))
+
+    def _take_batch(self) -> List[tuple]:
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if self._closed and not self._pending:
+                return []
+            deadline = time.monotonic() + self.max_wait
+            while sum(len(t) for t, _ in self._pending) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._closed:
+                    break
+                self._cond.wait(remaining)
+            batch, size = [], 0
+            # Always take at least one request, even if it alone exceeds max_batch
+            while self._pending and (not batch or size + len(self._pending[0][0]) <= self.max_batch):
+                texts, future = self._pending.pop(0)
+                batch.append((texts, future))
+                size += len(texts)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            texts = [text for request_texts, _ in batch for text in request_texts]
+            EMBED_BATCH_TEXTS.observe(len(texts))
+            try:
+                with timed(EMBED_SECONDS):
+                    vectors = self.provider.embed(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            start = 0
+            for request_texts, future in batch:
+                future.set_result(vectors[start:start + len(request_texts)])
+                start += len(request_texts)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join(timeout=5)
+        self.provider.close()
+
+
+def build_embedder() -> MicroBatcher:
+    """Embedding pipeline configured from the environment"""
+    if EMBEDDING_PROCESSES > 0:
+        provider = ProcessPoolProvider(processes=EMBEDDING_PROCESSES)
+    else:
+        provider = create_provider()
+    return MicroBatcher(provider)
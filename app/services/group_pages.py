@@ -0,0 +1,239 @@
+import os
+import json
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+from fastapi import HTTPException
+from .oydid import run_oydid_command
+from . import jsonio
+from .membership import GROUP_TYPES
+from .payloads import ORG_CONTEXT
+
+MEMBER_PAGE_SIZE = int(os.getenv("GROUP_MEMBER_PAGE_SIZE", 1000))
+
+
+class PageLayout:
+    """Membership of one group, sharded into MembershipPage child DIDs"""
+
+    def __init__(self, group_did: str, group_doc: dict):
+        self.group_did = group_did
+        self.group_doc = group_doc
+        self.pages: List[str] = list(group_doc.get("memberPages", []))
+        self.page_members: Dict[str, Dict[str, str]] = {}
+        self.page_of: Dict[str, str] = {}
+
+    @property
+    def paged(self) -> bool:
+        return "memberPages" in self.group_doc
+
+    def set_page(self, page_did: str, members: Dict[str, str]):
+        self.page_members[page_did] = members
+        for member in members:
+            self.page_of[member] = page_did
+
+    def all_members(self) -> Dict[str, str]:
+        members = {}
+        for page_members in self.page_members.values():
+            members.update(page_members)
+        return members
+
+
+class GroupPager:
+    """
+    Applies add/remove diffs to group membership by rewriting only the
+    affected MembershipPage DIDs, so a change costs O(changed * page size)
+    instead of re-sending, re-signing and re-indexing the whole member list.
+
+    Groups created with an inline `hasMember` list are migrated to pages on
+    their first diff that changes membership. The layout is read from OYDID
+    for every change rather than cached, since other workers may have
+    rewritten pages since; reads are served by the DID store when enabled.
+    """
+
+    def __init__(self, page_size: int = MEMBER_PAGE_SIZE):
+        self.page_size = max(1, page_size)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def lock(self, group_did: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(group_did, threading.Lock())
+
+    def _read_doc(self, did: str) -> dict:
+        result = run_oydid_command(["read", did, "--json-output"])
+        if result.returncode != 0:
+            error_detail = getattr(result, "error_msg", result.stderr)
+            raise HTTPException(status_code=404, detail=f"DID not found or error: {error_detail}")
+        try:
+            return jsonio.loads(result.stdout).get("doc", {})
+        except json.JSONDecodeError:
+            raise HTTPException(status_code=500, detail=f"Invalid JSON from DID resolver for {did}")
+
+    def load(self, group_did: str) -> PageLayout:
+        """Current page layout of a group; 404 if the DID is not a group"""
+        group_doc = self._read_doc(group_did)
+        if not isinstance(group_doc, dict) or group_doc.get("type") not in GROUP_TYPES:
+            raise HTTPException(status_code=404, detail=f"Not a group: {group_did}")
+        layout = PageLayout(group_did, group_doc)
+        if layout.paged:
+            for page_did in layout.pages:
+                page_doc = self._read_doc(page_did)
+                layout.set_page(page_did, _members_dict(page_doc.get("hasMember", [])))
+        return layout
+
+    def _page_payload(self, group_did: str, members: Dict[str, str]) -> dict:
+        return {
+            "@context": ORG_CONTEXT,
+            "type": "MembershipPage",
+            "partOf": group_did,
+            "hasMember": [
+                {"type": "Membership", "member": member, "role": role}
+                for member, role in members.items()
+            ],
+            "updated_at": datetime.now().isoformat()
+        }
+
+    def _create_page(self, layout: PageLayout, members: Dict[str, str]) -> str:
+        result = run_oydid_command(["create", "--json-output"], input_data=self._page_payload(layout.group_did, members))
+        if result.returncode != 0:
+            error_detail = getattr(result, "error_msg", result.stderr)
+            raise HTTPException(status_code=400, detail=f"Membership page creation failed: {error_detail}")
+        page_did = jsonio.loads(result.stdout).get("did")
+        layout.pages.append(page_did)
+        layout.set_page(page_did, members)
+        return page_did
+
+    def _write_page(self, layout: PageLayout, page_did: str):
+        payload = self._page_payload(layout.group_did, layout.page_members[page_did])
+        result = run_oydid_command(["update", page_did, "--json-output"], input_data=payload)
+        if result.returncode != 0:
+            error_detail = getattr(result, "error_msg", result.stderr)
+            raise HTTPException(status_code=400, detail=f"Membership page update failed: {error_detail}")
+
+    def _write_group_doc(self, layout: PageLayout):
+        group_doc = dict(layout.group_doc)
+        group_doc["hasMember"] = []
+        group_doc["memberPages"] = list(layout.pages)
+        group_doc["updated_at"] = datetime.now().isoformat()
+        result = _update_group(layout.group_did, group_doc)
+        layout.group_doc = group_doc
+        return result
+
+    def _create_pages(self, layout: PageLayout, members: Dict[str, str]) -> int:
+        items = list(members.items())
+        for start in range(0, len(items), self.page_size):
+            self._create_page(layout, dict(items[start:start + self.page_size]))
+        return (len(items) + self.page_size - 1) // self.page_size
+
+    def apply_diff(self, group_did: str, add: Dict[str, str], remove: List[str]) -> dict:
+        """
+        Add/update and remove members of a group. Returns a summary including
+        `group_doc` when the group document itself had to be rewritten
+        (migration or new pages), so callers can re-index it.
+        """
+        with self.lock(group_did):
+            return self._apply_diff(self.load(group_did), add, remove)[0]
+
+    def replace(self, group_did: str, group_doc: dict) -> dict:
+        """
+        Rewrite a group document (PUT). An inline group is updated as given. A paged group
+        keeps its pages: the `hasMember` list of `group_doc` is applied to them as a diff
+        and the group document is written with `memberPages` and no inline members, so the
+        pages remain the only record of membership.
+        Returns `group_doc` as written and the CLI `result` of the group update.
+        """
+        with self.lock(group_did):
+            return self._replace(group_did, group_doc)
+
+    def _replace(self, group_did: str, group_doc: dict) -> dict:
+        layout = self.load(group_did)
+        if not layout.paged:
+            result = _update_group(group_did, group_doc)
+            layout.group_doc = group_doc
+            return {"group_doc": group_doc, "result": result}
+
+        current = layout.all_members()
+        desired = _members_dict(group_doc.get("hasMember", []))
+        add = {member: role for member, role in desired.items() if member not in current or current[member] != role}
+        remove = [member for member in current if member not in desired]
+        layout.group_doc = {**group_doc, "memberPages": list(layout.pages)}
+        summary, result = self._apply_diff(layout, add, remove, rewrite_group_doc=True)
+        return {"group_doc": summary["group_doc"], "result": result}
+
+    def _apply_diff(self, layout: PageLayout, add: Dict[str, str], remove: List[str], rewrite_group_doc: bool = False):
+        """Returns (summary, CLI result of the group document update or None)"""
+        summary = {"added": {}, "updated": {}, "removed": [], "pages_written": 0, "pages_created": 0, "group_doc": None}
+        group_doc_dirty = rewrite_group_doc
+
+        if not layout.paged:
+            inline = _members_dict(layout.group_doc.get("hasMember", []))
+            changed = any(member in inline for member in remove) or any(
+                member not in inline or inline[member] != role for member, role in add.items()
+            )
+            if not changed:
+                # e.g. removing a non-member: nothing to write, the group stays inline
+                return summary, None
+            # One-time migration of the inline member list into pages
+            summary["pages_created"] += self._create_pages(layout, inline)
+            group_doc_dirty = True
+
+        touched = set()
+        for member in remove:
+            page_did = layout.page_of.pop(member, None)
+            if page_did:
+                del layout.page_members[page_did][member]
+                touched.add(page_did)
+                summary["removed"].append(member)
+
+        overflow = {}
+        last_page = layout.pages[-1] if layout.pages else None
+        for member, role in add.items():
+            page_did = layout.page_of.get(member)
+            if page_did:
+                if layout.page_members[page_did][member] != role:
+                    layout.page_members[page_did][member] = role
+                    touched.add(page_did)
+                    summary["updated"][member] = role
+            elif last_page and len(layout.page_members[last_page]) < self.page_size:
+                layout.page_members[last_page][member] = role
+                layout.page_of[member] = last_page
+                touched.add(last_page)
+                summary["added"][member] = role
+            else:
+                overflow[member] = role
+                summary["added"][member] = role
+
+        for page_did in touched:
+            self._write_page(layout, page_did)
+        summary["pages_written"] = len(touched)
+
+        if overflow:
+            summary["pages_created"] += self._create_pages(layout, overflow)
+            group_doc_dirty = True
+
+        result = None
+        if group_doc_dirty:
+            result = self._write_group_doc(layout)
+            summary["group_doc"] = layout.group_doc
+
+        return summary, result
+
+
+def _update_group(group_did: str, group_doc: dict):
+    result = run_oydid_command(["update", group_did, "--json-output"], input_data=group_doc)
+    if result.returncode != 0:
+        error_detail = getattr(result, "error_msg", result.stderr)
+        raise HTTPException(status_code=400, detail=f"Update failed: {error_detail}")
+    return result
+
+
+def _members_dict(has_member) -> Dict[str, str]:
+    return {
+        m["member"]: m.get("role")
+        for m in has_member or []
+        if isinstance(m, dict) and m.get("member")
+    }
+
+
+# Global instance
+group_pager = GroupPager()
@@ -0,0 +1,152 @@
+"""
+HTTP caching for the DID read endpoints: strong ETags, 304 answers and compression.
+
+ETags come from the head of the DID log (or the body when there is no log), qualified by
+the representation variant (endpoint, language). They are remembered in did_cache together
+with the DID's log head in the local DID store at the time. A request whose If-None-Match
+matches a remembered ETag is answered with 304 before OYDID is invoked only while the store
+still holds that log head, so an update or revoke by any worker sharing the store ends it.
+Without the store every request resolves the DID, and a match is answered with 304 after.
+
+Responses are sent with `no-cache` (DID_HTTP_MAX_AGE=0), so clients and shared caches
+revalidate before each reuse and a revoked DID is not served from a cache.
+"""
+import gzip
+import hashlib
+import os
+from typing import Any, Optional, Sequence, Union
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from . import jsonio
+from .did_cache import did_cache
+from .did_store import did_store, log_head
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+# Seconds a DID response may be reused without revalidation; 0 (default) sends no-cache
+DID_HTTP_MAX_AGE = int(os.getenv("DID_HTTP_MAX_AGE", 0))
+HTTP_COMPRESS_MIN_BYTES = int(os.getenv("HTTP_COMPRESS_MIN_BYTES", 1024))
+
+
+def make_etag(base: str, variant: str) -> str:
+    digest = hashlib.sha256(f"{variant}\n{base}".encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def etag_base(stdout: Union[str, bytes], from_log: bool = True) -> str:
+    """Log head of a --json-output resolution, or a hash of the output itself"""
+    if from_log and isinstance(stdout, str):
+        head, length = log_head(stdout)
+        if head:
+            return f"{head}:{length}"
+    data = stdout.encode() if isinstance(stdout, str) else stdout
+    return hashlib.sha256(data).hexdigest()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison (RFC 9110 13.1.2); encoding suffixes ("-gzip", "-br") are ignored"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.strip('"')
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        candidate = candidate.strip('"')
+        for suffix in ("-gzip", "-br"):
+            if candidate.endswith(suffix):
+                candidate = candidate[:-len(suffix)]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def cache_control(private: bool = False) -> str:
+    scope = "private" if private else "public"
+    if DID_HTTP_MAX_AGE > 0:
+        return f"{scope}, max-age={DID_HTTP_MAX_AGE}"
+    return f"{scope}, no-cache"
+
+
+def negotiate_encoding(accept_encoding: Optional[str], available: Optional[Sequence[str]] = None) -> Optional[str]:
+    """
+    First of `available` the client accepts. By default 'br' (when the brotli package is
+    installed), then 'gzip'; pass the encodings of precompressed files to choose among those.
+    """
+    offered = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            offered[name.strip().lower()] = q
+    if available is None:
+        available = (("br",) if brotli else ()) + ("gzip",)
+    for encoding in available:
+        if offered.get(encoding, offered.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+def not_modified(request: Request, did: str, variant: str) -> Optional[Response]:
+    """
+    304 for a conditional request matching the remembered ETag of (did, variant) while the
+    DID store still holds the log head it was computed at; None otherwise
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match or did_store is None:
+        return None
+    remembered = did_cache.get((did, f"etag:{variant}"))
+    if remembered is None or not etag_matches(if_none_match, remembered[0]):
+        return None
+    etag, private, head = remembered
+    if head is not None and did_store.head(did) == head:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control(private), "Vary": "Accept-Encoding"})
+    return None
+
+
+def cached_json_response(
+    request: Request, did: str, variant: str, content: Any, base: str, private: bool = False
+) -> Response:
+    """
+    JSON response with ETag / Cache-Control, 304 on a matching If-None-Match and
+    compression for large bodies. `content` is raw JSON (str / bytes) or a value to encode.
+    """
+    etag = make_etag(base, variant)
+    if did_store is not None:
+        did_cache.set((did, f"etag:{variant}"), (etag, private, did_store.head(did)))
+    headers = {"ETag": etag, "Cache-Control": cache_control(private), "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if isinstance(content, str):
+        body = content.encode()
+    elif isinstance(content, bytes):
+        body = content
+    else:
+        body = jsonio.dumps_bytes(content)
+    if len(body) >= HTTP_COMPRESS_MIN_BYTES:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        if encoding:
+            body = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            # Strong ETags identify the exact bytes, so each encoding gets its own
+            headers["ETag"] = f'{etag[:-1]}-{encoding}"'
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,273 @@
+"""
+Streaming NDJSON importer: parse -> validate -> oydid create -> batched embed + Qdrant upsert.
+
+Each input line is `{"kind": "variable" | "group" | "policy" | "croissant", "data": {...}}`
+where `data` is the body the matching create endpoint accepts. Croissant rows are
+imported from their `payload` as-is; `url` is stored but not fetched.
+
+Stages are connected by bounded queues so a slow stage (usually `oydid create`)
+applies backpressure to the reader instead of buffering the whole file.
+Rows that fail are written to a dead-letter sink with the stage and error. A failed row
+that was a JSON object keeps its `kind` and `data`, so the dead-letter file can be fed
+back to the importer once the cause is fixed; other rows are kept verbatim as `row`.
+Index failures carry the created `did` instead, since re-importing them would create
+the DID again.
+
+CLI:
+    python -m app.services.importer rows.ndjson --dead-letter failed.ndjson
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+from pydantic import ValidationError
+from ..models import VariableRequest, GroupRequest, CroissantRequest
+from ..models_oac import OacPolicyCreateRequest
+from .oydid import run_oydid_command
+from .membership import membership_index
+from . import jsonio
+from .payloads import build_variable_payload, build_group_payload, build_policy_payload, build_croissant_payload
+
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", 8))
+IMPORT_QUEUE_SIZE = int(os.getenv("IMPORT_QUEUE_SIZE", 256))
+IMPORT_EMBED_BATCH = int(os.getenv("IMPORT_EMBED_BATCH", 64))
+IMPORT_BATCH_WAIT = float(os.getenv("IMPORT_BATCH_WAIT", 0.5))
+
+# kind -> (request model, payload builder)
+IMPORT_KINDS = {
+    "variable": (VariableRequest, build_variable_payload),
+    "group": (GroupRequest, build_group_payload),
+    "policy": (OacPolicyCreateRequest, build_policy_payload),
+    "croissant": (CroissantRequest, build_croissant_payload),
+}
+
+_DONE = object()
+
+
+class ImportStats:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.read = 0
+        self.valid = 0
+        self.created = 0
+        self.indexed = 0
+        self.failed = 0
+
+    def report(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.started
+        return {
+            "read": self.read,
+            "valid": self.valid,
+            "created": self.created,
+            "indexed": self.indexed,
+            "failed": self.failed,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.created / elapsed, 2) if elapsed > 0 else 0.0
+        }
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Split a stream of byte chunks (e.g. a request body) into lines"""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+def parse_row(line: bytes):
+    """Parse and validate one NDJSON row; returns (kind, payload)"""
+    row = json.loads(line)
+    if not isinstance(row, dict):
+        raise ValueError("Row must be a JSON object")
+    kind = row.get("kind")
+    if kind not in IMPORT_KINDS:
+        raise ValueError(f"Unknown kind: {kind!r} (expected one of {', '.join(IMPORT_KINDS)})")
+    data = row.get("data") or {}
+    if not isinstance(data, dict):
+        raise ValueError("Row `data` must be a JSON object")
+    model, builder = IMPORT_KINDS[kind]
+    return kind, builder(model(**data))
+
+
+def _dead_letter_row(raw: bytes) -> Dict[str, Any]:
+    """The input row in a form the importer accepts again: its kind and data, else the raw line"""
+    try:
+        row = json.loads(raw)
+    except ValueError:
+        row = None
+    if isinstance(row, dict):
+        return {"kind": row.get("kind"), "data": row.get("data")}
+    return {"row": raw.decode("utf-8", "replace")}
+
+
+def create_did(payload: Dict[str, Any]) -> str:
+    result = run_oydid_command(["create", "--json-output"], input_data=payload)
+    if result.returncode != 0:
+        raise RuntimeError(getattr(result, "error_msg", result.stderr))
+    did = jsonio.loads(result.stdout).get("did")
+    if not did:
+        raise RuntimeError("oydid create returned no DID")
+    return did
+
+
+async def run_import(
+    lines: AsyncIterator[bytes],
+    dead_letter: Callable[[Dict[str, Any]], None],
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    progress_interval: float = 5.0,
+    workers: int = IMPORT_WORKERS,
+    queue_size: int = IMPORT_QUEUE_SIZE,
+    embed_batch: int = IMPORT_EMBED_BATCH,
+    index: bool = True
+) -> Dict[str, Any]:
+    """Run the import pipeline over NDJSON lines and return the final report"""
+    from .qdrant_service import qdrant_service
+
+    stats = ImportStats()
+    to_create: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    to_index: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def fail(line_no: int, stage: str, error: Any, raw: bytes = None, did: str = None):
+        stats.failed += 1
+        entry = {"line": line_no, "stage": stage, "error": error}
+        if did:
+            entry["did"] = did
+        if raw is not None:
+            entry.update(_dead_letter_row(raw))
+        dead_letter(entry)
+
+    async def reader():
+        line_no = 0
+        async for line in lines:
+            line_no += 1
+            if not line.strip():
+                continue
+            stats.read += 1
+            try:
+                kind, payload = parse_row(line)
+            except json.JSONDecodeError as e:
+                fail(line_no, "parse", str(e), line)
+                continue
+            except ValidationError as e:
+                fail(line_no, "validate", json.loads(e.json()), line)
+                continue
+            except ValueError as e:
+                fail(line_no, "validate", str(e), line)
+                continue
+            stats.valid += 1
+            await to_create.put((line_no, kind, payload, line))
+        for _ in range(workers):
+            await to_create.put(_DONE)
+
+    async def creator():
+        while True:
+            item = await to_create.get()
+            if item is _DONE:
+                break
+            line_no, kind, payload, line = item
+            try:
+                did = await asyncio.to_thread(create_did, payload)
+            except Exception as e:
+                fail(line_no, "create", str(e), line)
+                continue
+            stats.created += 1
+            if kind == "group":
+                # As POST /groups/create does
+                membership_index.set_group(did, payload)
+            if index:
+                await to_index.put((line_no, did, payload))
+
+    async def indexer():
+        done = False
+        while not done:
+            batch = []
+            item = await to_index.get()
+            if item is _DONE:
+                break
+            batch.append(item)
+            deadline = time.monotonic() + IMPORT_BATCH_WAIT
+            # Fill the batch until it is full or the wait window closes
+            while len(batch) < embed_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(to_index.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _DONE:
+                    done = True
+                    break
+                batch.append(item)
+            try:
+                await asyncio.to_thread(qdrant_service.upsert_documents, [(did, payload, None) for _, did, payload in batch])
+                stats.indexed += len(batch)
+            except Exception as e:
+                # The DIDs exist; only indexing failed, so record them for a re-index
+                for line_no, did, _ in batch:
+                    fail(line_no, "index", str(e), did=did)
+
+    async def reporter():
+        while True:
+            await asyncio.sleep(progress_interval)
+            progress(stats.report())
+
+    stage_tasks = [asyncio.create_task(reader())] + [asyncio.create_task(creator()) for _ in range(workers)]
+    index_task = asyncio.create_task(indexer())
+    report_task = asyncio.create_task(reporter()) if progress else None
+    try:
+        await asyncio.gather(*stage_tasks)
+        await to_index.put(_DONE)
+        await index_task
+    finally:
+        for task in stage_tasks + [index_task, report_task]:
+            if task:
+                task.cancel()
+
+    return stats.report()
+
+
+async def _file_lines(path: str) -> AsyncIterator[bytes]:
+    with open(path, "rb") as f:
+        for line in f:
+            yield line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import NDJSON rows as DIDs and index them in Qdrant")
+    parser.add_argument("path", help="NDJSON file ('-' for stdin)")
+    parser.add_argument("--dead-letter", default="import_dead_letter.ndjson", help="Where failed rows are written")
+    parser.add_argument("--workers", type=int, default=IMPORT_WORKERS, help="Concurrent oydid create processes")
+    parser.add_argument("--batch", type=int, default=IMPORT_EMBED_BATCH, help="Embedding / upsert batch size")
+    parser.add_argument("--no-index", action="store_true", help="Create DIDs without indexing them in Qdrant")
+    args = parser.parse_args(argv)
+
+    path = "/dev/stdin" if args.path == "-" else args.path
+    with open(args.dead_letter, "w") as dl:
+        def dead_letter(entry):
+            dl.write(json.dumps(entry) + "\n")
+
+        def progress(report):
+            print(f"progress: {json.dumps(report)}", file=sys.stderr, flush=True)
+
+        report = asyncio.run(run_import(
+            _file_lines(path),
+            dead_letter,
+            progress=progress,
+            workers=args.workers,
+            embed_batch=args.batch,
+            index=not args.no_index
+        ))
+    print(json.dumps(report, indent=2))
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,10 @@
 import os
 import json
 from .oydid import run_oydid_command
+from . import jsonio
+from .log import get_logger
+
+logger = get_logger("issuer")
 
 ISSUER_DID_FILE = "issuer_did.json"
 
@@ -25,29 +29,29 @@ def get_issuer_did():
                 
                 if os.path.exists(key_file):
                     _issuer_did = did
-                    print(f"Loaded Issuer DID: {_issuer_did}")
+                    logger.info("Loaded issuer DID", extra={"did": _issuer_did})
                     return _issuer_did
                 else:
-                    print(f"Warning: Issuer DID {did} found in {ISSUER_DID_FILE} but private key {key_file} is missing.")
+                    logger.warning("Issuer DID private key is missing", extra={"did": did, "key_file": key_file})
         except Exception as e:
-            print(f"Error loading issuer DID: {e}")
+            logger.error("Error loading issuer DID", extra={"error": str(e)})
 
-    print("Creating/Re-creating Issuer DID...", flush=True)
+    logger.info("Creating issuer DID")
     # Initialize with a basic DID
     result = run_oydid_command(["create", "--json-output"], input_data={"type": "Issuer"})
     
     if result.returncode == 0:
         try:
-            data = json.loads(result.stdout)
+            data = jsonio.loads(result.stdout)
             _issuer_did = data["did"]
             # Save DID info
             with open(ISSUER_DID_FILE, "w") as f:
                 json.dump(data, f)
-            print(f"Created Issuer DID: {_issuer_did}", flush=True)
+            logger.info("Created issuer DID", extra={"did": _issuer_did})
         except Exception as e:
-            print(f"Failed to parse issuer creation: {e}")
+            logger.error("Failed to parse issuer creation", extra={"error": str(e)})
     else:
-        print(f"Failed to create issuer DID: {result.stderr}")
+        logger.error("Failed to create issuer DID", extra={"error": result.stderr})
             
     return _issuer_did
 
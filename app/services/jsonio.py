@@ -0,0 +1,52 @@
+"""
+JSON encoding for large documents (DID documents, RDF bookmarks, croissants).
+
+orjson is optional: without it these fall back to the standard library. orjson's
+JSONDecodeError subclasses json.JSONDecodeError, so callers keep catching the latter.
+Values orjson cannot encode but json.dumps can (integers beyond 64 bits, tuple keys)
+are encoded with the standard library instead of failing, and documents that may hold
+such integers are decoded with it, since orjson would turn them into floats.
+"""
+import json
+import re
+from typing import Any, Union
+
+try:
+    import orjson
+    ORJSON_ENABLED = True
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+    ORJSON_ENABLED = False
+
+
+# 20 digits in a row: possibly an integer beyond orjson's 64-bit range
+_LONG_DIGITS = re.compile(r"[0-9]{20}")
+_LONG_DIGITS_BYTES = re.compile(rb"[0-9]{20}")
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    if orjson:
+        pattern = _LONG_DIGITS_BYTES if isinstance(data, (bytes, bytearray)) else _LONG_DIGITS
+        if not pattern.search(data):
+            return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_bytes(value: Any) -> bytes:
+    """Compact UTF-8 JSON; non-str dict keys are stringified as json.dumps does"""
+    if orjson:
+        try:
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def dumps(value: Any) -> str:
+    return dumps_bytes(value).decode()
+
+
+def looks_like_json(text: str) -> bool:
+    """Cheap check before passing CLI output through unparsed: an object or array"""
+    stripped = text.strip()
+    return bool(stripped) and (stripped[0], stripped[-1]) in (("{", "}"), ("[", "]"))
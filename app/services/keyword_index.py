@@ -0,0 +1,148 @@
+import math
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Payload fields that identify a document; matched exactly (case-insensitive)
+KEY_FIELDS = ["name", "title", "url", "odrl:uid", "uid", "@id", "id"]
+UNIT_KEY_FIELDS = ["symbol", "name"]
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+def normalize_key(value: str) -> str:
+    return value.strip().lower()
+
+
+def extract_keys(did: str, payload: Dict[str, Any]) -> Set[str]:
+    """Identifier-like values of a document (DID, URL, policy uid, name, unit symbol, ...)"""
+    keys = {normalize_key(did)}
+    for field in KEY_FIELDS:
+        value = payload.get(field)
+        if isinstance(value, str) and value.strip():
+            keys.add(normalize_key(value))
+    unit = payload.get("unit")
+    if isinstance(unit, dict):
+        for field in UNIT_KEY_FIELDS:
+            if isinstance(unit.get(field), str) and unit[field].strip():
+                keys.add(normalize_key(unit[field]))
+    elif isinstance(unit, str) and unit.strip():
+        keys.add(normalize_key(unit))
+    return keys
+
+
+class KeywordIndex:
+    """
+    In-memory BM25 inverted index over the embedded text and key fields of one collection,
+    plus an exact-match map from identifier values to DIDs.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[str, int]] = {}  # term -> {did: term frequency}
+        self._doc_terms: Dict[str, Counter] = {}
+        self._doc_keys: Dict[str, Set[str]] = {}
+        self._doc_len: Dict[str, int] = {}
+        self._doc_fields: Dict[str, Dict[str, Any]] = {}  # did -> payload filter fields
+        self._exact: Dict[str, Set[str]] = {}  # normalized key -> DIDs
+        self._total_len = 0
+        self.built = False
+        self.built_at = 0.0
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def add(self, did: str, text: str, payload: Dict[str, Any], fields: Optional[Dict[str, Any]] = None):
+        """`fields` are the document's filter fields, checked by search(accept=...)"""
+        keys = extract_keys(did, payload)
+        terms = Counter(tokenize(" ".join([text, *keys])))
+        with self._lock:
+            self.remove(did)
+            self._doc_terms[did] = terms
+            self._doc_fields[did] = fields or {}
+            self._doc_keys[did] = keys
+            self._doc_len[did] = sum(terms.values())
+            self._total_len += self._doc_len[did]
+            for term, tf in terms.items():
+                self._postings.setdefault(term, {})[did] = tf
+            for key in keys:
+                self._exact.setdefault(key, set()).add(did)
+
+    def remove(self, did: str):
+        with self._lock:
+            terms = self._doc_terms.pop(did, None)
+            if terms is None:
+                return
+            self._total_len -= self._doc_len.pop(did)
+            self._doc_fields.pop(did, None)
+            for term in terms:
+                posting = self._postings.get(term)
+                if posting is not None:
+                    posting.pop(did, None)
+                    if not posting:
+                        del self._postings[term]
+            for key in self._doc_keys.pop(did, set()):
+                dids = self._exact.get(key)
+                if dids is not None:
+                    dids.discard(did)
+                    if not dids:
+                        del self._exact[key]
+
+    def exact(self, query: str) -> List[str]:
+        """DIDs whose identifier fields equal the query"""
+        with self._lock:
+            return sorted(self._exact.get(normalize_key(query), ()))
+
+    def search(self, query: str, limit: int = 10, accept: Optional[Callable[[Dict[str, Any]], bool]] = None) -> List[Tuple[str, float]]:
+        """BM25-ranked (did, score) pairs; `accept(fields)` restricts scoring to matching documents"""
+        with self._lock:
+            n = len(self._doc_terms)
+            if n == 0:
+                return []
+            avg_len = self._total_len / n
+            scores: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+                for did, tf in posting.items():
+                    if accept is not None and not accept(self._doc_fields[did]):
+                        continue
+                    norm = tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * self._doc_len[did] / avg_len))
+                    scores[did] = scores.get(did, 0.0) + idf * norm
+        ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        return ranked[:limit]
+
+    def rebuild(self, documents: Iterable[Tuple]):
+        """Rebuild from (did, text, payload) or (did, text, payload, fields) tuples"""
+        fresh = KeywordIndex(self.k1, self.b)
+        for did, text, payload, *fields in documents:
+            fresh.add(did, text or "", payload or {}, fields[0] if fields else None)
+        with self._lock:
+            self._postings = fresh._postings
+            self._doc_terms = fresh._doc_terms
+            self._doc_keys = fresh._doc_keys
+            self._doc_len = fresh._doc_len
+            self._doc_fields = fresh._doc_fields
+            self._exact = fresh._exact
+            self._total_len = fresh._total_len
+            self.built = True
+            self.built_at = time.monotonic()
+
+
+def reciprocal_rank_fusion(rankings: List[List[Any]], k: int = 60) -> List[Tuple[Any, float]]:
+    """Fuse several ranked lists of keys: score = sum(1 / (k + rank))"""
+    scores: Dict[Any, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda x: x[1], reverse=True)
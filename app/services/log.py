@@ -0,0 +1,148 @@
+"""
+Structured, leveled logging.
+
+Records are handed to a QueueHandler and written by a background QueueListener, so
+request handlers never block on stdout. Configuration via environment:
+
+    LOG_LEVEL            DEBUG | INFO (default) | WARNING | ERROR
+    LOG_FORMAT           json (default) | text
+    LOG_DEBUG_SAMPLE     fraction of sampled DEBUG events that are kept (default 0.01)
+
+High-volume debug events are logged with `extra={"sample": True}` (see `debug_sampled`);
+only LOG_DEBUG_SAMPLE of them are emitted. Secrets in OYDID command lines
+(`--doc-enc`, `--doc-pwd`, ...) are redacted with `redact_command`.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+from typing import Any, List
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_DEBUG_SAMPLE = float(os.getenv("LOG_DEBUG_SAMPLE", 0.01))
+
+# OYDID options whose value is a secret
+SECRET_OPTIONS = {"--doc-enc", "--doc-pwd", "--rev-enc", "--rev-pwd", "--doc-key", "--rev-key", "--token", "--private-key"}
+REDACTED = "***"
+
+# Attributes every LogRecord has; anything else was passed via `extra` and is emitted as a field
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "sample"}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = {k: v for k, v in record.__dict__.items() if k not in _RESERVED and not k.startswith("_")}
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return line
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps only `rate` of the records logged with extra={"sample": True}"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "sample", False):
+            return random.random() < self.rate
+        return True
+
+
+def configure_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, sample_rate: float = LOG_DEBUG_SAMPLE, stream=None):
+    """Install the queue-based handler on the "odrl" logger (idempotent)"""
+    global _listener
+    root = logging.getLogger("odrl")
+    root.setLevel(level)
+    root.propagate = False
+    if _listener is not None:
+        return root
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    handler = logging.handlers.QueueHandler(log_queue)
+    handler.addFilter(SamplingFilter(sample_rate))
+    root.addHandler(handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=False)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return root
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        for handler in list(logging.getLogger("odrl").handlers):
+            if isinstance(handler, logging.handlers.QueueHandler):
+                logging.getLogger("odrl").removeHandler(handler)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger below "odrl" (e.g. get_logger("oydid") -> "odrl.oydid")"""
+    return logging.getLogger(f"odrl.{name}")
+
+
+def debug_sampled(logger: logging.Logger, msg: str, **fields: Any):
+    """DEBUG event subject to LOG_DEBUG_SAMPLE; free when DEBUG is disabled"""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(msg, extra={**fields, "sample": True})
+
+
+def redact_command(cmd: List[str]) -> List[str]:
+    """Copy of an argv list with the values of SECRET_OPTIONS replaced"""
+    redacted = []
+    hide_next = False
+    for arg in cmd:
+        if hide_next:
+            redacted.append(REDACTED)
+            hide_next = False
+            continue
+        option, sep, _ = arg.partition("=")
+        if option in SECRET_OPTIONS:
+            if sep:
+                redacted.append(f"{option}={REDACTED}")
+            else:
+                redacted.append(arg)
+                hide_next = True
+            continue
+        redacted.append(arg)
+    return redacted
+
+
+def elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
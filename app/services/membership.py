@@ -0,0 +1,167 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Any, Iterable, List, Optional
+
+# Like KEYWORD_INDEX_REFRESH: with several API workers, set MEMBERSHIP_INDEX_REFRESH (seconds)
+# so each worker rebuilds its index from the stored groups in the background once it is that
+# old; 0 (default) assumes a single worker and only rebuilds on demand.
+MEMBERSHIP_INDEX_REFRESH = float(os.getenv("MEMBERSHIP_INDEX_REFRESH", 0))
+
+GROUP_TYPES = {"Organization", "FormalOrganization", "OrganizationalUnit", "OrganizationalCollaboration"}
+
+
+class MembershipIndex:
+    """
+    In-memory membership index over Organization (Group) DIDs.
+
+    Keeps both directions of the org:hasMember relation so that
+    "which groups is X in, with what role" is a dict lookup instead of
+    resolving every group DID. A member that is itself an indexed group
+    (e.g. an OrganizationalUnit) makes membership transitive.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._members: Dict[str, Dict[str, str]] = {}    # group DID -> {member DID: role}
+        self._member_of: Dict[str, Dict[str, str]] = {}  # member DID -> {group DID: role}
+        self._groups: Dict[str, Dict[str, Any]] = {}     # group DID -> {"name", "type"}
+        self.built = False
+        self.built_at = 0.0
+
+    def set_group(self, group_did: str, payload: Dict[str, Any]):
+        """Replace the indexed membership of a group with the hasMember list of its payload"""
+        members = {}
+        for m in payload.get("hasMember", []) or []:
+            if isinstance(m, dict) and m.get("member"):
+                members[m["member"]] = m.get("role")
+
+        with self._lock:
+            self._unlink(group_did)
+            self._groups[group_did] = {"name": payload.get("name"), "type": payload.get("type")}
+            self._members[group_did] = members
+            for member, role in members.items():
+                self._member_of.setdefault(member, {})[group_did] = role
+
+    def add_members(self, group_did: str, members: Dict[str, str]):
+        with self._lock:
+            current = self._members.setdefault(group_did, {})
+            for member, role in members.items():
+                current[member] = role
+                self._member_of.setdefault(member, {})[group_did] = role
+
+    def remove_members(self, group_did: str, members: Iterable[str]):
+        with self._lock:
+            current = self._members.get(group_did, {})
+            for member in members:
+                current.pop(member, None)
+                groups = self._member_of.get(member)
+                if groups is not None:
+                    groups.pop(group_did, None)
+                    if not groups:
+                        del self._member_of[member]
+
+    def remove_group(self, group_did: str):
+        with self._lock:
+            self._unlink(group_did)
+            self._groups.pop(group_did, None)
+
+    def _unlink(self, group_did: str):
+        for member in self._members.pop(group_did, {}):
+            groups = self._member_of.get(member)
+            if groups is not None:
+                groups.pop(group_did, None)
+                if not groups:
+                    del self._member_of[member]
+
+    def is_group(self, did: str) -> bool:
+        return did in self._groups
+
+    def get_role(self, member_did: str, group_did: str) -> Optional[str]:
+        """Direct role of a member in a group, or None"""
+        return self._member_of.get(member_did, {}).get(group_did)
+
+    def groups_of(self, member_did: str, transitive: bool = False) -> List[Dict[str, Any]]:
+        """
+        Groups a DID belongs to. With transitive=True, also the groups reached
+        through nested groups; `via` lists the intermediate group DIDs and
+        `role` is the role held in the innermost group.
+        """
+        with self._lock:
+            results = []
+            seen = {member_did}
+            queue = deque([(member_did, [], None)])
+            while queue:
+                did, path, inner_role = queue.popleft()
+                for group_did, role in self._member_of.get(did, {}).items():
+                    if group_did in seen:
+                        continue
+                    seen.add(group_did)
+                    effective_role = inner_role if path else role
+                    results.append({
+                        "group": group_did,
+                        "name": self._groups.get(group_did, {}).get("name"),
+                        "role": effective_role,
+                        "direct": not path,
+                        "via": path
+                    })
+                    if transitive:
+                        queue.append((group_did, path + [group_did], effective_role))
+            return results
+
+    def members_of(self, group_did: str, transitive: bool = False) -> List[Dict[str, Any]]:
+        """Members of a group; with transitive=True, also members of nested groups"""
+        with self._lock:
+            results = []
+            seen = {group_did}
+            queue = deque([(group_did, [])])
+            while queue:
+                did, path = queue.popleft()
+                for member, role in self._members.get(did, {}).items():
+                    if member in seen:
+                        continue
+                    seen.add(member)
+                    results.append({
+                        "member": member,
+                        "role": role,
+                        "is_group": member in self._groups,
+                        "direct": not path,
+                        "via": path
+                    })
+                    if transitive and member in self._members:
+                        queue.append((member, path + [member]))
+            return results
+
+    def rebuild(self, documents: Iterable[Dict[str, Any]], paged_members: Optional[Callable[[str], Dict[str, str]]] = None):
+        """
+        Rebuild from (did, payload) pairs, e.g. the stored group DIDs. Groups whose members
+        live in MembershipPage DIDs get them from `paged_members(did)`; the new index replaces
+        the old one in a single step.
+        """
+        fresh = MembershipIndex()
+        for doc in documents:
+            did, payload = doc.get("did"), doc.get("json_ld") or {}
+            if did and payload.get("type") in GROUP_TYPES:
+                fresh.set_group(did, payload)
+                if paged_members is not None and "memberPages" in payload:
+                    fresh.add_members(did, paged_members(did))
+        with self._lock:
+            self._members = fresh._members
+            self._member_of = fresh._member_of
+            self._groups = fresh._groups
+            self.built = True
+            self.built_at = time.monotonic()
+        return len(self._groups)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "groups": len(self._groups),
+                "members": len(self._member_of),
+                "memberships": sum(len(m) for m in self._members.values())
+            }
+
+
+# Global instance
+membership_index = MembershipIndex()
@@ -0,0 +1,117 @@
+"""
+Prometheus metrics, exposed at /api/metrics.
+
+prometheus_client is optional: without it every metric is a no-op and /api/metrics
+returns 503. Label values are restricted to fixed sets (OYDID subcommands, known
+collections, route templates) so cardinality stays bounded.
+"""
+import time
+from contextlib import contextmanager
+from typing import Iterable, Optional
+from .tracing import span
+
+try:
+    from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+    METRICS_ENABLED = True
+except ImportError:  # pragma: no cover - depends on the environment
+    METRICS_ENABLED = False
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+    class _NoopMetric:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def labels(self, *args, **kwargs):
+            return self
+
+        def observe(self, value):
+            pass
+
+        def inc(self, amount=1):
+            pass
+
+        def dec(self, amount=1):
+            pass
+
+    Counter = Gauge = Histogram = _NoopMetric
+
+    def generate_latest():
+        return b""
+
+# Sub-second buckets for in-process work, up to tens of seconds for subprocesses and fetches
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SLOW_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+OYDID_SUBCOMMANDS = {
+    "create", "read", "update", "revoke", "delete", "clone", "log", "logs", "w3c", "w3c-did", "encrypt", "decrypt",
+    "sign", "verify", "vc", "vc-push", "vc-read", "vp-push", "vp-read", "pubkeys", "message", "--version"
+}
+KNOWN_COLLECTIONS = {"policy", "prompts", "variables", "croissant", "dids", "groups", "bookmarks", "embedding_models"}
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "odrl_http_request_seconds", "API request latency", ["method", "route", "status"], buckets=SLOW_BUCKETS
+)
+HTTP_IN_FLIGHT = Gauge("odrl_http_requests_in_flight", "API requests being processed")
+OYDID_COMMAND_SECONDS = Histogram(
+    "odrl_oydid_command_seconds", "oydid CLI subprocess time (includes Ruby startup)", ["subcommand", "status"], buckets=SLOW_BUCKETS
+)
+OYDID_COALESCED = Counter("odrl_oydid_coalesced_total", "oydid calls answered by an identical in-flight call", ["subcommand"])
+EMBED_SECONDS = Histogram("odrl_embed_seconds", "Embedding inference time per batch", buckets=FAST_BUCKETS + SLOW_BUCKETS[5:])
+EMBED_BATCH_TEXTS = Histogram("odrl_embed_batch_texts", "Texts per embedding inference call", buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+QDRANT_SECONDS = Histogram(
+    "odrl_qdrant_seconds", "Qdrant client call latency", ["operation", "collection", "status"], buckets=FAST_BUCKETS + SLOW_BUCKETS[5:]
+)
+FETCH_SECONDS = Histogram("odrl_fetch_seconds", "Outbound HTTP fetch latency", ["target", "status"], buckets=SLOW_BUCKETS)
+CACHE_REQUESTS = Counter("odrl_cache_requests_total", "Cache lookups", ["cache", "result"])
+
+
+def bounded(value: Optional[str], allowed: Iterable[str], other: str = "other") -> str:
+    return value if value in allowed else other
+
+
+def oydid_subcommand(args) -> str:
+    """First non-option argument of an oydid command line, limited to OYDID_SUBCOMMANDS"""
+    args = list(args)
+    for i, arg in enumerate(args):
+        if arg == "--version":
+            return arg
+        if arg in ("--location", "-l"):
+            continue
+        if i > 0 and args[i - 1] in ("--location", "-l"):
+            continue
+        if not arg.startswith("-"):
+            return bounded(arg, OYDID_SUBCOMMANDS)
+    return "other"
+
+
+@contextmanager
+def timed(histogram, **labels):
+    """Observe the duration of the block; adds status="ok"/"error" if the histogram has that label"""
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        if "status" in getattr(histogram, "_labelnames", ()):
+            labels["status"] = status
+        (histogram.labels(**labels) if labels else histogram).observe(elapsed)
+
+
+@contextmanager
+def observe_fetch(target: str, url: Optional[str] = None):
+    """Time (and trace) an outbound HTTP request; `target` is a fixed name such as "bookmark" or "github" """
+    with span(f"fetch {target}", **{"fetch.target": target, "url.full": url}), timed(FETCH_SECONDS, target=target):
+        yield
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def render_latest():
+    """(body, content type) for the /api/metrics endpoint"""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -1,10 +1,52 @@
+import asyncio
 import subprocess
 import json
 import os
+import time
+import logging
 from fastapi import HTTPException
+from .metrics import OYDID_COMMAND_SECONDS, OYDID_COALESCED, oydid_subcommand, record_cache
+from .did_cache import did_cache
+from .did_store import did_store, READ_COLUMNS, DID_STORE_WRITE_THROUGH
+from . import jsonio
+from .log import get_logger, debug_sampled, redact_command, elapsed_ms
+from .singleflight import SingleFlight
+from .tracing import span, trace_env
 
-def run_oydid_command(args, input_data=None):
-    """Helper to run oydid commands"""
+logger = get_logger("oydid")
+
+# Concurrent identical read-only commands share one subprocess (see SingleFlight)
+SINGLE_FLIGHT = os.getenv("OYDID_SINGLE_FLIGHT", "true").lower() in ("1", "true", "yes")
+SINGLE_FLIGHT_SUBCOMMANDS = {"read"}
+_flights = SingleFlight()
+# Subcommands after which cached resolutions of their DID argument are stale
+INVALIDATING_SUBCOMMANDS = {"update", "revoke", "delete"}
+
+
+def _subprocess_executor(cmd, input_str, env):
+    return subprocess.run(
+        cmd,
+        input=input_str,
+        capture_output=True,
+        text=True,
+        env=env
+    )
+
+_executor = _subprocess_executor
+
+def set_oydid_executor(executor=None):
+    """
+    Replace how oydid command lines are executed, e.g. with an in-memory fake for load tests.
+    `executor(cmd, input_str, env)` returns a subprocess.CompletedProcess; None restores the CLI.
+    Returns the previous executor.
+    """
+    global _executor
+    previous = _executor
+    _executor = executor or _subprocess_executor
+    return previous
+
+def run_oydid_command(args, input_data=None, replica=True):
+    """Helper to run oydid commands; replica=False bypasses the local DID store (see did_store)"""
     # Check for OYDID_LOCATION environment variable
     location = os.getenv("OYDID_LOCATION")
     # Use the local script if it exists to pick up changes from the volume mount
@@ -19,30 +61,108 @@ def run_oydid_command(args, input_data=None):
     input_str = None
     if input_data:
         if isinstance(input_data, dict):
-            input_str = json.dumps(input_data)
+            input_str = jsonio.dumps(input_data)
         else:
             input_str = str(input_data)
 
+    subcommand = oydid_subcommand(args)
+    store = did_store if replica else None
+    replica_read = store is not None and _is_plain_read(args, input_str)
+    if replica_read:
+        stored = store.get(args[1], args[2])
+        record_cache("did_store", stored is not None)
+        if stored is not None:
+            return subprocess.CompletedProcess(cmd, 0, stored, "")
+        read_started = time.time()
+
+    if SINGLE_FLIGHT and subcommand in SINGLE_FLIGHT_SUBCOMMANDS:
+        # The full command line and input are the key: options such as --w3c-did or --doc-pwd change the result
+        process, shared = _flights.do((tuple(cmd), input_str), lambda: _execute(cmd, input_str, subcommand))
+        if shared:
+            OYDID_COALESCED.labels(subcommand=subcommand).inc()
+    elif subcommand in INVALIDATING_SUBCOMMANDS:
+        try:
+            process = _execute(cmd, input_str, subcommand)
+        finally:
+            _invalidate_cached(args, subcommand)
+    else:
+        process = _execute(cmd, input_str, subcommand)
+
+    if store is not None and process.returncode == 0:
+        if replica_read:
+            store.put_read(args[1], args[2], process.stdout, read_started)
+        else:
+            _record_write(store, cmd[:len(cmd) - len(args)], args, subcommand, process.stdout)
+    return process
+
+def _is_plain_read(args, input_str):
+    """`read <did> --json-output|--w3c-did` with no other options (passwords, locations) and no input"""
+    return len(args) == 3 and args[0] == "read" and args[2] in READ_COLUMNS and not input_str
+
+def _record_write(store, cli, args, subcommand, stdout):
+    """Keep the local DID store in step with a successful create / update / revoke"""
     try:
-        print(f"DEBUG: Running oydid command: {cmd}")
-        # if input_str:
-        #     print(f"DEBUG: Input: {input_str}")
-        
-        process = subprocess.run(
-            cmd,
-            input=input_str,
-            capture_output=True,
-            text=True
-        )
+        output = json.loads(stdout)
+    except json.JSONDecodeError:
+        output = {}
+    new_did = output.get("did") if isinstance(output, dict) else None
+    operand = _did_operand(args, subcommand)
+    if subcommand == "create" and new_did:
+        store.record_create(new_did, _resolve_written(cli, new_did))
+    elif subcommand == "update" and operand:
+        store.record_update(operand, new_did, _resolve_written(cli, new_did))
+    elif subcommand in ("revoke", "delete") and operand:
+        store.record_revoke(operand)
+
+def _resolve_written(cli, did):
+    """Both plain resolutions of a DID just written, for the store (see DID_STORE_WRITE_THROUGH)"""
+    if not did or not DID_STORE_WRITE_THROUGH:
+        return {}
+    docs = {}
+    for flag in READ_COLUMNS:
+        process = _execute(cli + ["read", did, flag], None, "read")
+        if process.returncode == 0:
+            docs[flag] = process.stdout
+    return docs
+
+def _did_operand(args, subcommand):
+    operands = [a for a in args[args.index(subcommand) + 1:] if not a.startswith("-")]
+    return operands[0].split("&")[0] if operands else None
+
+def _invalidate_cached(args, subcommand):
+    """Drop cached resolutions of the DID operand of a mutating command"""
+    operand = _did_operand(args, subcommand)
+    if operand:
+        did_cache.invalidate(operand)
+
+async def run_oydid_command_async(args, input_data=None):
+    """run_oydid_command in a worker thread, so concurrent requests overlap (and coalesce) instead of blocking the event loop"""
+    return await asyncio.to_thread(run_oydid_command, args, input_data)
+
+def _execute(cmd, input_str, subcommand):
+    try:
+        start = time.perf_counter()
+        with span(f"oydid {subcommand}", **{"oydid.subcommand": subcommand}) as current:
+            process = _executor(cmd, input_str, trace_env())
+            if current is not None:
+                current.set_attribute("oydid.returncode", process.returncode)
+        OYDID_COMMAND_SECONDS.labels(
+            subcommand=subcommand,
+            status="ok" if process.returncode == 0 else "error"
+        ).observe(time.perf_counter() - start)
+        if logger.isEnabledFor(logging.DEBUG):
+            debug_sampled(logger, "oydid command", command=redact_command(cmd), returncode=process.returncode, duration_ms=elapsed_ms(start))
         
         if process.returncode != 0:
             error_msg = process.stderr.strip() if process.stderr else process.stdout.strip()
-            print(f"DEBUG: Command failed with return code {process.returncode}")
-            print(f"DEBUG: Error details: {error_msg}")
+            logger.warning(
+                "oydid command failed",
+                extra={"subcommand": subcommand, "returncode": process.returncode, "error": error_msg[:2000]}
+            )
             # Attach the error message to the process object so the router can access it easily
             process.error_msg = error_msg
         
         return process
     except Exception as e:
-        print(f"DEBUG: Exception during command execution: {str(e)}")
+        logger.error("oydid command execution failed", extra={"command": redact_command(cmd), "error": str(e)})
         raise HTTPException(status_code=500, detail=f"Command execution failed: {str(e)}")
@@ -0,0 +1,60 @@
+from datetime import datetime
+from typing import Dict, Any
+from ..models import VariableRequest, GroupRequest, CroissantRequest
+from ..models_oac import OacPolicy
+
+ORG_CONTEXT = "http://www.w3.org/ns/org#"
+
+# Builders for the DID payloads stored by the routers (shared with the bulk importer)
+
+def build_variable_payload(request: VariableRequest, updated: bool = False) -> Dict[str, Any]:
+    payload = {
+        "type": "Variable",
+        "name": request.name,
+        "description": request.description,
+        "unit": request.unit,
+        "context": request.context,
+        "timestamp": datetime.now().isoformat()
+    }
+    if updated:
+        payload["updated_at"] = datetime.now().isoformat()
+    return payload
+
+def build_group_payload(request: GroupRequest, updated: bool = False) -> Dict[str, Any]:
+    payload = {
+        "@context": ORG_CONTEXT,
+        "type": request.type,
+        "name": request.name,
+        "description": request.description,
+        "hasMember": [
+            {
+                "type": "Membership",
+                "member": m.member,
+                "role": m.role
+            } for m in request.members
+        ],
+        "timestamp": datetime.now().isoformat()
+    }
+    if updated:
+        payload["updated_at"] = datetime.now().isoformat()
+    return payload
+
+def build_policy_payload(policy: OacPolicy) -> Dict[str, Any]:
+    return policy.dict(by_alias=True)
+
+def build_croissant_payload(request: CroissantRequest, jsonld: Dict[str, Any] = None) -> Dict[str, Any]:
+    """Croissant payload; `jsonld` is the document fetched from request.url, if any"""
+    payload = {
+        "type": "Croissant",
+        "description": request.description,
+        "timestamp": datetime.now().isoformat()
+    }
+    if jsonld:
+        # Merge JSON-LD into payload
+        payload.update(jsonld)
+    if request.url:
+        payload["url"] = request.url # Ensure URL is preserved if not in JSON-LD
+    # If a payload was provided directly, merge it
+    if request.payload:
+        payload.update(request.payload)
+    return payload
@@ -1,131 +1,591 @@
 import os
-import json
+import threading
+import time
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
-from fastembed import TextEmbedding
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, timezone
+from .keyword_index import KeywordIndex, reciprocal_rank_fusion
+from .collection_config import collection_configs
+from .embeddings import build_embedder
+from .text_extraction import extract_text, chunk_text
+from .dedup import url_hash, token_hash, DEDUP_THRESHOLD
+from .metrics import QDRANT_SECONDS, KNOWN_COLLECTIONS, bounded, record_cache, timed
+from .log import get_logger, debug_sampled
+from .tracing import span
+
+logger = get_logger("qdrant")
+
+# Top-level point payload fields used for filtered search, and their payload index types
+KEYWORD_FILTER_FIELDS = ["did", "type", "creator", "target", "action", "restricted_to", "url_hash", "token_hash"]
+DATETIME_FILTER_FIELDS = ["timestamp"]
+
+# The keyword indexes live in process memory and only see upserts made by this process.
+# With several API workers writing to the same collections, set KEYWORD_INDEX_REFRESH
+# (seconds) so each worker rebuilds its indexes from Qdrant in the background once they
+# are that old; 0 (default) assumes a single worker and never rebuilds.
+KEYWORD_INDEX_REFRESH = float(os.getenv("KEYWORD_INDEX_REFRESH", 0))
+
+# Records which embedding model and dimension each collection was built with
+EMBEDDING_REGISTRY_COLLECTION = "embedding_models"
+
+
+class EmbeddingModelMismatch(RuntimeError):
+    pass
+
+
+class _TimedClient:
+    """QdrantClient proxy that records latency (and a trace span) of every call by operation and collection"""
+
+    def __init__(self, client: QdrantClient):
+        self._client = client
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            collection = kwargs.get("collection_name", args[0] if args and isinstance(args[0], str) else None)
+            with span(f"qdrant.{name}", **{"db.system": "qdrant", "db.collection.name": collection}), \
+                    timed(QDRANT_SECONDS, operation=name, collection=bounded(collection, KNOWN_COLLECTIONS)):
+                return attr(*args, **kwargs)
+        return call
+
 
 class QdrantService:
     def __init__(self):
         self.qdrant_host = os.getenv("QDRANT_HOST", "localhost")
         self.qdrant_port = int(os.getenv("QDRANT_PORT", 6333))
         self.collections = ["policy", "prompts", "variables", "croissant", "dids", "groups", "bookmarks"]
-        self.client = QdrantClient(host=self.qdrant_host, port=self.qdrant_port)
-        self.encoder = TextEmbedding()
+        # QDRANT_LOCATION (e.g. ":memory:" or a local path) selects qdrant-client's embedded mode instead of a server
+        location = os.getenv("QDRANT_LOCATION")
+        if location:
+            self.client = _TimedClient(QdrantClient(location=location) if location == ":memory:" else QdrantClient(path=location))
+        else:
+            self.client = _TimedClient(QdrantClient(host=self.qdrant_host, port=self.qdrant_port))
+        self.embedder = build_embedder()
+        self.keyword_indexes: Dict[str, KeywordIndex] = {}
+        self.keyword_refreshes: Dict[str, threading.Thread] = {}
+        self._keyword_lock = threading.Lock()
+        self.model_mismatches: Dict[str, str] = {}
+        self._ensure_model_registry()
         self._ensure_collections()
 
     def _ensure_collections(self):
-        # Get embedding dimension once
-        example_embedding = list(self.encoder.embed(["test"]))[0]
-        dimension = len(example_embedding)
-
         for coll in self.collections:
             try:
-                self.client.get_collection(coll)
+                info = self.client.get_collection(coll)
             except Exception:
                 # Create collection if it doesn't exist
-                self.client.create_collection(
-                    collection_name=coll,
-                    vectors_config=models.VectorParams(
-                        size=dimension,
-                        distance=models.Distance.COSINE
-                    )
-                )
-                print(f"Created Qdrant collection: {coll}")
+                self._create_collection(coll, self.embedder.dimension)
+                logger.info("Created Qdrant collection", extra={"collection": coll})
+            else:
+                self._verify_embedding_model(coll, info)
 
-    def upsert_document(self, did: str, payload: Dict[str, Any], collection: str = None):
-        # Determine collection if not explicitly provided
-        if not collection:
-            collection = self._determine_collection(payload)
-            
+    def _create_collection(self, collection: str, dimension: int):
+        # Storage layout (on-disk vectors, HNSW, quantization) comes from the collection config
+        settings = collection_configs.get(collection)
+        self.client.create_collection(
+            collection_name=collection,
+            vectors_config=settings.vector_params(dimension),
+            hnsw_config=settings.hnsw_config(),
+            quantization_config=settings.quantization_config(),
+            on_disk_payload=settings.on_disk_payload
+        )
+        # Index the filterable payload fields so filtered searches stay fast at scale
+        self._create_payload_indexes(collection)
+        self._register_embedding_model(collection, dimension)
+
+    def _create_payload_indexes(self, collection: str):
+        for field in KEYWORD_FILTER_FIELDS:
+            self.client.create_payload_index(collection, field_name=field, field_schema=models.PayloadSchemaType.KEYWORD)
+        for field in DATETIME_FILTER_FIELDS:
+            self.client.create_payload_index(collection, field_name=field, field_schema=models.PayloadSchemaType.DATETIME)
+        self.client.create_payload_index(collection, field_name="chunk", field_schema=models.PayloadSchemaType.INTEGER)
+
+    def _ensure_model_registry(self):
+        try:
+            self.client.get_collection(EMBEDDING_REGISTRY_COLLECTION)
+        except Exception:
+            self.client.create_collection(
+                collection_name=EMBEDDING_REGISTRY_COLLECTION,
+                vectors_config=models.VectorParams(size=1, distance=models.Distance.DOT)
+            )
+
+    def _register_embedding_model(self, collection: str, dimension: int):
+        self.client.upsert(
+            collection_name=EMBEDDING_REGISTRY_COLLECTION,
+            points=[models.PointStruct(
+                id=self._did_to_id(collection),
+                vector=[0.0],
+                payload={"collection": collection, "model": self.embedder.model_name, "dimension": dimension}
+            )]
+        )
+        self.model_mismatches.pop(collection, None)
+
+    def _verify_embedding_model(self, collection: str, info):
+        """Compare the model/dimension a collection was built with against the configured embedder"""
+        vectors = info.config.params.vectors
+        size = vectors.size if isinstance(vectors, models.VectorParams) else None
+        records = self.client.retrieve(EMBEDDING_REGISTRY_COLLECTION, ids=[self._did_to_id(collection)], with_payload=True)
+        current = (self.embedder.model_name, self.embedder.dimension)
+
+        if not records:
+            # Collection predates the registry: adopt it if the dimension fits
+            if size == current[1]:
+                self._register_embedding_model(collection, size)
+                return
+            built_with = (None, size)
+        else:
+            built_with = (records[0].payload.get("model"), records[0].payload.get("dimension"))
+
+        if built_with != current:
+            self.model_mismatches[collection] = (
+                f"Collection '{collection}' was built with model {built_with[0]!r} (dimension {built_with[1]}), "
+                f"but the configured embedder is {current[0]!r} (dimension {current[1]}). "
+                f"Re-index it (export, recreate, import) or set EMBEDDING_MODEL back."
+            )
+            logger.warning(self.model_mismatches[collection], extra={"collection": collection})
+
+    def _check_embedding_model(self, collection: str):
+        if collection in self.model_mismatches:
+            raise EmbeddingModelMismatch(self.model_mismatches[collection])
+
+    def migrate_collection(self, collection: str):
+        """Apply the configured storage settings to an existing collection (Qdrant rebuilds in the background)"""
+        settings = collection_configs.get(collection)
+        quantization = settings.quantization_config()
+        self.client.update_collection(
+            collection_name=collection,
+            vectors_config={"": models.VectorParamsDiff(on_disk=settings.on_disk)},
+            hnsw_config=settings.hnsw_config(),
+            quantization_config=quantization if quantization is not None else models.Disabled.DISABLED,
+            collection_params=models.CollectionParamsDiff(on_disk_payload=settings.on_disk_payload)
+        )
+        # Collections created by older versions may lack some payload indexes
+        self._create_payload_indexes(collection)
+
+    def _ensure_collection(self, collection: str):
         # Ensure collection exists
         if collection not in self.collections:
             try:
-                self.client.get_collection(collection)
+                info = self.client.get_collection(collection)
+                self._verify_embedding_model(collection, info)
                 self.collections.append(collection)
+            except EmbeddingModelMismatch:
+                raise
             except Exception:
-                example_embedding = list(self.encoder.embed(["test"]))[0]
-                dimension = len(example_embedding)
-                self.client.create_collection(
-                    collection_name=collection,
-                    vectors_config=models.VectorParams(
-                        size=dimension,
-                        distance=models.Distance.COSINE
-                    )
-                )
+                self._create_collection(collection, self.embedder.dimension)
                 self.collections.append(collection)
-                print(f"Created Qdrant collection dynamically: {collection}")
-        
-        # Convert payload to a text string for embedding
-        text_content = self._extract_text_content(payload)
-        embeddings = list(self.encoder.embed([text_content]))[0]
-        
-        self.client.upsert(
+                logger.info("Created Qdrant collection dynamically", extra={"collection": collection})
+
+    def upsert_document(self, did: str, payload: Dict[str, Any], collection: str = None):
+        # Determine collection if not explicitly provided
+        if not collection:
+            collection = self._determine_collection(payload)
+            
+        self._ensure_collection(collection)
+        self._check_embedding_model(collection)
+        with span("index", collection=collection, did=did):
+            self._upsert_collection(collection, [(did, payload)], wait=True)
+        debug_sampled(logger, "Upserted DID", did=did, collection=collection)
+
+    def upsert_documents(self, documents: List[Tuple[str, Dict[str, Any], Optional[str]]]) -> int:
+        """
+        Bulk variant of upsert_document for (did, payload, collection) tuples.
+        Texts are embedded in a single batched call and written with one upsert per collection.
+        """
+        by_collection: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+        for did, payload, collection in documents:
+            by_collection.setdefault(collection or self._determine_collection(payload), []).append((did, payload))
+
+        for collection, docs in by_collection.items():
+            self._ensure_collection(collection)
+            self._check_embedding_model(collection)
+            self._upsert_collection(collection, docs, wait=False)
+        return len(documents)
+
+    def _upsert_collection(self, collection: str, docs: List[Tuple[str, Dict[str, Any]]], wait: bool):
+        """
+        Embed and write documents of one collection. A long text is split into chunks: the first
+        is the DID's main point (full payload and text), the others are extra `chunk` points
+        carrying only the DID, the chunk text and the filter fields.
+        """
+        texts = [self._extract_text_content(payload, collection) for _, payload in docs]
+        chunked = [chunk_text(text) for text in texts]
+        with span("embed", documents=len(docs), chunks=sum(len(c) for c in chunked)):
+            vectors = self.embedder.embed([chunk for chunks in chunked for chunk in chunks])
+
+        points = []
+        start = 0
+        for (did, payload), text, chunks in zip(docs, texts, chunked):
+            doc_vectors = vectors[start:start + len(chunks)]
+            start += len(chunks)
+            point_payload = self._point_payload(did, payload, text)
+            if len(chunks) > 1:
+                point_payload["chunks"] = len(chunks)
+            points.append(models.PointStruct(id=self._did_to_id(did), vector=doc_vectors[0], payload=point_payload))
+            filter_fields = self._filter_fields(payload)
+            for i, (chunk, vector) in enumerate(zip(chunks[1:], doc_vectors[1:]), start=1):
+                points.append(models.PointStruct(
+                    id=self._did_to_id(f"{did}#chunk-{i}"),
+                    vector=vector,
+                    payload={"did": did, "chunk": i, "text": chunk, **filter_fields}
+                ))
+
+        # Drop chunks left over from a longer previous version of the documents
+        self.client.delete(
             collection_name=collection,
-            points=[
-                models.PointStruct(
-                    id=self._did_to_id(did),
-                    vector=embeddings.tolist(),
-                    payload={
-                        "did": did,
-                        "json_ld": payload,
-                        "text": text_content
-                    }
-                )
-            ]
+            points_selector=models.FilterSelector(filter=models.Filter(should=[
+                models.Filter(must=[
+                    models.FieldCondition(key="did", match=models.MatchValue(value=did)),
+                    models.FieldCondition(key="chunk", range=models.Range(gte=len(chunks)))
+                ])
+                for (did, _), chunks in zip(docs, chunked)
+            ])),
+            wait=False
         )
-        print(f"Upserted DID {did} to Qdrant collection: {collection}")
+        self.client.upsert(collection_name=collection, points=points, wait=wait)
+        for (did, payload), text in zip(docs, texts):
+            self._index_keywords(collection, did, text, payload)
+
+    def _point_payload(self, did: str, payload: Dict[str, Any], text: str) -> Dict[str, Any]:
+        point_payload = {
+            "did": did,
+            "json_ld": payload,
+            "text": text
+        }
+        point_payload.update(self._filter_fields(payload))
+        return point_payload
+
+    def _filter_fields(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract the filterable fields (see KEYWORD_FILTER_FIELDS) from a JSON-LD payload"""
+        fields = {}
+        if isinstance(payload.get("type"), str):
+            fields["type"] = payload["type"]
+        creator = payload.get("dcterms:creator") or payload.get("creator")
+        if isinstance(creator, str):
+            fields["creator"] = creator
+        if isinstance(payload.get("restricted_to"), str):
+            fields["restricted_to"] = payload["restricted_to"]
+
+        permissions = payload.get("odrl:permission") or payload.get("permission") or []
+        if isinstance(permissions, list):
+            targets = [p["target"] for p in permissions if isinstance(p, dict) and isinstance(p.get("target"), str)]
+            actions = [p["action"] for p in permissions if isinstance(p, dict) and isinstance(p.get("action"), str)]
+            if targets:
+                fields["target"] = sorted(set(targets))
+            if actions:
+                fields["action"] = sorted(set(actions))
+
+        if isinstance(payload.get("url"), str) and payload["url"].strip():
+            fields["url_hash"] = url_hash(payload["url"])
+        if isinstance(payload.get("token"), str) and payload["token"]:
+            fields["token_hash"] = token_hash(payload["token"])
+
+        timestamp = payload.get("timestamp") or payload.get("dcterms:issued")
+        if isinstance(timestamp, str) and _parse_datetime(timestamp):
+            fields["timestamp"] = timestamp
+        return fields
+
+    def _build_filter(self, filters: Optional[Dict[str, Any]]) -> Optional[models.Filter]:
+        """
+        Qdrant filter from {field: value} for KEYWORD_FILTER_FIELDS plus
+        `timestamp_from` / `timestamp_to` (ISO 8601) for a timestamp range.
+        """
+        if not filters:
+            return None
+        must = []
+        for field in KEYWORD_FILTER_FIELDS:
+            if filters.get(field):
+                must.append(models.FieldCondition(key=field, match=models.MatchValue(value=filters[field])))
+        if filters.get("timestamp_from") or filters.get("timestamp_to"):
+            must.append(models.FieldCondition(
+                key="timestamp",
+                range=models.DatetimeRange(gte=filters.get("timestamp_from"), lte=filters.get("timestamp_to"))
+            ))
+        return models.Filter(must=must) if must else None
 
-    def search_documents(self, query_text: str, collection: str = None, limit: int = 5) -> List[Dict[str, Any]]:
+    def _matches_filters(self, point_payload: Dict[str, Any], filters: Optional[Dict[str, Any]]) -> bool:
+        """Local equivalent of _build_filter for points found through the keyword index"""
+        if not filters:
+            return True
+        for field in KEYWORD_FILTER_FIELDS:
+            expected = filters.get(field)
+            if not expected:
+                continue
+            value = point_payload.get(field)
+            if value != expected and not (isinstance(value, list) and expected in value):
+                return False
+        if filters.get("timestamp_from") or filters.get("timestamp_to"):
+            ts = _parse_datetime(point_payload.get("timestamp"))
+            if ts is None:
+                return False
+            lower = _parse_datetime(filters.get("timestamp_from"))
+            upper = _parse_datetime(filters.get("timestamp_to"))
+            if (lower and ts < lower) or (upper and ts > upper):
+                return False
+        return True
+
+    def search_documents(self, query_text: str, collection: str = None, limit: int = 5, mode: str = "vector", filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Search documents. `mode` is one of:
+        - "vector": dense-vector similarity (default)
+        - "keyword": BM25 over the local inverted index
+        - "hybrid": BM25 and vector results fused with reciprocal-rank fusion
+        In keyword and hybrid mode, a query equal to an identifier (DID, URL, policy uid,
+        name, unit symbol) is answered from the exact-match index without embedding.
+        `filters` restricts results by payload fields (see _build_filter).
+        """
         # If collection is "all" or None, search across all collections
         collections_to_search = [collection] if collection and collection in self.collections else self.collections
 
         try:
-            query_vector = list(self.encoder.embed([query_text]))[0]
-            all_results = []
-            
-            for coll in collections_to_search:
-                try:
-                    # Use query_points which is the modern and more robust API
-                    search_result = self.client.query_points(
-                        collection_name=coll,
-                        query=query_vector.tolist(),
-                        limit=limit,
-                        with_payload=True
-                    ).points
-                    
-                    for hit in search_result:
-                        all_results.append({
-                            "did": hit.payload.get("did"),
-                            "json_ld": hit.payload.get("json_ld"),
-                            "score": hit.score,
-                            "collection": coll
-                        })
-                except AttributeError:
-                    # Fallback to search if query_points is missing
-                    if hasattr(self.client, "search"):
-                        search_result = self.client.search(
-                            collection_name=coll,
-                            query_vector=query_vector.tolist(),
-                            limit=limit,
-                            with_payload=True
-                        )
-                        for hit in search_result:
-                            all_results.append({
-                                "did": hit.payload.get("did"),
-                                "json_ld": hit.payload.get("json_ld"),
-                                "score": hit.score,
-                                "collection": coll
-                            })
-                            
-            # Sort by score descending and return top 'limit' results
-            all_results.sort(key=lambda x: x["score"], reverse=True)
-            return all_results[:limit]
-            
+            if mode == "vector":
+                return self._vector_search(query_text, collections_to_search, limit, filters)
+
+            exact = [(coll, did) for coll in collections_to_search for did in self._keyword_index(coll).exact(query_text)]
+            if exact:
+                results = self._hydrate(exact, [1.0] * len(exact), match="exact", filters=filters)
+                if results:
+                    return results[:limit]
+
+            # Filters are applied while scoring, so filtered-out documents don't take up the top-k
+            accept = (lambda fields: self._matches_filters(fields, filters)) if filters else None
+            keyword = [
+                (coll, did, score)
+                for coll in collections_to_search
+                for did, score in self._keyword_index(coll).search(query_text, limit=limit * 4, accept=accept)
+            ]
+            keyword.sort(key=lambda x: x[2], reverse=True)
+            keyword = keyword[:limit * 4]
+            keyword_hits = self._hydrate([(c, d) for c, d, _ in keyword], [s for _, _, s in keyword], match="keyword", filters=filters)
+            if mode == "keyword":
+                return keyword_hits[:limit]
+
+            vector = self._vector_search(query_text, collections_to_search, limit * 4, filters)
+            by_key = {(r["collection"], r["did"]): r for r in keyword_hits + vector}
+            fused = reciprocal_rank_fusion([
+                [(r["collection"], r["did"]) for r in vector],
+                [(r["collection"], r["did"]) for r in keyword_hits]
+            ])[:limit]
+
+            return [{**by_key[key], "score": score, "match": "hybrid"} for key, score in fused]
+
         except Exception as e:
-            print(f"ERROR in search_documents: {e}")
+            logger.error("search_documents failed", extra={"error": str(e), "mode": mode})
             raise e
 
+    def _vector_search(self, query_text: str, collections_to_search: List[str], limit: int, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Nearest DIDs by vector; a DID with several chunk vectors is scored by its best chunk"""
+        query_filter = self._build_filter(filters)
+        with span("embed", documents=1):
+            query_vector = self.embedder.embed([query_text])[0]
+        all_results = []
+        
+        for coll in collections_to_search:
+            if coll in self.model_mismatches:
+                if len(collections_to_search) == 1:
+                    raise EmbeddingModelMismatch(self.model_mismatches[coll])
+                logger.warning("Skipping collection in vector search: embedding model mismatch", extra={"collection": coll})
+                continue
+            try:
+                # Group chunk hits by DID so each DID is returned once
+                groups = self.client.query_points_groups(
+                    collection_name=coll,
+                    query=query_vector,
+                    group_by="did",
+                    group_size=1,
+                    query_filter=query_filter,
+                    search_params=collection_configs.get(coll).search_params(),
+                    limit=limit,
+                    with_payload=True
+                ).groups
+                hits = [group.hits[0] for group in groups if group.hits]
+            except AttributeError:
+                # Fallback to search if query_points_groups is missing; aggregate chunks here
+                if not hasattr(self.client, "search"):
+                    continue
+                hits = self.client.search(
+                    collection_name=coll,
+                    query_vector=query_vector,
+                    query_filter=query_filter,
+                    search_params=collection_configs.get(coll).search_params(),
+                    limit=limit * 4,
+                    with_payload=True
+                )
+                best = {}
+                for hit in hits:
+                    did = hit.payload.get("did")
+                    if did not in best or hit.score > best[did].score:
+                        best[did] = hit
+                hits = sorted(best.values(), key=lambda h: h.score, reverse=True)[:limit]
+
+            for hit in hits:
+                all_results.append({
+                    "did": hit.payload.get("did"),
+                    "json_ld": hit.payload.get("json_ld"),
+                    "score": hit.score,
+                    "collection": coll
+                })
+
+        # Chunk points carry no JSON-LD; take it from the DID's main point
+        missing = [(r["collection"], r["did"]) for r in all_results if r["json_ld"] is None and r["did"]]
+        if missing:
+            hydrated = {(r["collection"], r["did"]): r["json_ld"] for r in self._hydrate(missing, [0.0] * len(missing), match="vector")}
+            for r in all_results:
+                if r["json_ld"] is None:
+                    r["json_ld"] = hydrated.get((r["collection"], r["did"]))
+                        
+        # Sort by score descending and return top 'limit' results
+        all_results.sort(key=lambda x: x["score"], reverse=True)
+        return all_results[:limit]
+
+    def find_duplicate(self, payload: Dict[str, Any], collection: str = None, threshold: float = DEDUP_THRESHOLD) -> Optional[Dict[str, Any]]:
+        """
+        Existing DID that `payload` duplicates: same normalized URL, or nearest neighbour with
+        cosine similarity >= threshold. Both checks run in one batched Qdrant query.
+        Only DIDs stored with the same `token` (or both without one) count as duplicates, and
+        the stored document is not returned, so a caller never learns another caller's token.
+        Returns {"did", "score", "match": "url" | "similar", "collection"} or None.
+        """
+        collection = collection or self._determine_collection(payload)
+        if collection not in self.collections or collection in self.model_mismatches:
+            return None
+
+        text = self._extract_text_content(payload, collection)
+        vector = self.embedder.embed([chunk_text(text)[0]])[0]
+        search_params = collection_configs.get(collection).search_params()
+        fields = self._filter_fields(payload)
+        if fields.get("token_hash"):
+            same_token = models.FieldCondition(key="token_hash", match=models.MatchValue(value=fields["token_hash"]))
+        else:
+            same_token = models.IsEmptyCondition(is_empty=models.PayloadField(key="token_hash"))
+        requests = [models.QueryRequest(
+            query=vector,
+            filter=models.Filter(must=[same_token]),
+            limit=1,
+            score_threshold=threshold,
+            params=search_params,
+            with_payload=True
+        )]
+        hash_value = fields.get("url_hash")
+        if hash_value:
+            requests.insert(0, models.QueryRequest(
+                query=vector,
+                filter=models.Filter(must=[same_token, models.FieldCondition(key="url_hash", match=models.MatchValue(value=hash_value))]),
+                limit=1,
+                params=search_params,
+                with_payload=True
+            ))
+
+        responses = self.client.query_batch_points(collection_name=collection, requests=requests)
+        matches = ["url", "similar"] if hash_value else ["similar"]
+        for match, response in zip(matches, responses):
+            if response.points:
+                hit = response.points[0]
+                did = hit.payload.get("did")
+                json_ld = hit.payload.get("json_ld")
+                if json_ld is None:
+                    # Matched a chunk point; fetch the main point
+                    hydrated = self._hydrate([(collection, did)], [hit.score], match=match)
+                    json_ld = hydrated[0]["json_ld"] if hydrated else None
+                # Points indexed before `token_hash` existed pass the filter; check the token itself
+                if (json_ld or {}).get("token") != payload.get("token"):
+                    continue
+                return {"did": did, "score": hit.score, "match": match, "collection": collection}
+        return None
+
+    def _hydrate(self, keys: List[Tuple[str, str]], scores: List[float], match: str, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Fetch payloads for (collection, did) keys, preserving order and dropping those not matching `filters`"""
+        by_collection: Dict[str, List[str]] = {}
+        for coll, did in keys:
+            by_collection.setdefault(coll, []).append(did)
+
+        payloads = {}
+        for coll, dids in by_collection.items():
+            points = self.client.retrieve(
+                collection_name=coll,
+                ids=[self._did_to_id(did) for did in dids],
+                with_payload=True,
+                with_vectors=False
+            )
+            for point in points:
+                payloads[(coll, point.payload.get("did"))] = point.payload
+
+        results = []
+        for (coll, did), score in zip(keys, scores):
+            payload = payloads.get((coll, did))
+            if payload is not None and self._matches_filters(payload, filters):
+                results.append({
+                    "did": did,
+                    "json_ld": payload.get("json_ld"),
+                    "score": score,
+                    "collection": coll,
+                    "match": match
+                })
+        return results
+
+    def build_keyword_indexes(self):
+        """Build the keyword index of every collection (at startup, so no request pays for it)"""
+        for collection in self.collections:
+            self._keyword_index(collection)
+
+    def _keyword_index(self, collection: str) -> KeywordIndex:
+        """Keyword index of a collection, built from the stored points on first use"""
+        index = self.keyword_indexes.setdefault(collection, KeywordIndex())
+        record_cache("keyword_index", index.built)
+        if not index.built:
+            self._rebuild_keyword_index(collection, index)
+        elif KEYWORD_INDEX_REFRESH > 0 and time.monotonic() - index.built_at > KEYWORD_INDEX_REFRESH:
+            # Serve the current index; pick up other workers' writes in the background
+            with self._keyword_lock:
+                running = self.keyword_refreshes.get(collection)
+                if running is None or not running.is_alive():
+                    thread = threading.Thread(target=self._rebuild_keyword_index, args=(collection, index), daemon=True)
+                    self.keyword_refreshes[collection] = thread
+                    thread.start()
+        return index
+
+    def _rebuild_keyword_index(self, collection: str, index: KeywordIndex):
+        filter_keys = KEYWORD_FILTER_FIELDS + DATETIME_FILTER_FIELDS
+        index.rebuild(
+            (
+                point.payload.get("did"), point.payload.get("text", ""), point.payload.get("json_ld") or {},
+                {key: point.payload[key] for key in filter_keys if key in point.payload}
+            )
+            for point in self.scroll_documents(collection)
+            if point.payload.get("did")
+        )
+        logger.info("Built keyword index", extra={"collection": collection, "documents": len(index)})
+
+    def _index_keywords(self, collection: str, did: str, text: str, payload: Dict[str, Any]):
+        # Unbuilt indexes pick the document up when they are built from Qdrant
+        index = self.keyword_indexes.get(collection)
+        if index is not None and index.built:
+            index.add(did, text, payload, {"did": did, **self._filter_fields(payload)})
+
+    def scroll_page(self, collection: str, offset=None, limit: int = 256):
+        """Fetch one page of documents (id and payload, no vectors, no chunk points); returns (points, next_offset)"""
+        return self.client.scroll(
+            collection_name=collection,
+            scroll_filter=models.Filter(must_not=[models.FieldCondition(key="chunk", range=models.Range(gt=0))]),
+            limit=limit,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False
+        )
+
+    def scroll_documents(self, collection: str, batch_size: int = 256, offset=None):
+        """Iterate over all points of a collection (id and payload, no vectors), page by page"""
+        while True:
+            points, offset = self.scroll_page(collection, offset=offset, limit=batch_size)
+            for point in points:
+                yield point
+            if offset is None:
+                break
+
     def _determine_collection(self, payload: Dict[str, Any]) -> str:
         # Logic to route payload to the correct collection
         
@@ -159,35 +619,9 @@ class QdrantService:
         # Default
         return "dids"
 
-    def _extract_text_content(self, payload: Dict[str, Any]) -> str:
-        # Extract meaningful text from the payload for embedding
-        parts = []
-        if "name" in payload:
-            parts.append(payload["name"])
-        if "description" in payload:
-            parts.append(payload["description"])
-        if "type" in payload:
-            parts.append(payload["type"])
-        
-        # Add nested unit info if present
-        unit = payload.get("unit")
-        if unit and isinstance(unit, dict):
-            if "name" in unit:
-                parts.append(f"unit: {unit['name']}")
-            if "symbol" in unit:
-                parts.append(f"symbol: {unit['symbol']}")
-            if "description" in unit:
-                parts.append(unit["description"])
-
-        # Add title if present (generic DIDs)
-        if "title" in payload:
-            parts.append(payload["title"])
-
-        if not parts:
-            # Fallback to full JSON string if no specific fields found
-            return json.dumps(payload)
-        
-        return " ".join(parts)
+    def _extract_text_content(self, payload: Dict[str, Any], collection: str = None) -> str:
+        # Extract meaningful text from the payload for embedding (see text_extraction.EXTRACTORS)
+        return extract_text(collection or self._determine_collection(payload), payload)
 
     def _did_to_id(self, did: str) -> str:
         import hashlib
@@ -195,5 +629,17 @@ class QdrantService:
         hash_val = hashlib.md5(did.encode()).hexdigest()
         return str(uuid.UUID(hash_val))
 
+def _parse_datetime(value) -> Optional[datetime]:
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    # Naive timestamps (datetime.now().isoformat()) are treated as UTC, as Qdrant does
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
 # Global instance
 qdrant_service = QdrantService()
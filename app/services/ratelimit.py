@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+
+class AsyncRateLimiter:
+    """
+    Bounds concurrency and request rate for calls to an external provider.
+    `max_concurrency` caps in-flight calls, `rate` (calls per second, 0 = unlimited)
+    is enforced with a token bucket that allows bursts of up to `burst` calls.
+    Safe to create at import time: the asyncio primitives are created on the event loop
+    that uses the limiter, and again if it is later used from another loop.
+    """
+
+    def __init__(self, max_concurrency: int = 4, rate: float = 0, burst: int = 1):
+        self._max_concurrency = max(1, max_concurrency)
+        self._rate = rate
+        self._capacity = max(1, burst)
+        self._tokens = float(self._capacity)
+        self._updated = time.monotonic()
+        self._loop = None
+        self._semaphore = None
+        self._lock = None
+
+    def _bind(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+            self._lock = asyncio.Lock()
+
+    async def _acquire_token(self):
+        if self._rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+    async def __aenter__(self):
+        self._bind()
+        await self._semaphore.acquire()
+        try:
+            await self._acquire_token()
+        except BaseException:
+            self._semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._semaphore.release()
+        return False
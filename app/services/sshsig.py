@@ -0,0 +1,400 @@
+"""
+In-process verification of OpenSSH signatures (``ssh-keygen -Y sign`` / SSHSIG).
+
+Implements the SSHSIG envelope from OpenSSH's PROTOCOL.sshsig together with
+signature verification for ssh-ed25519, ecdsa-sha2-nistp{256,384,521} and
+ssh-rsa (rsa-sha2-256/512) keys using only the standard library, so no temp
+files or ``ssh-keygen`` processes are needed. Only public data is processed,
+hence the arithmetic does not need to be constant time.
+"""
+import base64
+import hashlib
+import struct
+from functools import lru_cache
+from typing import Tuple
+
+MAGIC_PREAMBLE = b"SSHSIG"
+SIG_VERSION = 1
+ARMOR_BEGIN = "-----BEGIN SSH SIGNATURE-----"
+ARMOR_END = "-----END SSH SIGNATURE-----"
+
+MESSAGE_HASHES = {"sha256": hashlib.sha256, "sha512": hashlib.sha512}
+
+
+class SshSigError(ValueError):
+    """Raised when a signature is malformed or does not verify."""
+
+
+class SshSigUnsupported(SshSigError):
+    """Raised for key or signature types this module cannot verify (use ssh-keygen)."""
+
+
+# --- SSH wire format ---------------------------------------------------------
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def take(self, n: int) -> bytes:
+        if self.pos + n > len(self.data):
+            raise SshSigError("Truncated SSH data")
+        chunk = self.data[self.pos:self.pos + n]
+        self.pos += n
+        return chunk
+
+    def uint32(self) -> int:
+        return struct.unpack(">I", self.take(4))[0]
+
+    def string(self) -> bytes:
+        return self.take(self.uint32())
+
+    def mpint(self) -> int:
+        return int.from_bytes(self.string(), "big", signed=True)
+
+    def done(self) -> bool:
+        return self.pos == len(self.data)
+
+
+def _ssh_string(data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + data
+
+
+# --- Ed25519 (RFC 8032) ------------------------------------------------------
+
+_ED_P = 2 ** 255 - 19
+_ED_L = 2 ** 252 + 27742317777372353535851937790883648493
+_ED_D = -121665 * pow(121666, _ED_P - 2, _ED_P) % _ED_P
+_ED_SQRT_M1 = pow(2, (_ED_P - 1) // 4, _ED_P)
+
+
+def _ed_add(P, Q):
+    # Extended twisted Edwards coordinates (X, Y, Z, T)
+    A = (P[1] - P[0]) * (Q[1] - Q[0]) % _ED_P
+    B = (P[1] + P[0]) * (Q[1] + Q[0]) % _ED_P
+    C = 2 * P[3] * Q[3] * _ED_D % _ED_P
+    D = 2 * P[2] * Q[2] % _ED_P
+    E, F, G, H = B - A, D - C, D + C, B + A
+    return (E * F % _ED_P, G * H % _ED_P, F * G % _ED_P, E * H % _ED_P)
+
+
+def _ed_mul(s: int, P):
+    Q = (0, 1, 1, 0)
+    while s > 0:
+        if s & 1:
+            Q = _ed_add(Q, P)
+        P = _ed_add(P, P)
+        s >>= 1
+    return Q
+
+
+def _ed_equal(P, Q) -> bool:
+    if (P[0] * Q[2] - Q[0] * P[2]) % _ED_P != 0:
+        return False
+    return (P[1] * Q[2] - Q[1] * P[2]) % _ED_P == 0
+
+
+def _ed_recover_x(y: int, sign: int):
+    if y >= _ED_P:
+        return None
+    x2 = (y * y - 1) * pow(_ED_D * y * y + 1, _ED_P - 2, _ED_P)
+    if x2 == 0:
+        return None if sign else 0
+    x = pow(x2, (_ED_P + 3) // 8, _ED_P)
+    if (x * x - x2) % _ED_P != 0:
+        x = x * _ED_SQRT_M1 % _ED_P
+    if (x * x - x2) % _ED_P != 0:
+        return None
+    if (x & 1) != sign:
+        x = _ED_P - x
+    return x
+
+
+def _ed_decompress(data: bytes):
+    if len(data) != 32:
+        raise SshSigError("Invalid Ed25519 point length")
+    y = int.from_bytes(data, "little")
+    sign = y >> 255
+    y &= (1 << 255) - 1
+    x = _ed_recover_x(y, sign)
+    if x is None:
+        raise SshSigError("Invalid Ed25519 point")
+    return (x, y, 1, x * y % _ED_P)
+
+
+_ED_GY = 4 * pow(5, _ED_P - 2, _ED_P) % _ED_P
+_ED_G = (_ed_recover_x(_ED_GY, 0), _ED_GY, 1, _ed_recover_x(_ED_GY, 0) * _ED_GY % _ED_P)
+
+
+def _verify_ed25519(public: bytes, message: bytes, sig: bytes) -> bool:
+    if len(sig) != 64:
+        return False
+    A = _ed_decompress(public)
+    R = _ed_decompress(sig[:32])
+    s = int.from_bytes(sig[32:], "little")
+    if s >= _ED_L:
+        return False
+    h = int.from_bytes(hashlib.sha512(sig[:32] + public + message).digest(), "little") % _ED_L
+    return _ed_equal(_ed_mul(s, _ED_G), _ed_add(R, _ed_mul(h, A)))
+
+
+# --- ECDSA over NIST prime curves (a = -3) ------------------------------------
+
+_CURVES = {
+    "nistp256": {
+        "p": 0xffffffff00000001000000000000000000000000ffffffffffffffffffffffff,
+        "b": 0x5ac635d8aa3a93e7b3ebbd55769886bc651d06b0cc53b0f63bce3c3e27d2604b,
+        "n": 0xffffffff00000000ffffffffffffffffbce6faada7179e84f3b9cac2fc632551,
+        "gx": 0x6b17d1f2e12c4247f8bce6e563a440f277037d812deb33a0f4a13945d898c296,
+        "gy": 0x4fe342e2fe1a7f9b8ee7eb4a7c0f9e162bce33576b315ececbb6406837bf51f5,
+        "hash": hashlib.sha256,
+    },
+    "nistp384": {
+        "p": 0xfffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffeffffffff0000000000000000ffffffff,
+        "b": 0xb3312fa7e23ee7e4988e056be3f82d19181d9c6efe8141120314088f5013875ac656398d8a2ed19d2a85c8edd3ec2aef,
+        "n": 0xffffffffffffffffffffffffffffffffffffffffffffffffc7634d81f4372ddf581a0db248b0a77aecec196accc52973,
+        "gx": 0xaa87ca22be8b05378eb1c71ef320ad746e1d3b628ba79b9859f741e082542a385502f25dbf55296c3a545e3872760ab7,
+        "gy": 0x3617de4a96262c6f5d9e98bf9292dc29f8f41dbd289a147ce9da3113b5f0b8c00a60b1ce1d7e819d7a431d7c90ea0e5f,
+        "hash": hashlib.sha384,
+    },
+    "nistp521": {
+        "p": 2 ** 521 - 1,
+        "b": 0x0051953eb9618e1c9a1f929a21a0b68540eea2da725b99b315f3b8b489918ef109e156193951ec7e937b1652c0bd3bb1bf073573df883d2c34f1ef451fd46b503f00,
+        "n": 0x01fffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffa51868783bf2f966b7fcc0148f709a5d03bb5c9b8899c47aebb6fb71e91386409,
+        "gx": 0x00c6858e06b70404e9cd9e3ecb662395b4429c648139053fb521f828af606b4d3dbaa14b5e77efe75928fe1dc127a2ffa8de3348b3c1856a429bf97e7e31c2e5bd66,
+        "gy": 0x011839296a789a3bc0045c8a5fb42c7d1bd998f54449579b446817afbd17273e662c97ee72995ef42640c550b9013fad0761353c7086a272c24088be94769fd16650,
+        "hash": hashlib.sha512,
+    },
+}
+
+
+def _ec_double(P, p):
+    # Jacobian doubling for a = -3
+    X, Y, Z = P
+    if Y == 0 or Z == 0:
+        return (0, 1, 0)
+    YY = Y * Y % p
+    S = 4 * X * YY % p
+    ZZ = Z * Z % p
+    M = 3 * (X - ZZ) * (X + ZZ) % p
+    X3 = (M * M - 2 * S) % p
+    Y3 = (M * (S - X3) - 8 * YY * YY) % p
+    Z3 = 2 * Y * Z % p
+    return (X3, Y3, Z3)
+
+
+def _ec_add(P, Q, p):
+    if P[2] == 0:
+        return Q
+    if Q[2] == 0:
+        return P
+    Z1Z1 = P[2] * P[2] % p
+    Z2Z2 = Q[2] * Q[2] % p
+    U1 = P[0] * Z2Z2 % p
+    U2 = Q[0] * Z1Z1 % p
+    S1 = P[1] * Q[2] * Z2Z2 % p
+    S2 = Q[1] * P[2] * Z1Z1 % p
+    if U1 == U2:
+        return _ec_double(P, p) if S1 == S2 else (0, 1, 0)
+    H = (U2 - U1) % p
+    R = (S2 - S1) % p
+    HH = H * H % p
+    HHH = H * HH % p
+    V = U1 * HH % p
+    X3 = (R * R - HHH - 2 * V) % p
+    Y3 = (R * (V - X3) - S1 * HHH) % p
+    Z3 = H * P[2] * Q[2] % p
+    return (X3, Y3, Z3)
+
+
+def _ec_mul_add(u1: int, G, u2: int, Q, p):
+    # Shamir's trick: u1*G + u2*Q in a single pass
+    GQ = _ec_add(G, Q, p)
+    R = (0, 1, 0)
+    for i in range(max(u1.bit_length(), u2.bit_length()) - 1, -1, -1):
+        R = _ec_double(R, p)
+        b1, b2 = (u1 >> i) & 1, (u2 >> i) & 1
+        if b1 and b2:
+            R = _ec_add(R, GQ, p)
+        elif b1:
+            R = _ec_add(R, G, p)
+        elif b2:
+            R = _ec_add(R, Q, p)
+    return R
+
+
+def _ec_decode_point(curve: dict, data: bytes):
+    p = curve["p"]
+    size = (p.bit_length() + 7) // 8
+    if len(data) != 1 + 2 * size or data[0] != 0x04:
+        raise SshSigUnsupported("Only uncompressed ECDSA points are supported")
+    x = int.from_bytes(data[1:1 + size], "big")
+    y = int.from_bytes(data[1 + size:], "big")
+    if x >= p or y >= p or (y * y - (x * x * x - 3 * x + curve["b"])) % p != 0:
+        raise SshSigError("ECDSA public key is not on the curve")
+    return (x, y, 1)
+
+
+def _verify_ecdsa(curve_name: str, point: bytes, message: bytes, sig_blob: bytes) -> bool:
+    curve = _CURVES[curve_name]
+    p, n = curve["p"], curve["n"]
+    Q = _ec_decode_point(curve, point)
+    reader = _Reader(sig_blob)
+    r, s = reader.mpint(), reader.mpint()
+    if not (0 < r < n and 0 < s < n):
+        return False
+    digest = curve["hash"](message).digest()
+    e = int.from_bytes(digest, "big")
+    excess = len(digest) * 8 - n.bit_length()
+    if excess > 0:
+        e >>= excess
+    w = pow(s, -1, n)
+    X, _, Z = _ec_mul_add(e * w % n, (curve["gx"], curve["gy"], 1), r * w % n, Q, p)
+    if Z == 0:
+        return False
+    x = X * pow(Z * Z, -1, p) % p
+    return x % n == r
+
+
+# --- RSA PKCS#1 v1.5 ---------------------------------------------------------
+
+_RSA_DIGEST_INFO = {
+    "rsa-sha2-256": (hashlib.sha256, bytes.fromhex("3031300d060960864801650304020105000420")),
+    "rsa-sha2-512": (hashlib.sha512, bytes.fromhex("3051300d060960864801650304020305000440")),
+}
+
+
+def _verify_rsa(e: int, n: int, sig_format: str, message: bytes, sig_blob: bytes) -> bool:
+    if sig_format not in _RSA_DIGEST_INFO:
+        # ssh-rsa (SHA-1) signatures are not accepted for SSHSIG
+        raise SshSigUnsupported(f"Unsupported RSA signature algorithm: {sig_format}")
+    if n.bit_length() < 1024:
+        return False
+    hash_fn, prefix = _RSA_DIGEST_INFO[sig_format]
+    k = (n.bit_length() + 7) // 8
+    s = int.from_bytes(sig_blob, "big")
+    if len(sig_blob) > k or s >= n:
+        return False
+    em = pow(s, e, n).to_bytes(k, "big")
+    t = prefix + hash_fn(message).digest()
+    expected = b"\x00\x01" + b"\xff" * (k - len(t) - 3) + b"\x00" + t
+    return em == expected
+
+
+# --- Public keys -------------------------------------------------------------
+
+class SshPublicKey:
+    def __init__(self, key_type: str, blob: bytes, params: Tuple):
+        self.key_type = key_type
+        self.blob = blob
+        self.params = params
+
+    def verify(self, sig_format: str, message: bytes, sig_blob: bytes) -> bool:
+        if self.key_type == "ssh-ed25519":
+            if sig_format != "ssh-ed25519":
+                return False
+            return _verify_ed25519(self.params[0], message, sig_blob)
+        if self.key_type.startswith("ecdsa-sha2-"):
+            if sig_format != self.key_type:
+                return False
+            return _verify_ecdsa(self.params[0], self.params[1], message, sig_blob)
+        if self.key_type == "ssh-rsa":
+            return _verify_rsa(self.params[0], self.params[1], sig_format, message, sig_blob)
+        raise SshSigUnsupported(f"Unsupported key type: {self.key_type}")
+
+
+def parse_public_key_blob(blob: bytes) -> SshPublicKey:
+    reader = _Reader(blob)
+    key_type = reader.string().decode("ascii", "replace")
+    if key_type == "ssh-ed25519":
+        params = (reader.string(),)
+        if len(params[0]) != 32:
+            raise SshSigError("Invalid Ed25519 public key")
+    elif key_type.startswith("ecdsa-sha2-"):
+        curve_name = reader.string().decode("ascii", "replace")
+        if curve_name not in _CURVES or key_type != f"ecdsa-sha2-{curve_name}":
+            raise SshSigUnsupported(f"Unsupported ECDSA curve: {curve_name}")
+        params = (curve_name, reader.string())
+    elif key_type == "ssh-rsa":
+        e = reader.mpint()
+        n = reader.mpint()
+        params = (e, n)
+    else:
+        raise SshSigUnsupported(f"Unsupported key type: {key_type}")
+    if not reader.done():
+        raise SshSigError("Trailing data in public key")
+    return SshPublicKey(key_type, blob, params)
+
+
+@lru_cache(maxsize=1024)
+def parse_public_key(public_key: str) -> SshPublicKey:
+    """Parse an OpenSSH public key line (``type base64 [comment]``). Cached per key string."""
+    fields = public_key.strip().split()
+    if len(fields) < 2:
+        raise SshSigError("Invalid SSH public key format")
+    try:
+        blob = base64.b64decode(fields[1], validate=True)
+    except ValueError:
+        raise SshSigError("Invalid base64 in SSH public key")
+    key = parse_public_key_blob(blob)
+    if key.key_type != fields[0]:
+        raise SshSigError("SSH public key type does not match key data")
+    return key
+
+
+# --- SSHSIG ------------------------------------------------------------------
+
+def _unarmor(signature: str) -> bytes:
+    text = signature.strip()
+    if not text.startswith(ARMOR_BEGIN) or ARMOR_END not in text:
+        raise SshSigError("Signature is not an armored SSH signature")
+    body = text[len(ARMOR_BEGIN):text.index(ARMOR_END)]
+    try:
+        return base64.b64decode("".join(body.split()), validate=True)
+    except ValueError:
+        raise SshSigError("Invalid base64 in SSH signature")
+
+
+def verify_sshsig(public_key: str, signature: str, message: bytes, namespace: str) -> None:
+    """
+    Verify an armored SSHSIG ``signature`` over ``message`` in ``namespace``.
+    The signature must have been made by ``public_key``; this mirrors
+    ``ssh-keygen -Y verify`` with a single-entry allowed signers file.
+    Raises SshSigError on failure and SshSigUnsupported for unknown key types.
+    """
+    key = parse_public_key(public_key)
+
+    reader = _Reader(_unarmor(signature))
+    if reader.take(6) != MAGIC_PREAMBLE:
+        raise SshSigError("Invalid SSHSIG preamble")
+    version = reader.uint32()
+    if version != SIG_VERSION:
+        raise SshSigUnsupported(f"Unsupported SSHSIG version: {version}")
+    sig_key_blob = reader.string()
+    sig_namespace = reader.string()
+    reserved = reader.string()
+    hash_alg = reader.string().decode("ascii", "replace")
+    sig = reader.string()
+    if not reader.done():
+        raise SshSigError("Trailing data in SSH signature")
+
+    if sig_key_blob != key.blob:
+        raise SshSigError("Signature was not made by the provided public key")
+    if sig_namespace != namespace.encode():
+        raise SshSigError(f"Signature namespace mismatch (expected '{namespace}')")
+    if hash_alg not in MESSAGE_HASHES:
+        raise SshSigUnsupported(f"Unsupported hash algorithm: {hash_alg}")
+
+    signed_data = (
+        MAGIC_PREAMBLE
+        + _ssh_string(sig_namespace)
+        + _ssh_string(reserved)
+        + _ssh_string(hash_alg.encode())
+        + _ssh_string(MESSAGE_HASHES[hash_alg](message).digest())
+    )
+
+    sig_reader = _Reader(sig)
+    sig_format = sig_reader.string().decode("ascii", "replace")
+    sig_blob = sig_reader.string()
+    if not key.verify(sig_format, signed_data, sig_blob):
+        raise SshSigError("Signature verification failed")
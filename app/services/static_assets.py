@@ -0,0 +1,155 @@
+"""
+Serving of the built frontend (Vite output): precompressed variants, long-lived caching of
+hashed assets and an in-memory index.html for the SPA fallback.
+
+Precompressed files sit next to the originals (`app.js.br`, `app.js.gz`) and are written at
+image build time by:
+
+    python -m app.services.static_assets compress /frontend_dist
+
+The directory is scanned once at startup, so a rebuilt frontend needs a restart.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import sys
+from typing import Dict, Optional, Sequence
+
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from .http_cache import HTTP_COMPRESS_MIN_BYTES, brotli, etag_matches, negotiate_encoding
+
+# Encoding -> file suffix of the precompressed variant, in order of preference
+PRECOMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+# Vite writes content-hashed files as assets/<name>-<hash>.<ext>
+HASHED_ASSET = re.compile(r"^assets/.+-[A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$")
+COMPRESSIBLE_EXTENSIONS = {".html", ".js", ".mjs", ".css", ".json", ".map", ".svg", ".txt", ".xml", ".webmanifest", ".wasm"}
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def find_static_dir(candidates: Sequence[str]) -> Optional[str]:
+    for directory in candidates:
+        if os.path.isdir(directory):
+            return directory
+    return None
+
+
+def is_hashed_asset(relative_path: str) -> bool:
+    return bool(HASHED_ASSET.match(relative_path.replace(os.sep, "/")))
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves .br / .gz siblings per Accept-Encoding and sets Cache-Control"""
+
+    def __init__(self, directory: str, html: bool = True):
+        super().__init__(directory=directory, html=html)
+        self.root = os.path.realpath(directory)
+        self.variants = self._scan()
+
+    def _scan(self) -> Dict[str, Dict[str, str]]:
+        """original full path -> {encoding: precompressed full path}"""
+        variants: Dict[str, Dict[str, str]] = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            names = set(filenames)
+            for name in filenames:
+                for encoding, suffix in PRECOMPRESSED_SUFFIXES.items():
+                    if name.endswith(suffix) and name[:-len(suffix)] in names:
+                        original = os.path.join(dirpath, name[:-len(suffix)])
+                        variants.setdefault(original, {})[encoding] = os.path.join(dirpath, name)
+        return variants
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        full_path = str(full_path)
+        available = self.variants.get(full_path, {})
+        encoding = negotiate_encoding(Request(scope).headers.get("accept-encoding"), [e for e in PRECOMPRESSED_SUFFIXES if e in available]) if available else None
+        if encoding:
+            compressed = available[encoding]
+            # The variant's own stat gives it a distinct ETag and the right Content-Length
+            response = super().file_response(compressed, os.stat(compressed), scope, status_code)
+            if response.status_code != 304:
+                response.headers["Content-Type"] = _media_type(full_path)
+                response.headers["Content-Encoding"] = encoding
+        else:
+            response = super().file_response(full_path, stat_result, scope, status_code)
+        if available:
+            response.headers["Vary"] = "Accept-Encoding"
+        relative_path = os.path.relpath(full_path, self.root)
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL if is_hashed_asset(relative_path) else REVALIDATE_CACHE_CONTROL
+        return response
+
+
+class SpaIndex:
+    """index.html held in memory (with compressed copies) for the client-side routing fallback"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.body = f.read()
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+        self.encoded = {"gzip": gzip.compress(self.body, compresslevel=9)}
+        if brotli:
+            self.encoded["br"] = brotli.compress(self.body, quality=11)
+
+    @classmethod
+    def load(cls, static_dir: Optional[str]) -> Optional["SpaIndex"]:
+        path = os.path.join(static_dir, "index.html") if static_dir else None
+        return cls(path) if path and os.path.isfile(path) else None
+
+    def response(self, request: Request) -> Response:
+        headers = {"ETag": self.etag, "Cache-Control": REVALIDATE_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+        if etag_matches(request.headers.get("if-none-match"), self.etag):
+            return Response(status_code=304, headers=headers)
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"), list(self.encoded))
+        if encoding:
+            headers["Content-Encoding"] = encoding
+            headers["ETag"] = f'{self.etag[:-1]}-{encoding}"'
+            return Response(content=self.encoded[encoding], media_type="text/html", headers=headers)
+        return Response(content=self.body, media_type="text/html", headers=headers)
+
+
+def _media_type(path: str) -> str:
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+def precompress(directory: str, min_bytes: int = HTTP_COMPRESS_MIN_BYTES) -> Dict[str, int]:
+    """Write .gz (and, with brotli installed, .br) next to compressible files; returns counts"""
+    counts = {"files": 0, "gzip": 0, "br": 0}
+    encodings = ["gzip"] + (["br"] if brotli else [])
+    for dirpath, _, filenames in os.walk(directory):
+        for name in filenames:
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            path = os.path.join(dirpath, name)
+            with open(path, "rb") as f:
+                body = f.read()
+            if len(body) < min_bytes:
+                continue
+            counts["files"] += 1
+            for encoding in encodings:
+                data = gzip.compress(body, compresslevel=9) if encoding == "gzip" else brotli.compress(body, quality=11)
+                # Only keep variants that are actually smaller
+                if len(data) < len(body):
+                    with open(path + PRECOMPRESSED_SUFFIXES[encoding], "wb") as f:
+                        f.write(data)
+                    counts[encoding] += 1
+    return counts
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2 or argv[0] != "compress" or not os.path.isdir(argv[1]):
+        print("Usage: python -m app.services.static_assets compress <dist dir>")
+        return 2
+    counts = precompress(argv[1])
+    print(f"Precompressed {counts['files']} files ({counts['gzip']} gzip, {counts['br']} br)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
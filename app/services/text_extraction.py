@@ -0,0 +1,182 @@
+"""
+Text extraction for embeddings.
+
+Each collection has an extractor that turns a JSON-LD payload into the text that is
+embedded and keyword-indexed: policies are described by their rules (actions, targets,
+constraint operands), Croissant datasets by their metadata, record sets and fields.
+Long texts are split into overlapping word chunks, each embedded as its own vector.
+"""
+import os
+import re
+from typing import Any, Callable, Dict, List
+
+CHUNK_WORDS = int(os.getenv("EMBED_CHUNK_WORDS", 200))
+CHUNK_OVERLAP = int(os.getenv("EMBED_CHUNK_OVERLAP", 40))
+MAX_CHUNKS = int(os.getenv("EMBED_MAX_CHUNKS", 32))
+
+_CAMEL_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+
+def humanize(term: str) -> str:
+    """'dpv:ResearchAndDevelopment' -> 'Research And Development'"""
+    local = re.split(r"[:#/]", term.rstrip("/#"))[-1]
+    return _CAMEL_RE.sub(" ", local).replace("_", " ").strip() or term
+
+
+def _get(payload: Dict[str, Any], *keys: str):
+    for key in keys:
+        if payload.get(key) not in (None, "", []):
+            return payload[key]
+    return None
+
+
+def _as_list(value) -> List[Any]:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _strings(value) -> List[str]:
+    """String values of a scalar, list or {name/@value} object"""
+    out = []
+    for item in _as_list(value):
+        if isinstance(item, str):
+            out.append(item)
+        elif isinstance(item, dict):
+            text = _get(item, "name", "@value", "title", "@id")
+            if isinstance(text, str):
+                out.append(text)
+    return out
+
+
+def extract_generic_text(payload: Dict[str, Any]) -> str:
+    parts = []
+    if "name" in payload:
+        parts.append(payload["name"])
+    if "description" in payload:
+        parts.append(payload["description"])
+    if "type" in payload:
+        parts.append(payload["type"])
+
+    # Add nested unit info if present
+    unit = payload.get("unit")
+    if unit and isinstance(unit, dict):
+        if "name" in unit:
+            parts.append(f"unit: {unit['name']}")
+        if "symbol" in unit:
+            parts.append(f"symbol: {unit['symbol']}")
+        if "description" in unit:
+            parts.append(unit["description"])
+
+    # Add title if present (generic DIDs)
+    if "title" in payload:
+        parts.append(payload["title"])
+
+    parts = [str(p) for p in parts if p]
+    if not parts:
+        # No known fields: use the string leaves instead of the raw JSON
+        parts = _string_leaves(payload)
+    return " ".join(parts)
+
+
+def _string_leaves(value, limit: int = 500) -> List[str]:
+    out: List[str] = []
+    stack = [value]
+    while stack and len(out) < limit:
+        item = stack.pop()
+        if isinstance(item, dict):
+            for key, child in reversed(list(item.items())):
+                if key not in ("@context", "@id", "timestamp", "updated_at"):
+                    stack.append(child)
+        elif isinstance(item, list):
+            stack.extend(reversed(item))
+        elif isinstance(item, str) and item.strip():
+            out.append(item)
+    return out
+
+
+def extract_policy_text(payload: Dict[str, Any]) -> str:
+    """ODRL / OAC policy: description plus one sentence per rule"""
+    parts = [humanize(str(payload.get("type", "Policy")))]
+    description = _get(payload, "dcterms:description", "description")
+    if description:
+        parts.append(str(description))
+    for rule_key, label in (("permission", "permits"), ("prohibition", "prohibits"), ("obligation", "obliges")):
+        for rule in _as_list(_get(payload, f"odrl:{rule_key}", rule_key)):
+            if not isinstance(rule, dict):
+                continue
+            sentence = [label]
+            sentence += [humanize(a) for a in _strings(rule.get("action"))]
+            targets = _strings(rule.get("target"))
+            if targets:
+                sentence += ["on"] + [humanize(t) for t in targets]
+            for party in ("assignee", "assigner"):
+                for value in _strings(rule.get(party)):
+                    sentence += [party, value]
+            for constraint in _as_list(rule.get("constraint")):
+                if not isinstance(constraint, dict):
+                    continue
+                sentence.append("where")
+                sentence += [humanize(v) for v in _strings(constraint.get("leftOperand"))]
+                sentence += [humanize(v) for v in _strings(constraint.get("operator"))]
+                sentence += [humanize(v) for v in _strings(constraint.get("rightOperand"))]
+                sentence += _strings(constraint.get("title"))
+            if rule.get("hasContext"):
+                sentence += ["context", humanize(str(rule["hasContext"]))]
+            parts.append(" ".join(sentence))
+    return ". ".join(parts)
+
+
+def extract_croissant_text(payload: Dict[str, Any]) -> str:
+    """Croissant dataset: metadata, distribution, record sets and their fields"""
+    parts = []
+    for key in ("name", "description"):
+        parts += _strings(payload.get(key))
+    keywords = _strings(payload.get("keywords"))
+    if keywords:
+        parts.append("keywords: " + ", ".join(keywords))
+    for key in ("creator", "publisher", "license", "url"):
+        values = _strings(payload.get(key))
+        if values:
+            parts.append(f"{key}: " + ", ".join(values))
+    for dist in _as_list(payload.get("distribution")):
+        if isinstance(dist, dict):
+            parts.append(" ".join(["file"] + _strings(dist.get("name")) + _strings(dist.get("encodingFormat"))))
+    for record_set in _as_list(_get(payload, "recordSet", "cr:recordSet")):
+        if not isinstance(record_set, dict):
+            continue
+        parts.append(" ".join(["record set"] + _strings(record_set.get("name")) + _strings(record_set.get("description"))))
+        for field in _as_list(_get(record_set, "field", "cr:field")):
+            if isinstance(field, dict):
+                parts.append(" ".join(
+                    ["field"] + _strings(field.get("name")) + _strings(field.get("description"))
+                    + [humanize(t) for t in _strings(_get(field, "dataType", "cr:dataType"))]
+                ))
+    if not parts:
+        return extract_generic_text(payload)
+    return ". ".join(p for p in parts if p)
+
+
+# collection -> extractor
+EXTRACTORS: Dict[str, Callable[[Dict[str, Any]], str]] = {
+    "policy": extract_policy_text,
+    "croissant": extract_croissant_text,
+}
+
+
+def extract_text(collection: str, payload: Dict[str, Any]) -> str:
+    return EXTRACTORS.get(collection, extract_generic_text)(payload)
+
+
+def chunk_text(text: str, max_words: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP, max_chunks: int = MAX_CHUNKS) -> List[str]:
+    """Split text into overlapping windows of at most `max_words` words"""
+    words = text.split()
+    if len(words) <= max_words:
+        return [text]
+    step = max(1, max_words - overlap)
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(" ".join(words[start:start + max_words]))
+        if start + max_words >= len(words) or len(chunks) >= max_chunks:
+            break
+    return chunks
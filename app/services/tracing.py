@@ -0,0 +1,101 @@
+"""
+Optional OpenTelemetry tracing.
+
+Enabled with TRACING_EXPORTER (default "none"):
+    console   spans printed to stderr
+    file      one JSON span per line appended to TRACING_FILE (default traces.jsonl)
+    otlp      OTLP/HTTP to OTEL_EXPORTER_OTLP_ENDPOINT (needs opentelemetry-exporter-otlp-proto-http)
+
+Without opentelemetry-sdk, or with TRACING_EXPORTER=none, `span()` is a no-op.
+The current trace context is passed to OYDID subprocesses as TRACEPARENT / TRACESTATE
+environment variables (see `trace_env`).
+"""
+import os
+from contextlib import contextmanager
+from typing import Any, Dict, Mapping, Optional
+
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "odrl-api")
+
+try:
+    from opentelemetry import trace, propagate
+    OTEL_AVAILABLE = True
+except ImportError:  # pragma: no cover - depends on the environment
+    OTEL_AVAILABLE = False
+
+_tracer = None
+
+
+def _exporter(kind: str):
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+    if kind == "console":
+        return ConsoleSpanExporter()
+    if kind == "file":
+        out = open(TRACING_FILE, "a")
+        return ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + "\n")
+    if kind == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    raise ValueError(f"Unknown TRACING_EXPORTER: {kind!r} (expected none, console, file or otlp)")
+
+
+def configure_tracing(exporter: str = TRACING_EXPORTER):
+    """Install the tracer provider (idempotent); returns whether tracing is active"""
+    global _tracer
+    if _tracer is not None:
+        return True
+    if exporter == "none" or not OTEL_AVAILABLE:
+        return False
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(_exporter(exporter)))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer("odrl")
+    return True
+
+
+def _clean(attributes: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v if isinstance(v, (str, bool, int, float)) else str(v) for k, v in attributes.items() if v is not None}
+
+
+@contextmanager
+def span(name: str, **attributes: Any):
+    """Child span of the current context; yields the span (or None when tracing is off)"""
+    if _tracer is None:
+        yield None
+        return
+    with _tracer.start_as_current_span(name, attributes=_clean(attributes)) as current:
+        yield current
+
+
+@contextmanager
+def server_span(name: str, headers: Mapping[str, str], **attributes: Any):
+    """Root span of an incoming request, continuing a `traceparent` header if present"""
+    if _tracer is None:
+        yield None
+        return
+    context = propagate.extract(dict(headers))
+    with _tracer.start_as_current_span(name, context=context, kind=trace.SpanKind.SERVER, attributes=_clean(attributes)) as current:
+        yield current
+
+
+def trace_env(env: Optional[Dict[str, str]] = None) -> Optional[Dict[str, str]]:
+    """
+    Environment for a subprocess carrying the current trace context as TRACEPARENT/TRACESTATE.
+    Returns None (inherit the parent environment) when tracing is off.
+    """
+    if _tracer is None:
+        return env
+    carrier: Dict[str, str] = {}
+    propagate.inject(carrier)
+    if not carrier:
+        return env
+    env = dict(os.environ if env is None else env)
+    env["TRACEPARENT"] = carrier.get("traceparent", "")
+    if carrier.get("tracestate"):
+        env["TRACESTATE"] = carrier["tracestate"]
+    return env
@@ -0,0 +1,159 @@
+"""
+Stand-ins for the external dependencies of the API, used by the load harness:
+
+- FakeOydid: an oydid executor (see app.services.oydid.set_oydid_executor) that answers
+  create / read / update / revoke / vc / encrypt from a directory of JSON files after a
+  configurable latency, emulating Ruby startup + OYDID work without the CLI.
+- HashEmbeddingProvider: a deterministic hashing embedder, so runs don't download or
+  execute an ONNX model unless the real backend is requested.
+"""
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import subprocess
+import threading
+import time
+from typing import List, Optional
+
+from app.services.embeddings import EmbeddingProvider
+
+FAKE_OYDID_VERSION = "oydid 0.5.6 (fake)"
+
+
+class FakeOydid:
+    def __init__(self, store_dir: str, latency_ms: float = 100.0, jitter_ms: float = 25.0, seed: Optional[int] = None):
+        self.store_dir = store_dir
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._counter = 0
+        os.makedirs(store_dir, exist_ok=True)
+
+    def _sleep(self):
+        with self._lock:
+            delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _path(self, did: str) -> str:
+        return os.path.join(self.store_dir, hashlib.sha256(did.encode()).hexdigest() + ".json")
+
+    def _load(self, did: str) -> Optional[dict]:
+        try:
+            with open(self._path(did)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, did: str, record: dict):
+        path = self._path(did)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(record, f)
+        os.replace(tmp, path)
+
+    def _new_did(self, input_str: str) -> str:
+        with self._lock:
+            self._counter += 1
+            counter = self._counter
+        digest = hashlib.sha256(f"{os.getpid()}:{counter}:{time.time_ns()}:{input_str}".encode()).hexdigest()
+        return f"did:oyd:zQm{digest[:44]}"
+
+    def __call__(self, cmd, input_str, env=None) -> subprocess.CompletedProcess:
+        args = list(cmd[1:])
+        if "--location" in args:
+            i = args.index("--location")
+            del args[i:i + 2]
+        self._sleep()
+        try:
+            stdout = self._dispatch(args, input_str or "")
+        except LookupError as e:
+            return subprocess.CompletedProcess(cmd, 1, "", str(e))
+        return subprocess.CompletedProcess(cmd, 0, stdout, "")
+
+    def _dispatch(self, args: List[str], input_str: str) -> str:
+        command = args[0] if args else ""
+        if command == "--version":
+            return FAKE_OYDID_VERSION + "\n"
+        if command == "create":
+            payload = json.loads(input_str) if input_str else {}
+            did = self._new_did(input_str)
+            self._save(did, {"doc": payload, "log": [{"op": 0, "doc": payload}], "revoked": False})
+            return json.dumps({"did": did})
+        if command == "read":
+            did = args[1]
+            record = self._load(did)
+            if record is None or record.get("revoked"):
+                raise LookupError(f"DID not found: {did}")
+            if "--w3c-did" in args:
+                return json.dumps(self._w3c(did))
+            return json.dumps({"did": did, "doc": record["doc"], "log": record["log"]})
+        if command == "update":
+            did = args[1]
+            record = self._load(did)
+            if record is None:
+                raise LookupError(f"DID not found: {did}")
+            payload = json.loads(input_str) if input_str else {}
+            record["doc"] = payload
+            record["log"].append({"op": 1, "doc": payload})
+            self._save(did, record)
+            return json.dumps({"did": did})
+        if command == "revoke":
+            did = args[1]
+            record = self._load(did)
+            if record is None:
+                raise LookupError(f"DID not found: {did}")
+            record["revoked"] = True
+            self._save(did, record)
+            return json.dumps({"did": did, "revoked": True})
+        if command == "vc":
+            vc = json.loads(input_str) if input_str else {}
+            issuer = args[args.index("--issuer") + 1] if "--issuer" in args else None
+            digest = hashlib.sha256(input_str.encode()).hexdigest()
+            return json.dumps({**vc, "issuer": issuer, "proof": {"type": "Ed25519Signature2020", "proofValue": "z" + digest}})
+        if command == "encrypt":
+            return json.dumps({"jwe": hashlib.sha256(input_str.encode()).hexdigest()})
+        raise LookupError(f"Unsupported fake oydid command: {' '.join(args)}")
+
+    @staticmethod
+    def _w3c(did: str) -> dict:
+        key = "z6Mk" + hashlib.sha256(did.encode()).hexdigest()[:44]
+        return {
+            "@context": ["https://www.w3.org/ns/did/v1"],
+            "id": did,
+            "verificationMethod": [{"id": f"{did}#key-doc", "type": "Ed25519VerificationKey2020", "controller": did, "publicKeyMultibase": key}],
+            "authentication": [f"{did}#key-doc"],
+            "service": [{"id": f"{did}#payload", "type": "Custom", "serviceEndpoint": "https://oydid.ownyourdata.eu"}]
+        }
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class HashEmbeddingProvider(EmbeddingProvider):
+    """Signed feature hashing of word unigrams and bigrams into `dimension` buckets, L2-normalized"""
+
+    def __init__(self, model_name: Optional[str] = None, threads: Optional[int] = None, dimension: int = 384):
+        self.model_name = model_name or f"hash-{dimension}"
+        self._dimension = dimension
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for text in texts:
+            tokens = _TOKEN_RE.findall(text.lower())
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            vector = [0.0] * self._dimension
+            for feature in features or ["<empty>"]:
+                h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+                vector[h % self._dimension] += 1.0 if (h >> 63) & 1 else -1.0
+            norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+            vectors.append([v / norm for v in vector])
+        return vectors
@@ -0,0 +1,90 @@
+"""
+Local HTTP server with deterministic fixtures for the bookmark and croissant workloads:
+
+    /page/<n>          HTML page with a <title>
+    /onto/<n>.ttl      SKOS concept scheme with `concepts` bilingual (en/fr) concepts
+    /croissant/<n>     Croissant JSON-LD with a record set
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ["soil", "climate", "river", "forest", "harvest", "station", "sensor", "basin", "yield", "drought",
+         "rainfall", "nitrogen", "canopy", "aquifer", "erosion", "pasture", "wetland", "glacier", "coast", "grain"]
+
+
+def words(n: int, count: int) -> str:
+    return " ".join(WORDS[(n * 7 + i * 3) % len(WORDS)] for i in range(count))
+
+
+def html_page(n: int) -> str:
+    return f"<html><head><title>Fixture page {n}: {words(n, 4)}</title></head><body><p>{words(n, 60)}</p></body></html>"
+
+
+def turtle_scheme(n: int, concepts: int) -> str:
+    lines = [
+        "@prefix skos: <http://www.w3.org/2004/02/skos/core#> .",
+        "@prefix dcterms: <http://purl.org/dc/terms/> .",
+        f"<http://fixture.local/onto/{n}> a skos:ConceptScheme ;",
+        f'    dcterms:title "Fixture scheme {n}"@en, "Schéma {n}"@fr .',
+    ]
+    for c in range(concepts):
+        lines.append(
+            f'<http://fixture.local/onto/{n}/c{c}> a skos:Concept ; skos:inScheme <http://fixture.local/onto/{n}> ; '
+            f'skos:prefLabel "{words(c, 2)} {c}"@en, "{words(c + 1, 2)} {c}"@fr ; '
+            f'skos:definition "{words(c, 12)}"@en .'
+        )
+    return "\n".join(lines) + "\n"
+
+
+def croissant(n: int) -> dict:
+    return {
+        "@context": {"@vocab": "https://schema.org/", "cr": "http://mlcommons.org/croissant/"},
+        "@type": "sc:Dataset",
+        "name": f"Fixture dataset {n}",
+        "description": words(n, 30),
+        "recordSet": [{
+            "name": "observations",
+            "field": [{"name": w, "dataType": "sc:Float"} for w in WORDS[:8]]
+        }]
+    }
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    concepts = 50
+
+    def do_GET(self):
+        parts = self.path.strip("/").split("/")
+        try:
+            n = int(parts[1].split(".")[0])
+        except (IndexError, ValueError):
+            self.send_error(404)
+            return
+        if parts[0] == "page":
+            self._send(html_page(n), "text/html; charset=utf-8")
+        elif parts[0] == "onto":
+            self._send(turtle_scheme(n, self.concepts), "text/turtle; charset=utf-8")
+        elif parts[0] == "croissant":
+            self._send(json.dumps(croissant(n)), "application/ld+json")
+        else:
+            self.send_error(404)
+
+    def _send(self, body: str, content_type: str):
+        data = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture_server(concepts: int = 50) -> ThreadingHTTPServer:
+    """Start on a free localhost port in a daemon thread; base URL is http://127.0.0.1:<server.server_port>"""
+    handler = type("Handler", (FixtureHandler,), {"concepts": concepts})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fixture-server", daemon=True).start()
+    return server
@@ -0,0 +1,349 @@
+"""
+End-to-end load test of the API against local stand-ins: a fake OYDID executor with
+configurable latency, Qdrant in ":memory:" mode, a hashing embedder and a fixture HTTP server.
+
+    python -m benchmarks.loadtest.run --concurrency 1,8,32 --duration 20 --out results.json
+    python -m benchmarks.loadtest.run --mode uvicorn --workers 4 --baseline benchmarks/baselines/default.json
+
+A mixed workload (`--mix`, weights per operation) is driven at each concurrency level by
+that many client threads. The report has p50/p95/p99 latency and req/s overall and per
+operation. `--save-baseline` stores the report as a JSON baseline. `--baseline` compares
+against one and exits 1 when throughput drops or p95 grows by more than `--tolerance`.
+
+In "inprocess" mode the server runs in a thread of this process (sharing the GIL with the
+client threads); use "uvicorn" mode for throughput numbers closer to production.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import requests
+
+from .fixture_server import start_fixture_server, words
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DEFAULT_MIX = "create=2,read=5,search=4,share=3,bookmark=1,vc=1"
+SEED_DIDS = 50
+SEED_BOOKMARKS = 20
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - set(OPERATIONS)
+    if unknown:
+        raise SystemExit(f"Unknown operations in --mix: {', '.join(sorted(unknown))} (known: {', '.join(OPERATIONS)})")
+    return mix
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(samples: List[tuple], elapsed: float) -> dict:
+    """samples: (latency seconds, ok)"""
+    latencies = sorted(s[0] * 1000 for s in samples)
+    errors = sum(1 for s in samples if not s[1])
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "rps": round(len(samples) / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "mean": round(sum(latencies) / len(latencies), 2) if latencies else 0.0
+        }
+    }
+
+
+class Workload:
+    def __init__(self, api: str, fixtures: str, ssh_request: Optional[dict]):
+        self.api = api
+        self.fixtures = fixtures
+        self.ssh_request = ssh_request
+        self.dids: List[str] = []
+        self.bookmarks: List[str] = []
+        self._lock = threading.Lock()
+
+    def _remember(self, pool: List[str], did: Optional[str]):
+        if did:
+            with self._lock:
+                pool.append(did)
+
+    def create(self, session, rng) -> requests.Response:
+        n = rng.randrange(1_000_000)
+        payload = {"type": "Note", "title": f"Note {n}: {words(n, 4)}", "description": words(n, 40)}
+        response = session.post(f"{self.api}/did/create", json={"payload": payload})
+        if response.ok:
+            self._remember(self.dids, response.json().get("did"))
+        return response
+
+    def read(self, session, rng) -> requests.Response:
+        return session.get(f"{self.api}/did/{rng.choice(self.dids)}")
+
+    def search(self, session, rng) -> requests.Response:
+        mode = rng.choice(["vector", "keyword", "hybrid"])
+        return session.get(f"{self.api}/oac/search", params={"q": words(rng.randrange(1000), 3), "mode": mode})
+
+    def share(self, session, rng) -> requests.Response:
+        return session.get(f"{self.api}/did/share/{rng.choice(self.bookmarks)}", params={"language": rng.choice([None, "fr"])})
+
+    def bookmark(self, session, rng) -> requests.Response:
+        n = rng.randrange(1_000_000)
+        url = f"{self.fixtures}/onto/{n}.ttl" if rng.random() < 0.5 else f"{self.fixtures}/page/{n}"
+        response = session.get(f"{self.api}/did/create_from_url", params={"url": url})
+        if response.ok:
+            self._remember(self.bookmarks, response.json().get("did"))
+        return response
+
+    def vc(self, session, rng) -> requests.Response:
+        return session.post(f"{self.api}/vc/ssh", json=self.ssh_request)
+
+    def seed(self):
+        session = requests.Session()
+        rng = random.Random(0)
+        for _ in range(SEED_DIDS):
+            self.create(session, rng).raise_for_status()
+        for i in range(SEED_BOOKMARKS):
+            url = f"{self.fixtures}/onto/{i}.ttl" if i % 2 else f"{self.fixtures}/page/{i}"
+            response = session.get(f"{self.api}/did/create_from_url", params={"url": url})
+            response.raise_for_status()
+            self._remember(self.bookmarks, response.json().get("did"))
+
+
+OPERATIONS = ["create", "read", "search", "share", "bookmark", "vc"]
+
+
+def make_ssh_request(subject_did: str, workdir: str) -> Optional[dict]:
+    """Sign the subject DID with a throwaway ed25519 key (needs ssh-keygen)"""
+    if not shutil.which("ssh-keygen"):
+        return None
+    key = os.path.join(workdir, "loadtest_key")
+    message = os.path.join(workdir, "loadtest_message")
+    subprocess.run(["ssh-keygen", "-q", "-t", "ed25519", "-N", "", "-f", key], check=True)
+    with open(message, "w") as f:
+        f.write(subject_did)
+    subprocess.run(["ssh-keygen", "-q", "-Y", "sign", "-f", key, "-n", "oydid", message], check=True, capture_output=True)
+    with open(key + ".pub") as f:
+        public_key = f.read().strip()
+    with open(message + ".sig") as f:
+        signature = f.read()
+    return {"public_key": public_key, "signature": signature, "subject_did": subject_did}
+
+
+def run_level(workload: Workload, mix: Dict[str, float], concurrency: int, duration: float, warmup: float) -> dict:
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    start = time.perf_counter()
+    measure_from = start + warmup
+    deadline = measure_from + duration
+    results: List[List[tuple]] = [[] for _ in range(concurrency)]
+
+    def client(index: int):
+        rng = random.Random(index)
+        session = requests.Session()
+        while True:
+            op = rng.choices(names, weights)[0]
+            t0 = time.perf_counter()
+            if t0 >= deadline:
+                return
+            try:
+                ok = getattr(workload, op)(session, rng).ok
+            except requests.RequestException:
+                ok = False
+            t1 = time.perf_counter()
+            if t0 >= measure_from:
+                results[index].append((op, t1 - t0, ok))
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - measure_from
+
+    samples = [s for per_thread in results for s in per_thread]
+    level = {"concurrency": concurrency, "duration_s": round(elapsed, 2), **summarize([(s[1], s[2]) for s in samples], elapsed)}
+    level["ops"] = {
+        op: summarize([(s[1], s[2]) for s in samples if s[0] == op], elapsed)
+        for op in names if any(s[0] == op for s in samples)
+    }
+    return level
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_healthy(api: str, timeout: float = 120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{api}/health", timeout=2).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    raise SystemExit(f"API at {api} did not become healthy")
+
+
+def start_server(args, workdir: str, env: Dict[str, str]):
+    """Start the API; returns (base API URL, stop callable)"""
+    port = free_port()
+    if args.mode == "uvicorn":
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "benchmarks.loadtest.server:app", "--host", "127.0.0.1", "--port", str(port),
+             "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+            cwd=workdir,
+            env={**os.environ, **env, "PYTHONPATH": os.pathsep.join(filter(None, [REPO_ROOT, os.getenv("PYTHONPATH")]))}
+        )
+        return f"http://127.0.0.1:{port}/api", lambda: (process.terminate(), process.wait(timeout=30))
+
+    import uvicorn
+    os.environ.update(env)
+    os.chdir(workdir)
+    from .server import app
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False))
+    thread = threading.Thread(target=server.run, name="uvicorn", daemon=True)
+    thread.start()
+
+    def stop():
+        server.should_exit = True
+        thread.join(timeout=30)
+    return f"http://127.0.0.1:{port}/api", stop
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Regressions of `report` against `baseline`, per concurrency level"""
+    regressions = []
+    base_levels = {level["concurrency"]: level for level in baseline.get("levels", [])}
+    for level in report["levels"]:
+        base = base_levels.get(level["concurrency"])
+        if not base:
+            continue
+        c = level["concurrency"]
+        if level["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"c={c}: throughput {level['rps']} req/s < baseline {base['rps']} req/s")
+        if level["latency_ms"]["p95"] > base["latency_ms"]["p95"] * (1 + tolerance):
+            regressions.append(f"c={c}: p95 {level['latency_ms']['p95']} ms > baseline {base['latency_ms']['p95']} ms")
+        if level["errors"] > base["errors"] and level["errors"] > level["requests"] * 0.01:
+            regressions.append(f"c={c}: {level['errors']} errors (baseline {base['errors']})")
+    return regressions
+
+
+def print_level(level: dict):
+    lat = level["latency_ms"]
+    print(f"c={level['concurrency']:<4} {level['rps']:>9.1f} req/s  p50 {lat['p50']:>8.1f}  p95 {lat['p95']:>8.1f}  "
+          f"p99 {lat['p99']:>8.1f} ms  errors {level['errors']}/{level['requests']}")
+    for op, stats in level["ops"].items():
+        lat = stats["latency_ms"]
+        print(f"    {op:<9} {stats['rps']:>8.1f} req/s  p50 {lat['p50']:>8.1f}  p95 {lat['p95']:>8.1f}  "
+              f"p99 {lat['p99']:>8.1f} ms  errors {stats['errors']}/{stats['requests']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes (uvicorn mode)")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated client thread counts")
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds per level")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds before each level")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Operation weights, e.g. create=2,read=5,search=4")
+    parser.add_argument("--oydid-latency-ms", type=float, default=100.0)
+    parser.add_argument("--oydid-jitter-ms", type=float, default=25.0)
+    parser.add_argument("--embedding", choices=["hash", "fastembed"], default="hash")
+    parser.add_argument("--rdf-concepts", type=int, default=50, help="Concepts per fixture Turtle file")
+    parser.add_argument("--api", help="Benchmark an already running API (base URL ending in /api) instead")
+    parser.add_argument("--out", help="Write the report as JSON")
+    parser.add_argument("--save-baseline", help="Write the report as a baseline JSON file")
+    parser.add_argument("--baseline", help="Compare against a baseline JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (default 0.2)")
+    args = parser.parse_args(argv)
+
+    mix = parse_mix(args.mix)
+    workdir = tempfile.mkdtemp(prefix="odrl-loadtest-")
+    fixtures = start_fixture_server(args.rdf_concepts)
+    env = {
+        "LOADTEST_STORE": os.path.join(workdir, "oydid"),
+        "LOADTEST_OYDID_LATENCY_MS": str(args.oydid_latency_ms),
+        "LOADTEST_OYDID_JITTER_MS": str(args.oydid_jitter_ms),
+        "LOADTEST_EMBEDDING": args.embedding,
+    }
+    stop = None
+    if args.api:
+        api = args.api.rstrip("/")
+    else:
+        api, stop = start_server(args, workdir, env)
+    try:
+        wait_healthy(api)
+        workload = Workload(api, f"http://127.0.0.1:{fixtures.server_port}", None)
+        workload.seed()
+        if "vc" in mix:
+            workload.ssh_request = make_ssh_request(workload.dids[0], workdir)
+            if workload.ssh_request is None:
+                print("ssh-keygen not found: dropping the vc operation from the mix", file=sys.stderr)
+                mix.pop("vc")
+
+        levels = []
+        for concurrency in [int(c) for c in args.concurrency.split(",")]:
+            level = run_level(workload, mix, concurrency, args.duration, args.warmup)
+            print_level(level)
+            levels.append(level)
+    finally:
+        if stop:
+            stop()
+        fixtures.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "mode": "external" if args.api else args.mode,
+            "workers": args.workers,
+            "mix": mix,
+            "oydid_latency_ms": args.oydid_latency_ms,
+            "oydid_jitter_ms": args.oydid_jitter_ms,
+            "embedding": args.embedding,
+            "duration_s": args.duration,
+            "python": platform.python_version(),
+            "cpus": os.cpu_count()
+        },
+        "levels": levels
+    }
+    for path in filter(None, [args.out, args.save_baseline]):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
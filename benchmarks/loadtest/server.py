@@ -0,0 +1,32 @@
+"""
+ASGI entry point of the API wired to the load-test stand-ins:
+
+    uvicorn benchmarks.loadtest.server:app
+
+Configured through the environment (set by benchmarks.loadtest.run):
+    LOADTEST_STORE              directory of the fake OYDID store (shared by all workers)
+    LOADTEST_OYDID_LATENCY_MS   mean latency of a fake oydid call (default 100)
+    LOADTEST_OYDID_JITTER_MS    +/- uniform jitter (default 25)
+    LOADTEST_EMBEDDING          "hash" (default) or "fastembed"
+    QDRANT_LOCATION             defaults to ":memory:"
+"""
+import os
+import tempfile
+
+os.environ.setdefault("QDRANT_LOCATION", ":memory:")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+if os.getenv("LOADTEST_EMBEDDING", "hash") == "hash":
+    os.environ["EMBEDDING_PROVIDER"] = "hash"
+
+from app.services.embeddings import register_provider
+from app.services.oydid import set_oydid_executor
+from .fakes import FakeOydid, HashEmbeddingProvider
+
+register_provider("hash", HashEmbeddingProvider)
+set_oydid_executor(FakeOydid(
+    os.getenv("LOADTEST_STORE") or tempfile.mkdtemp(prefix="fake-oydid-"),
+    latency_ms=float(os.getenv("LOADTEST_OYDID_LATENCY_MS", 100)),
+    jitter_ms=float(os.getenv("LOADTEST_OYDID_JITTER_MS", 25))
+))
+
+from app.main import app  # noqa: E402  (must be imported after the stand-ins are installed)
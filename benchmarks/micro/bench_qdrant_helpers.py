@@ -0,0 +1,55 @@
+"""
+Per-document helpers of QdrantService run on every index and search: collection
+routing, text extraction for embedding and DID -> point id hashing.
+"""
+import pytest
+
+from app.services.qdrant_service import qdrant_service
+from .synthetic import SIZES, did_list, nested_policy, payload_mix
+
+
+@pytest.fixture
+def payloads(size):
+    _, _, depth, count = SIZES[size]
+    return payload_mix(count, depth)
+
+
+@pytest.fixture
+def policy(size):
+    return nested_policy(SIZES[size][2])
+
+
+def determine_all(payloads):
+    return [qdrant_service._determine_collection(p) for p in payloads]
+
+
+def extract_all(payloads):
+    return [qdrant_service._extract_text_content(p) for p in payloads]
+
+
+def ids_for(dids):
+    return [qdrant_service._did_to_id(d) for d in dids]
+
+
+def test_determine_collection(measure, payloads):
+    collections = measure(determine_all, payloads)
+    assert set(collections) == {"variables", "prompts", "policy", "croissant", "groups", "bookmarks", "dids"}
+
+
+def test_determine_collection_nested_policy(measure, policy):
+    assert measure(qdrant_service._determine_collection, policy) == "policy"
+
+
+def test_extract_text_content(measure, payloads):
+    texts = measure(extract_all, payloads)
+    assert all(texts)
+
+
+def test_extract_text_content_nested_policy(measure, policy):
+    assert "permits" in measure(qdrant_service._extract_text_content, policy)
+
+
+def test_did_to_id(measure, size):
+    dids = did_list(SIZES[size][3])
+    ids = measure(ids_for, dids)
+    assert len(set(ids)) == len(dids)
@@ -0,0 +1,33 @@
+"""
+Bookmark RDF paths: Turtle parsing into concept metadata (create_from_url) and the
+per-language title pairing of /did/share.
+"""
+import pytest
+
+from app.routers.dids import pair_concepts, parse_rdf_metadata
+from .synthetic import SIZES, rdf_concepts, turtle_document
+
+
+@pytest.fixture
+def turtle(size):
+    return turtle_document(SIZES[size][0])
+
+
+@pytest.fixture
+def concepts(size):
+    return rdf_concepts(SIZES[size][1])
+
+
+def test_parse_rdf_metadata(measure, turtle, size):
+    # rdflib parsing dominates; a handful of rounds is enough above "small"
+    result = measure(parse_rdf_metadata, turtle, "turtle", "http://bench.local/onto", rounds=None if size == "small" else 3)
+    assert result["_main_title_hint"] == "Benchmark scheme"
+
+
+def test_pair_concepts(measure, concepts):
+    pairs = measure(pair_concepts, concepts, "fr")
+    assert len(pairs) == len(concepts) - (len(concepts) + 2) // 3
+
+
+def test_pair_concepts_missing_language(measure, concepts):
+    assert measure(pair_concepts, concepts, "es") == []
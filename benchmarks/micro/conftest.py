@@ -0,0 +1,55 @@
+"""
+Fixtures for the microbenchmarks.
+
+The app modules are imported against the same local stand-ins as the load harness
+(in-memory Qdrant, hashing embedder), so no server or model download is needed.
+`MICROBENCH_SIZES` selects the input sizes (default "small,medium,large"; add "huge"
+for 100k-triple Turtle and 50k-concept payloads).
+"""
+import os
+import sys
+import tracemalloc
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+os.environ.setdefault("QDRANT_LOCATION", ":memory:")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("EMBEDDING_PROVIDER", "hash")
+
+from app.services.embeddings import register_provider  # noqa: E402
+from benchmarks.loadtest.fakes import HashEmbeddingProvider  # noqa: E402
+
+register_provider("hash", HashEmbeddingProvider)
+
+from .synthetic import SIZES  # noqa: E402
+
+SELECTED_SIZES = [s.strip() for s in os.getenv("MICROBENCH_SIZES", "small,medium,large").split(",") if s.strip()]
+unknown = set(SELECTED_SIZES) - set(SIZES)
+if unknown:
+    raise pytest.UsageError(f"Unknown MICROBENCH_SIZES: {', '.join(sorted(unknown))} (known: {', '.join(SIZES)})")
+
+
+@pytest.fixture(params=SELECTED_SIZES)
+def size(request):
+    return request.param
+
+
+@pytest.fixture
+def measure(benchmark):
+    """
+    Benchmark `fn(*args)` and record its peak traced allocation (KiB, from one extra
+    untimed call) in extra_info, so saved runs track memory alongside time.
+    """
+    def run(fn, *args, rounds=None):
+        tracemalloc.start()
+        try:
+            fn(*args)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info["peak_memory_kib"] = round(peak / 1024, 1)
+        if rounds:
+            return benchmark.pedantic(fn, args=args, rounds=rounds, iterations=1, warmup_rounds=0)
+        return benchmark(fn, *args)
+    return run
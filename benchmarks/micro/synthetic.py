@@ -0,0 +1,129 @@
+"""
+Deterministic synthetic inputs for the microbenchmarks, sized by the SIZES table.
+"""
+import json
+from typing import Any, Dict, List
+
+# size -> (Turtle triples, RDF payload concepts, policy nesting depth, payloads / DIDs per batch)
+SIZES = {
+    "small": (500, 100, 4, 100),
+    "medium": (10_000, 2_000, 16, 1_000),
+    "large": (50_000, 10_000, 64, 10_000),
+    "huge": (100_000, 50_000, 256, 50_000),
+}
+TRIPLES_PER_CONCEPT = 6
+LANGUAGES = ["en", "fr", "de", "nl"]
+
+WORDS = ["soil", "climate", "river", "forest", "harvest", "station", "sensor", "basin", "yield", "drought",
+         "rainfall", "nitrogen", "canopy", "aquifer", "erosion", "pasture", "wetland", "glacier", "coast", "grain"]
+
+
+def words(n: int, count: int) -> str:
+    return " ".join(WORDS[(n * 7 + i * 3) % len(WORDS)] for i in range(count))
+
+
+def turtle_document(triples: int) -> str:
+    """SKOS concept scheme with about `triples` triples: typed concepts with en/fr labels, a definition and a notation"""
+    base = "http://bench.local/onto"
+    lines = [
+        "@prefix skos: <http://www.w3.org/2004/02/skos/core#> .",
+        "@prefix dcterms: <http://purl.org/dc/terms/> .",
+        "@prefix owl: <http://www.w3.org/2002/07/owl#> .",
+        f"<{base}> a owl:Ontology, skos:ConceptScheme ;",
+        f'    dcterms:title "Benchmark scheme"@en, "Schéma de référence"@fr ;',
+        f'    dcterms:description "{words(0, 20)}"@en .',
+    ]
+    for c in range(max(1, triples // TRIPLES_PER_CONCEPT)):
+        lines.append(
+            f'<{base}/c{c}> a skos:Concept ; skos:inScheme <{base}> ; '
+            f'skos:prefLabel "{words(c, 2)} {c}"@en, "{words(c + 1, 2)} {c}"@fr ; '
+            f'skos:definition "{words(c, 12)}"@en ; skos:notation "C{c:06d}" .'
+        )
+    return "\n".join(lines) + "\n"
+
+
+def rdf_concepts(concepts: int) -> List[Dict[str, Any]]:
+    """`concepts` entries shaped like parse_rdf_metadata output; every third concept lacks a French title"""
+    out = []
+    for c in range(concepts):
+        titles = {lang: [f"{words(c + i, 2)} {c}"] for i, lang in enumerate(LANGUAGES) if not (lang == "fr" and c % 3 == 0)}
+        out.append({
+            "uri": f"http://bench.local/onto/c{c}",
+            "titles": titles,
+            "descriptions": {"en": [words(c, 12)]},
+            "properties": {"default": {"notation": [f"C{c:06d}"]}}
+        })
+    return out
+
+
+def bookmark_payload(concepts: int) -> Dict[str, Any]:
+    return {
+        "url": "http://bench.local/onto",
+        "title": "Benchmark scheme",
+        "timestamp": "2024-01-01T00:00:00",
+        "is_rdf": True,
+        "rdf": {"titles": {}, "descriptions": {}, "properties": {}, "concepts": rdf_concepts(concepts)}
+    }
+
+
+def nested_constraint(depth: int, n: int = 0) -> Dict[str, Any]:
+    """ODRL logical constraint nested `depth` levels through odrl:and / odrl:or"""
+    leaf = {
+        "title": f"Purpose is {words(n, 3)}",
+        "leftOperand": "oac:Purpose",
+        "operator": "odrl:isA",
+        "rightOperand": f"dpv:{words(n, 2).title().replace(' ', '')}"
+    }
+    node = leaf
+    for level in range(depth):
+        node = {"odrl:and" if level % 2 else "odrl:or": [node, {**leaf, "rightOperand": f"dpv:Level{level}"}]}
+    return node
+
+
+def nested_policy(depth: int, rules: int = 8) -> Dict[str, Any]:
+    """OAC offer whose permissions carry `depth`-deep logical constraints and nested asset collections"""
+    permissions = []
+    for r in range(rules):
+        target: Any = f"oac:Asset{r}"
+        for level in range(depth // 4):
+            target = {"type": "AssetCollection", "source": target, "refinement": [nested_constraint(1, level)]}
+        permissions.append({
+            "assigner": f"ex:user{r}",
+            "target": target,
+            "action": "oac:Read",
+            "constraint": [nested_constraint(depth, r)],
+            "hasContext": "dpv:Required" if r % 2 else "dpv:Optional"
+        })
+    return {
+        "@context": "https://w3id.org/oac/context.json",
+        "type": "Offer",
+        "odrl:uid": "ex:offer-bench",
+        "odrl:profile": "oac:",
+        "dcterms:description": words(1, 30),
+        "dcterms:creator": "ex:userA",
+        "odrl:permission": permissions
+    }
+
+
+def payload_mix(count: int, depth: int) -> List[Dict[str, Any]]:
+    """Payloads of every collection in equal shares, for _determine_collection / _extract_text_content"""
+    policy = nested_policy(depth)
+    templates = [
+        {"type": "Variable", "name": "temperature", "description": words(2, 10)},
+        {"type": "Prompt", "name": "summarize", "text": words(3, 40)},
+        policy,
+        {"@context": {"@vocab": "https://schema.org/"}, "name": "Dataset", "description": words(4, 30),
+         "recordSet": [{"name": "obs", "field": [{"name": w, "dataType": "sc:Float"} for w in WORDS[:8]]}]},
+        {"type": "Organization", "name": "Bench Org", "description": words(5, 10)},
+        {"type": "WebPage", "url": "http://bench.local/page", "title": words(6, 5)},
+        {"type": "Note", "title": words(7, 4), "description": words(7, 40), "tags": {"nested": {"deeper": [words(8, 3)] * 5}}},
+    ]
+    return [templates[i % len(templates)] for i in range(count)]
+
+
+def did_list(count: int) -> List[str]:
+    return [f"did:oyd:zQm{(i * 2654435761) % (1 << 64):020d}{i:024d}" for i in range(count)]
+
+
+def payload_bytes(payload: Any) -> int:
+    return len(json.dumps(payload))
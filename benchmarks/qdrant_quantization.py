@@ -0,0 +1,129 @@
+"""
+Recall vs. latency vs. memory benchmark for the collection storage settings
+in app/services/collection_config.py (float32, on-disk, scalar and binary quantization).
+
+Runs against the Qdrant at QDRANT_HOST:QDRANT_PORT with synthetic clustered,
+normalized vectors and writes one JSON result per variant:
+
+    python benchmarks/qdrant_quantization.py --points 200000 --dim 384 --out quantization.json
+
+Recall@k is measured against exact (brute force) search on the same collection.
+RAM is an estimate from the storage layout, since Qdrant does not report it per collection.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.services.collection_config import CollectionSettings
+
+VARIANTS = {
+    "float32-ram": {},
+    "float32-disk": {"on_disk": True, "hnsw": {"on_disk": True}},
+    "scalar-ram": {"quantization": {"type": "scalar", "always_ram": True}, "search": {"oversampling": 2.0}},
+    "scalar-disk": {"on_disk": True, "hnsw": {"on_disk": True}, "quantization": {"type": "scalar", "always_ram": True}, "search": {"oversampling": 2.0}},
+    "binary-disk": {"on_disk": True, "hnsw": {"on_disk": True}, "quantization": {"type": "binary", "always_ram": True}, "search": {"oversampling": 3.0}},
+}
+
+
+def synthetic_vectors(n, dim, clusters=64, seed=42):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(0, clusters, size=n)] + 0.35 * rng.normal(size=(n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def estimated_ram_bytes(settings: CollectionSettings, n, dim, m=16):
+    ram = 0
+    if not settings.on_disk:
+        ram += n * dim * 4
+    q = settings.quantization
+    if q is not None and q.always_ram:
+        ram += n * dim if q.type == "scalar" else n * dim // 8
+    if not settings.hnsw.on_disk:
+        ram += n * (settings.hnsw.m or m) * 2 * 8
+    return ram
+
+
+def wait_for_green(client, name, timeout=600):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if client.get_collection(name).status == models.CollectionStatus.GREEN:
+            return
+        time.sleep(1)
+    raise TimeoutError(f"{name} did not finish indexing")
+
+
+def run_variant(client, name, raw, vectors, queries, k, batch):
+    settings = CollectionSettings(**raw)
+    coll = f"bench_{name}"
+    if client.collection_exists(coll):
+        client.delete_collection(coll)
+    client.create_collection(
+        collection_name=coll,
+        vectors_config=settings.vector_params(vectors.shape[1]),
+        hnsw_config=settings.hnsw_config(),
+        quantization_config=settings.quantization_config()
+    )
+    start = time.perf_counter()
+    for i in range(0, len(vectors), batch):
+        client.upsert(coll, points=models.Batch(ids=list(range(i, min(i + batch, len(vectors)))), vectors=vectors[i:i + batch].tolist()), wait=False)
+    wait_for_green(client, coll)
+    build_seconds = time.perf_counter() - start
+
+    latencies, recalls = [], []
+    for q in queries:
+        exact = client.query_points(coll, query=q.tolist(), limit=k, search_params=models.SearchParams(exact=True)).points
+        t0 = time.perf_counter()
+        approx = client.query_points(coll, query=q.tolist(), limit=k, search_params=settings.search_params()).points
+        latencies.append((time.perf_counter() - t0) * 1000)
+        truth = {p.id for p in exact}
+        recalls.append(len(truth & {p.id for p in approx}) / max(1, len(truth)))
+
+    client.delete_collection(coll)
+    return {
+        "variant": name,
+        "settings": raw,
+        "points": len(vectors),
+        "dim": vectors.shape[1],
+        f"recall@{k}": round(float(np.mean(recalls)), 4),
+        "latency_ms_p50": round(float(np.percentile(latencies, 50)), 3),
+        "latency_ms_p95": round(float(np.percentile(latencies, 95)), 3),
+        "build_seconds": round(build_seconds, 1),
+        "estimated_ram_mb": round(estimated_ram_bytes(settings, len(vectors), vectors.shape[1]) / 2 ** 20, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--variants", nargs="*", default=list(VARIANTS))
+    parser.add_argument("--out", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    client = QdrantClient(host=os.getenv("QDRANT_HOST", "localhost"), port=int(os.getenv("QDRANT_PORT", 6333)), timeout=120)
+    vectors = synthetic_vectors(args.points, args.dim)
+    queries = synthetic_vectors(args.queries, args.dim, seed=7)
+
+    results = []
+    for name in args.variants:
+        result = run_variant(client, name, VARIANTS[name], vectors, queries, args.k, args.batch)
+        print(json.dumps(result))
+        results.append(result)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
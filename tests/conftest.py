@@ -0,0 +1,115 @@
+"""
+Shared fixtures for the in-process tests: an in-memory stand-in for the oydid CLI and a
+Qdrant running in embedded ":memory:" mode with a deterministic embedder, so the routers
+and services can be exercised without Ruby, a Qdrant server or an ONNX model.
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import subprocess
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# Before app.services.embeddings / qdrant_service are imported by a test module
+os.environ.setdefault("QDRANT_LOCATION", ":memory:")
+os.environ.setdefault("EMBEDDING_PROVIDER", "test-hash")
+
+from app.services.embeddings import EmbeddingProvider, register_provider  # noqa: E402
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class HashEmbeddingProvider(EmbeddingProvider):
+    """Feature hashing of lower-cased words, L2-normalized; texts sharing words are close"""
+
+    def __init__(self, model_name=None, threads=None, dimension: int = 64):
+        self.model_name = model_name or f"test-hash-{dimension}"
+        self._dimension = dimension
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    def embed(self, texts):
+        vectors = []
+        for text in texts:
+            vector = [0.0] * self._dimension
+            for token in _TOKEN_RE.findall(text.lower()) or ["<empty>"]:
+                h = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+                vector[h % self._dimension] += 1.0
+            norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+            vectors.append([v / norm for v in vector])
+        return vectors
+
+
+register_provider("test-hash", HashEmbeddingProvider)
+
+
+class FakeOydid:
+    """oydid executor (see set_oydid_executor) keeping DIDs in a dict; records every command"""
+
+    def __init__(self):
+        self.records = {}
+        self.commands = []
+        self._lock = threading.Lock()
+        self._counter = 0
+
+    def count(self, subcommand: str) -> int:
+        return sum(1 for args in self.commands if args and args[0] == subcommand)
+
+    def __call__(self, cmd, input_str, env=None):
+        args = list(cmd[1:])
+        if "--location" in args:
+            i = args.index("--location")
+            del args[i:i + 2]
+        with self._lock:
+            self.commands.append(args)
+            try:
+                stdout = self._dispatch(args, input_str or "")
+            except LookupError as e:
+                return subprocess.CompletedProcess(cmd, 1, "", str(e))
+        return subprocess.CompletedProcess(cmd, 0, stdout, "")
+
+    def _dispatch(self, args, input_str):
+        command = args[0] if args else ""
+        payload = json.loads(input_str) if input_str else {}
+        if command == "create":
+            self._counter += 1
+            did = "did:oyd:zQm" + hashlib.sha256(f"{self._counter}:{input_str}".encode()).hexdigest()[:44]
+            self.records[did] = {"doc": payload, "log": [{"op": 0, "doc": payload}], "revoked": False}
+            return json.dumps({"did": did})
+        record = self.records.get(args[1]) if len(args) > 1 else None
+        if record is None or record["revoked"]:
+            raise LookupError(f"DID not found: {args[1] if len(args) > 1 else ''}")
+        did = args[1]
+        if command == "read":
+            if "--w3c-did" in args:
+                return json.dumps({"@context": ["https://www.w3.org/ns/did/v1"], "id": did})
+            return json.dumps({"did": did, "doc": record["doc"], "log": record["log"]})
+        if command == "update":
+            record["doc"] = payload
+            record["log"].append({"op": 1, "doc": payload})
+            return json.dumps({"did": did})
+        if command == "revoke":
+            record["revoked"] = True
+            return json.dumps({"did": did, "revoked": True})
+        raise LookupError(f"Unsupported fake oydid command: {' '.join(args)}")
+
+
+@pytest.fixture
+def fake_oydid():
+    from app.services.did_cache import did_cache
+    from app.services.oydid import set_oydid_executor
+
+    fake = FakeOydid()
+    previous = set_oydid_executor(fake)
+    did_cache.invalidate()
+    yield fake
+    set_oydid_executor(previous)
+    did_cache.invalidate()
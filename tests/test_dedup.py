@@ -0,0 +1,51 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.services.dedup import normalize_url, url_hash, dedup_enabled, duplicate_response
+
+
+def test_equivalent_urls_share_a_hash():
+    assert normalize_url("HTTPS://Example.org:443/data/#section") == "https://example.org/data"
+    assert url_hash("https://example.org/data/") == url_hash("https://EXAMPLE.org/data#top")
+    assert url_hash("https://example.org/data?v=1") != url_hash("https://example.org/data?v=2")
+    assert normalize_url("http://example.org:8080/x") == "http://example.org:8080/x"
+
+
+def test_override_and_response():
+    assert dedup_enabled(True) is True
+    assert dedup_enabled(False) is False
+    response = duplicate_response({"did": "did:oyd:abc", "json_ld": {}, "score": 0.99, "match": "similar", "collection": "bookmarks"})
+    assert response == {"did": "did:oyd:abc", "deduplicated": True, "match": "similar", "score": 0.99, "collection": "bookmarks"}
+
+
+@pytest.fixture
+def service():
+    from app.services.qdrant_service import QdrantService
+    service = QdrantService()
+    service.upsert_document("did:oyd:zQmPublic", {"type": "Bookmark", "url": "https://example.org/data", "title": "Open data"}, collection="bookmarks")
+    service.upsert_document("did:oyd:zQmPrivate", {"type": "Bookmark", "url": "https://example.org/private", "title": "Private data", "token": "secret-a"}, collection="bookmarks")
+    return service
+
+
+def test_same_url_without_token_is_a_duplicate(service):
+    duplicate = service.find_duplicate({"type": "Bookmark", "url": "https://EXAMPLE.org/data/", "title": "Renamed"}, "bookmarks")
+    assert duplicate == {"did": "did:oyd:zQmPublic", "score": duplicate["score"], "match": "url", "collection": "bookmarks"}
+
+
+def test_duplicates_require_the_same_token(service):
+    doc = {"type": "Bookmark", "url": "https://example.org/private", "title": "Private data"}
+    assert service.find_duplicate(doc, "bookmarks") is None
+    assert service.find_duplicate({**doc, "token": "secret-b"}, "bookmarks") is None
+    assert service.find_duplicate({**doc, "url": "https://example.org/data", "token": "secret-b"}, "bookmarks") is None
+    duplicate = service.find_duplicate({**doc, "token": "secret-a"}, "bookmarks")
+    assert duplicate["did"] == "did:oyd:zQmPrivate" and duplicate["match"] == "url"
+    assert "json_ld" not in duplicate
+
+
+def test_points_indexed_without_token_hash_are_checked_by_token(service):
+    # As stored before `token_hash` was a payload field
+    service.client.delete_payload("bookmarks", keys=["token_hash"], points=[service._did_to_id("did:oyd:zQmPrivate")])
+    assert service.find_duplicate({"type": "Bookmark", "url": "https://example.org/private", "title": "Private data"}, "bookmarks") is None
@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.did_cache import TTLCache
+
+
+def test_entries_expire_after_ttl():
+    cache = TTLCache(max_size=10, ttl=0.05)
+    cache.set(("did:oyd:zQm1", "w3c"), {"id": "did:oyd:zQm1"})
+    assert cache.get(("did:oyd:zQm1", "w3c")) == {"id": "did:oyd:zQm1"}
+    time.sleep(0.1)
+    assert cache.get(("did:oyd:zQm1", "w3c")) is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_invalidate_drops_every_mode_of_a_did():
+    cache = TTLCache(max_size=10, ttl=60)
+    cache.set(("did:oyd:zQm1", "w3c"), {"w3c": True})
+    cache.set(("did:oyd:zQm1", "json"), {"json": True})
+    cache.set(("did:oyd:zQm2", "w3c"), {"other": True})
+    cache.invalidate("did:oyd:zQm1")
+    assert cache.get(("did:oyd:zQm1", "w3c")) is None
+    assert cache.get(("did:oyd:zQm1", "json")) is None
+    assert cache.get(("did:oyd:zQm2", "w3c")) == {"other": True}
+
+
+def test_disabled_cache_stores_nothing():
+    cache = TTLCache(max_size=10, ttl=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
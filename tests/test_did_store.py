@@ -0,0 +1,111 @@
+import json
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services import oydid
+from app.services.did_store import DidStore, log_head
+
+DID = "did:oyd:zQmStore1"
+DOC = json.dumps({"did": DID, "doc": {"title": "v1"}, "log": [{"op": 0}, {"op": 1}]})
+W3C = json.dumps({"id": DID, "verificationMethod": []})
+
+
+def make_store(tmp_path):
+    return DidStore(str(tmp_path / "dids.sqlite"))
+
+
+def test_reads_are_materialized_per_output_mode(tmp_path):
+    store = make_store(tmp_path)
+    assert store.get(DID, "--json-output") is None
+    store.put_read(DID, "--json-output", DOC)
+    store.put_read(DID, "--w3c-did", W3C)
+    assert store.get(DID, "--json-output") == DOC
+    assert store.get(DID, "--w3c-did") == W3C
+    assert store.stats() == {"dids": 1, "materialized": 1, "revoked": 0}
+
+
+def test_update_drops_documents_and_registers_new_did(tmp_path):
+    store = make_store(tmp_path)
+    store.put_read(DID, "--json-output", DOC)
+    store.record_update(DID, "did:oyd:zQmStore2")
+    assert store.get(DID, "--json-output") is None
+    assert store.stats()["dids"] == 2
+
+
+def test_revoked_dids_are_not_served(tmp_path):
+    store = make_store(tmp_path)
+    store.put_read(DID, "--w3c-did", W3C)
+    store.record_revoke(DID)
+    assert store.get(DID, "--w3c-did") is None
+    assert store.stats()["revoked"] == 1
+
+
+def test_read_started_before_an_update_does_not_overwrite_it(tmp_path):
+    store = make_store(tmp_path)
+    read_started = time.time()
+    store.record_update(DID, None)
+    store.put_read(DID, "--json-output", DOC, read_started)
+    assert store.get(DID, "--json-output") is None
+
+
+def test_log_head_fingerprints_the_last_entry():
+    head, length = log_head(DOC)
+    assert length == 2 and len(head) == 64
+    assert log_head("not json") == (None, None)
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch, fake_oydid):
+    store = make_store(tmp_path)
+    monkeypatch.setattr(oydid, "did_store", store)
+    return store
+
+
+def create(payload):
+    return json.loads(oydid.run_oydid_command(["create", "--json-output"], input_data=payload).stdout)["did"]
+
+
+@pytest.mark.parametrize("single_flight", [True, False])
+def test_cli_reads_fill_the_store(replica, monkeypatch, fake_oydid, single_flight):
+    monkeypatch.setattr(oydid, "SINGLE_FLIGHT", single_flight)
+    monkeypatch.setattr(oydid, "DID_STORE_WRITE_THROUGH", False)
+    did = create({"title": "v1"})
+    assert replica.get(did, "--json-output") is None
+
+    first = oydid.run_oydid_command(["read", did, "--json-output"])
+    assert replica.get(did, "--json-output") == first.stdout
+    assert oydid.run_oydid_command(["read", did, "--json-output"]).stdout == first.stdout
+    assert fake_oydid.count("read") == 1
+
+    oydid.run_oydid_command(["update", did], input_data={"title": "v2"})
+    assert replica.get(did, "--json-output") is None
+
+
+def test_writes_store_both_resolutions(replica, fake_oydid):
+    did = create({"title": "v1"})
+    reads = fake_oydid.count("read")
+    assert json.loads(oydid.run_oydid_command(["read", did, "--json-output"]).stdout)["doc"] == {"title": "v1"}
+    assert json.loads(oydid.run_oydid_command(["read", did, "--w3c-did"]).stdout)["id"] == did
+    assert fake_oydid.count("read") == reads
+    assert replica.stats()["materialized"] == 1
+
+    oydid.run_oydid_command(["update", did], input_data={"title": "v2"})
+    reads = fake_oydid.count("read")
+    assert json.loads(oydid.run_oydid_command(["read", did, "--json-output"]).stdout)["doc"] == {"title": "v2"}
+    assert fake_oydid.count("read") == reads
+
+    oydid.run_oydid_command(["revoke", did])
+    assert replica.get(did, "--json-output") is None
+
+
+def test_entries_past_the_max_age_are_read_again(tmp_path):
+    store = DidStore(str(tmp_path / "dids.sqlite"), max_age=60)
+    store.put_read(DID, "--json-output", DOC, time.time() - 120)
+    assert store.get(DID, "--json-output") is None
+    store.put_read(DID, "--json-output", DOC)
+    assert store.get(DID, "--json-output") == DOC
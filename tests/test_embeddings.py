@@ -0,0 +1,64 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.services.embeddings import EmbeddingProvider, MicroBatcher
+
+
+class LengthProvider(EmbeddingProvider):
+    """Fake backend: one-dimensional vector holding the text length"""
+    model_name = "length"
+
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    def embed(self, texts):
+        self.calls.append(len(texts))
+        if self.fail:
+            raise RuntimeError("inference failed")
+        time.sleep(0.01)
+        return [[float(len(t))] for t in texts]
+
+
+def test_concurrent_requests_are_coalesced_in_order():
+    provider = LengthProvider()
+    batcher = MicroBatcher(provider, max_batch=16, max_wait_ms=50)
+    results = {}
+
+    def worker(i):
+        results[i] = batcher.embed(["x" * i, "y"])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    batcher.close()
+
+    assert all(results[i] == [[float(i)], [1.0]] for i in range(20))
+    assert sum(provider.calls) == 40
+    assert len(provider.calls) < 20
+    assert max(provider.calls) <= 16
+
+
+def test_errors_propagate_to_callers():
+    batcher = MicroBatcher(LengthProvider(fail=True), max_wait_ms=1)
+    try:
+        batcher.embed(["a"])
+        assert False, "expected RuntimeError"
+    except RuntimeError as e:
+        assert "inference failed" in str(e)
+    finally:
+        batcher.close()
+
+
+def test_async_embed_and_dimension():
+    batcher = MicroBatcher(LengthProvider(), max_wait_ms=1)
+    assert asyncio.run(batcher.aembed(["abc", ""])) == [[3.0], [0.0]]
+    assert batcher.embed([]) == []
+    assert batcher.dimension == 1
+    batcher.close()
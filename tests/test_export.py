@@ -0,0 +1,68 @@
+import gzip
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import export
+from app.services.qdrant_service import qdrant_service
+
+DIDS = [f"did:oyd:zQmExport{i:03d}" for i in range(25)]
+
+
+@pytest.fixture(scope="module")
+def client():
+    for i, did in enumerate(DIDS):
+        qdrant_service.upsert_document(did, {"type": "Prompt", "name": f"prompt {i}", "text": "export test"})
+    app = FastAPI()
+    app.include_router(export.router, prefix="/api")
+    return TestClient(app)
+
+
+def exported(lines):
+    return [row for row in lines if row["did"] in DIDS]
+
+
+def parse(body: bytes):
+    return [json.loads(line) for line in body.decode().splitlines()]
+
+
+def test_plain_export_streams_every_point(client):
+    response = client.get("/api/export/prompts", params={"gzip": False, "batch_size": 4})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.headers["content-disposition"] == 'attachment; filename="prompts.ndjson"'
+    rows = exported(parse(response.content))
+    assert sorted(row["did"] for row in rows) == DIDS
+    assert all(row["collection"] == "prompts" and row["json_ld"]["type"] == "Prompt" for row in rows)
+
+
+def test_gzip_export_is_a_gz_file_not_a_content_encoding(client):
+    response = client.get("/api/export/prompts", headers={"Accept-Encoding": "gzip"}, params={"batch_size": 4})
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert response.headers["content-type"] == "application/gzip"
+    assert response.headers["content-disposition"] == 'attachment; filename="prompts.ndjson.gz"'
+    plain = client.get("/api/export/prompts", params={"gzip": False})
+    assert parse(gzip.decompress(response.content)) == parse(plain.content)
+
+
+def test_resume_after_a_point(client):
+    rows = parse(client.get("/api/export/prompts", params={"gzip": False}).content)
+    cut = len(rows) // 2
+    resumed = parse(client.get("/api/export/prompts", params={"gzip": False, "after": rows[cut - 1]["id"], "batch_size": 3}).content)
+    assert resumed == rows[cut:]
+
+
+def test_request_errors_come_before_the_stream(client):
+    assert client.get("/api/export/prompts", params={"after": "not-a-point-id"}).status_code == 400
+    assert client.get("/api/export/all", params={"after": "00000000-0000-0000-0000-000000000000"}).status_code == 400
+    assert client.get("/api/export/nope").status_code == 404
@@ -0,0 +1,192 @@
+import json
+import os
+import sys
+
+import pytest
+from fastapi import HTTPException
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.group_pages import GroupPager
+from app.services.oydid import run_oydid_command
+
+
+def create_group(members, **fields):
+    doc = {"type": "Organization", "name": "Team", **fields, "hasMember": [
+        {"type": "Membership", "member": member, "role": role} for member, role in members.items()
+    ]}
+    return json.loads(run_oydid_command(["create", "--json-output"], input_data=doc).stdout)["did"]
+
+
+def stored_doc(fake, did):
+    return fake.records[did]["doc"]
+
+
+def page_members(fake, group_did):
+    """member -> role over all pages, read back from the stored DIDs"""
+    members = {}
+    for page_did in stored_doc(fake, group_did)["memberPages"]:
+        page = stored_doc(fake, page_did)
+        assert page["type"] == "MembershipPage" and page["partOf"] == group_did
+        members.update({m["member"]: m["role"] for m in page["hasMember"]})
+    return members
+
+
+def test_first_diff_migrates_inline_members_to_pages(fake_oydid):
+    group = create_group({f"did:oyd:m{i}": "member" for i in range(5)})
+    summary = GroupPager(page_size=2).apply_diff(group, {"did:oyd:new": "admin"}, [])
+
+    doc = stored_doc(fake_oydid, group)
+    assert doc["hasMember"] == []
+    assert len(doc["memberPages"]) == 3
+    assert summary["pages_created"] == 3
+    assert summary["added"] == {"did:oyd:new": "admin"}
+    assert summary["group_doc"]["memberPages"] == doc["memberPages"]
+    assert page_members(fake_oydid, group) == {**{f"did:oyd:m{i}": "member" for i in range(5)}, "did:oyd:new": "admin"}
+
+
+def test_diff_rewrites_only_the_touched_pages(fake_oydid):
+    pager = GroupPager(page_size=2)
+    group = create_group({f"did:oyd:m{i}": "member" for i in range(6)})
+    pager.apply_diff(group, {"did:oyd:m6": "member"}, [])
+    updates_before = fake_oydid.count("update")
+
+    summary = pager.apply_diff(group, {"did:oyd:m0": "admin"}, ["did:oyd:m5", "did:oyd:unknown"])
+    assert summary["updated"] == {"did:oyd:m0": "admin"}
+    assert summary["removed"] == ["did:oyd:m5"]
+    assert summary["pages_written"] == 2
+    assert summary["group_doc"] is None
+    # Two pages, and no rewrite of the group document
+    assert fake_oydid.count("update") - updates_before == 2
+    members = page_members(fake_oydid, group)
+    assert members["did:oyd:m0"] == "admin" and "did:oyd:m5" not in members
+
+
+def test_overflow_creates_a_page_and_rewrites_the_group_doc(fake_oydid):
+    pager = GroupPager(page_size=2)
+    group = create_group({"did:oyd:a": "member"})
+    pager.apply_diff(group, {"did:oyd:b": "member"}, [])
+    summary = pager.apply_diff(group, {"did:oyd:c": "member"}, [])
+    assert summary["pages_created"] == 1
+    assert len(stored_doc(fake_oydid, group)["memberPages"]) == 2
+
+
+def test_layout_is_reloaded_from_oydid(fake_oydid):
+    group = create_group({"did:oyd:a": "member"})
+    GroupPager(page_size=2).apply_diff(group, {"did:oyd:b": "admin"}, [])
+    assert GroupPager(page_size=2).load(group).all_members() == {"did:oyd:a": "member", "did:oyd:b": "admin"}
+
+
+def test_writes_of_another_worker_are_not_lost(fake_oydid):
+    # Two workers, each with its own pager
+    first, second = GroupPager(page_size=4), GroupPager(page_size=4)
+    group = create_group({"did:oyd:a": "member"})
+    first.apply_diff(group, {"did:oyd:b": "member"}, [])
+    second.apply_diff(group, {"did:oyd:c": "member"}, [])
+    first.apply_diff(group, {"did:oyd:d": "member"}, [])
+    assert page_members(fake_oydid, group) == {f"did:oyd:{m}": "member" for m in "abcd"}
+
+
+def test_no_op_diff_leaves_an_inline_group_alone(fake_oydid):
+    group = create_group({"did:oyd:a": "member"})
+    writes_before = fake_oydid.count("create") + fake_oydid.count("update")
+    summary = GroupPager(page_size=2).apply_diff(group, {"did:oyd:a": "member"}, ["did:oyd:stranger"])
+    assert summary["removed"] == [] and summary["pages_created"] == 0
+    assert fake_oydid.count("create") + fake_oydid.count("update") == writes_before
+    assert "memberPages" not in stored_doc(fake_oydid, group)
+
+
+def test_non_group_dids_are_rejected(fake_oydid):
+    did = json.loads(run_oydid_command(["create", "--json-output"], input_data={"type": "Variable", "name": "x"}).stdout)["did"]
+    with pytest.raises(HTTPException) as e:
+        GroupPager().apply_diff(did, {"did:oyd:a": "member"}, [])
+    assert e.value.status_code == 404
+    assert stored_doc(fake_oydid, did) == {"type": "Variable", "name": "x"}
+
+
+def test_replace_keeps_the_page_chain_of_a_paged_group(fake_oydid):
+    pager = GroupPager(page_size=2)
+    group = create_group({"did:oyd:a": "member", "did:oyd:b": "member", "did:oyd:c": "member"})
+    pager.apply_diff(group, {"did:oyd:c": "admin"}, [])
+    pages = stored_doc(fake_oydid, group)["memberPages"]
+
+    outcome = pager.replace(group, {"type": "Organization", "name": "Renamed", "hasMember": [
+        {"type": "Membership", "member": "did:oyd:a", "role": "admin"},
+        {"type": "Membership", "member": "did:oyd:d", "role": "member"},
+    ]})
+    doc = stored_doc(fake_oydid, group)
+    assert doc["name"] == "Renamed"
+    assert doc["hasMember"] == []
+    assert doc["memberPages"][:len(pages)] == pages
+    assert outcome["group_doc"] == doc
+    assert json.loads(outcome["result"].stdout)["did"] == group
+    assert page_members(fake_oydid, group) == {"did:oyd:a": "admin", "did:oyd:d": "member"}
+
+
+def test_replace_of_an_inline_group_stays_inline(fake_oydid):
+    group = create_group({"did:oyd:a": "member"})
+    new_doc = {"type": "Organization", "name": "Team", "hasMember": [{"type": "Membership", "member": "did:oyd:b", "role": "member"}]}
+    GroupPager().replace(group, new_doc)
+    assert stored_doc(fake_oydid, group) == new_doc
+
+
+@pytest.fixture
+def client(fake_oydid, monkeypatch):
+    pytest.importorskip("httpx")
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.routers import groups
+    from app.services.membership import MembershipIndex
+
+    monkeypatch.setattr(groups, "group_pager", GroupPager(page_size=2))
+    monkeypatch.setattr(groups, "membership_index", MembershipIndex())
+    app = FastAPI()
+    app.include_router(groups.router, prefix="/api")
+    return TestClient(app)
+
+
+def new_group(client, members):
+    response = client.post("/api/groups/create", json={"name": "Team", "type": "Organization", "members": [
+        {"member": member, "role": role} for member, role in members.items()
+    ]})
+    assert response.status_code == 200
+    return response.json()["did"]
+
+
+def test_member_endpoints(client, fake_oydid):
+    group = new_group(client, {"did:oyd:a": "member", "did:oyd:b": "member"})
+
+    response = client.patch(f"/api/groups/{group}/members", json={"add": [{"member": "did:oyd:c", "role": "admin"}], "remove": ["did:oyd:a"]})
+    assert response.status_code == 200
+    assert response.json()["added"] == {"did:oyd:c": "admin"}
+    assert response.json()["removed"] == ["did:oyd:a"]
+
+    assert client.delete(f"/api/groups/{group}/members/did:oyd:b").status_code == 200
+    writes_before = fake_oydid.count("create") + fake_oydid.count("update")
+    assert client.delete(f"/api/groups/{group}/members/did:oyd:b").status_code == 404
+    assert fake_oydid.count("create") + fake_oydid.count("update") == writes_before
+    assert page_members(fake_oydid, group) == {"did:oyd:c": "admin"}
+
+    members = client.get(f"/api/groups/{group}/members").json()["members"]
+    assert [(m["member"], m["role"]) for m in members] == [("did:oyd:c", "admin")]
+
+
+def test_put_on_a_paged_group_goes_through_the_pages(client, fake_oydid):
+    group = new_group(client, {"did:oyd:a": "member"})
+    client.patch(f"/api/groups/{group}/members", json={"add": [{"member": "did:oyd:b", "role": "member"}], "remove": []})
+    pages = stored_doc(fake_oydid, group)["memberPages"]
+
+    response = client.put(f"/api/groups/{group}", json={"name": "Team", "type": "Organization", "members": [{"member": "did:oyd:b", "role": "admin"}]})
+    assert response.status_code == 200
+    doc = stored_doc(fake_oydid, group)
+    assert doc["hasMember"] == [] and doc["memberPages"] == pages
+    assert page_members(fake_oydid, group) == {"did:oyd:b": "admin"}
+    members = client.get(f"/api/groups/{group}/members").json()["members"]
+    assert [(m["member"], m["role"]) for m in members] == [("did:oyd:b", "admin")]
+
+
+def test_delete_of_a_non_member_does_not_migrate(client, fake_oydid):
+    group = new_group(client, {"did:oyd:a": "member"})
+    assert client.delete(f"/api/groups/{group}/members/did:oyd:stranger").status_code == 404
+    assert fake_oydid.count("update") == 0
+    assert "memberPages" not in stored_doc(fake_oydid, group)
@@ -0,0 +1,124 @@
+import gzip
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+pytest.importorskip("starlette")
+from starlette.requests import Request
+
+from app.services import http_cache
+from app.services.did_cache import did_cache
+from app.services.did_store import DidStore
+
+
+def make_request(**headers):
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()]})
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    did_cache.invalidate()
+    yield
+    did_cache.invalidate()
+
+
+def test_etag_depends_on_base_and_variant():
+    assert http_cache.make_etag("head", "read") == http_cache.make_etag("head", "read")
+    assert http_cache.make_etag("head", "read") != http_cache.make_etag("head", "w3c")
+    assert http_cache.make_etag("head", "read") != http_cache.make_etag("other", "read")
+
+
+def test_etag_base_uses_the_log_head():
+    doc = {"doc": {"title": "a"}, "log": [{"op": 0}, {"op": 1}]}
+    same_head = {"doc": {"title": "a"}, "log": [{"op": 0}, {"op": 1}], "extra": True}
+    assert http_cache.etag_base(json.dumps(doc)) == http_cache.etag_base(json.dumps(same_head))
+    assert http_cache.etag_base(json.dumps(doc), from_log=False) != http_cache.etag_base(json.dumps(same_head), from_log=False)
+
+
+def test_etag_matching():
+    etag = '"abc"'
+    assert http_cache.etag_matches('"abc"', etag)
+    assert http_cache.etag_matches('W/"abc"', etag)
+    assert http_cache.etag_matches('"x", "abc-gzip"', etag)
+    assert http_cache.etag_matches("*", etag)
+    assert not http_cache.etag_matches('"abcd"', etag)
+    assert not http_cache.etag_matches(None, etag)
+
+
+def test_encoding_negotiation():
+    assert http_cache.negotiate_encoding("gzip, deflate") == "gzip"
+    assert http_cache.negotiate_encoding("gzip;q=0") is None
+    assert http_cache.negotiate_encoding("identity") is None
+    assert http_cache.negotiate_encoding(None) is None
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    store = DidStore(str(tmp_path / "dids.sqlite"))
+    monkeypatch.setattr(http_cache, "did_store", store)
+    return store
+
+
+def test_response_then_not_modified_without_resolving(replica):
+    stdout = json.dumps({"doc": {"title": "x" * 4000}, "log": [{"op": 0}]})
+    replica.put_read("did:oyd:a", "--json-output", stdout)
+    response = http_cache.cached_json_response(make_request(accept_encoding="gzip"), "did:oyd:a", "read", stdout, http_cache.etag_base(stdout))
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["cache-control"] == "public, no-cache"
+    assert json.loads(gzip.decompress(response.body)) == json.loads(stdout)
+
+    etag = response.headers["etag"]
+    cached = http_cache.not_modified(make_request(if_none_match=etag), "did:oyd:a", "read")
+    assert cached.status_code == 304
+    assert http_cache.not_modified(make_request(if_none_match=etag), "did:oyd:a", "w3c") is None
+
+    # An update of the DID drops the remembered ETag
+    did_cache.invalidate("did:oyd:a")
+    assert http_cache.not_modified(make_request(if_none_match=etag), "did:oyd:a", "read") is None
+
+
+def test_not_modified_follows_the_replica_log_head(replica):
+    stdout = json.dumps({"doc": {"title": "a"}, "log": [{"op": 0}]})
+    replica.put_read("did:oyd:a", "--json-output", stdout)
+    etag = http_cache.cached_json_response(make_request(), "did:oyd:a", "read", stdout, http_cache.etag_base(stdout)).headers["etag"]
+    assert http_cache.not_modified(make_request(if_none_match=etag), "did:oyd:a", "read").status_code == 304
+
+    # Another worker sharing the store updates the DID; this worker's did_cache is untouched
+    replica.put_read("did:oyd:a", "--json-output", json.dumps({"doc": {"title": "b"}, "log": [{"op": 0}, {"op": 1}]}))
+    assert http_cache.not_modified(make_request(if_none_match=etag), "did:oyd:a", "read") is None
+
+
+def test_not_modified_ends_on_revoke(replica):
+    stdout = json.dumps({"doc": {"title": "a"}, "log": [{"op": 0}]})
+    replica.put_read("did:oyd:a", "--json-output", stdout)
+    etag = http_cache.cached_json_response(make_request(), "did:oyd:a", "read", stdout, http_cache.etag_base(stdout)).headers["etag"]
+    replica.record_revoke("did:oyd:a")
+    assert http_cache.not_modified(make_request(if_none_match=etag), "did:oyd:a", "read") is None
+
+
+def test_no_early_not_modified_without_replica(monkeypatch):
+    monkeypatch.setattr(http_cache, "did_store", None)
+    stdout = json.dumps({"doc": {"title": "a"}, "log": [{"op": 0}]})
+    response = http_cache.cached_json_response(make_request(), "did:oyd:a", "read", stdout, http_cache.etag_base(stdout))
+    assert http_cache.not_modified(make_request(if_none_match=response.headers["etag"]), "did:oyd:a", "read") is None
+
+
+def test_max_age_when_configured(monkeypatch):
+    monkeypatch.setattr(http_cache, "DID_HTTP_MAX_AGE", 60)
+    assert http_cache.cache_control() == "public, max-age=60"
+    assert http_cache.cache_control(private=True) == "private, max-age=60"
+
+
+def test_small_and_private_responses(replica):
+    replica.put_read("did:oyd:b", "--json-output", json.dumps({"doc": {}, "log": [{"op": 0}]}))
+    response = http_cache.cached_json_response(make_request(accept_encoding="gzip"), "did:oyd:b", "share:", {"token": "t"}, "base", private=True)
+    assert "content-encoding" not in response.headers
+    assert response.headers["cache-control"].startswith("private")
+    assert json.loads(response.body) == {"token": "t"}
+    cached = http_cache.not_modified(make_request(if_none_match=response.headers["etag"]), "did:oyd:b", "share:")
+    assert cached.headers["cache-control"] == "private, no-cache"
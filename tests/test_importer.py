@@ -0,0 +1,93 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.importer import iter_lines, parse_row, run_import
+
+
+def rows(*items):
+    return [(json.dumps(item) if not isinstance(item, str) else item).encode() for item in items]
+
+
+async def aiter(items):
+    for item in items:
+        yield item
+
+
+def run(lines, **kwargs):
+    dead = []
+    report = asyncio.run(run_import(aiter(lines), dead.append, workers=2, index=False, **kwargs))
+    return report, dead
+
+
+def test_parse_row():
+    kind, payload = parse_row(b'{"kind": "variable", "data": {"name": "temp", "unit": "K"}}')
+    assert kind == "variable"
+    assert payload["type"] == "Variable" and payload["name"] == "temp"
+
+
+@pytest.mark.parametrize("line", [b"[1]", b'{"kind": "nope"}', b'{"kind": "variable", "data": [1, 2]}', b'{"kind": "variable", "data": "x"}'])
+def test_malformed_rows_raise_value_error(line):
+    with pytest.raises(ValueError):
+        parse_row(line)
+
+
+def test_bad_rows_are_dead_lettered_and_the_rest_imported(fake_oydid):
+    report, dead = run(rows(
+        {"kind": "variable", "data": {"name": "ok"}},
+        {"kind": "variable", "data": [1, 2]},
+        "{not json",
+        {"kind": "variable", "data": {"unit": "missing name"}},
+        {"kind": "group", "data": {"name": "team"}},
+    ))
+    assert report["read"] == 5
+    assert report["created"] == 2
+    assert report["failed"] == 3
+    by_line = {entry["line"]: entry for entry in dead}
+    assert by_line[2]["stage"] == "validate" and "data" in by_line[2]["error"]
+    assert by_line[3]["stage"] == "parse"
+    assert by_line[4]["stage"] == "validate" and by_line[4]["error"][0]["loc"] == ["name"]
+    assert fake_oydid.count("create") == 2
+
+
+def test_iter_lines_splits_chunks():
+    async def collect():
+        return [line async for line in iter_lines(aiter([b'{"a"', b': 1}\n{"b": 2}\n', b'{"c": 3}']))]
+    assert asyncio.run(collect()) == [b'{"a": 1}', b'{"b": 2}', b'{"c": 3}']
+
+
+def test_dead_letter_rows_can_be_imported_again(fake_oydid, monkeypatch):
+    from app.services import importer
+    create_did = importer.create_did
+
+    def flaky(payload):
+        if payload.get("name") == "flaky":
+            raise RuntimeError("oydid unavailable")
+        return create_did(payload)
+
+    monkeypatch.setattr(importer, "create_did", flaky)
+    report, dead = run(rows({"kind": "variable", "data": {"name": "flaky"}}, {"kind": "variable", "data": "x"}, "{not json"))
+    assert report["failed"] == 3
+    by_line = {entry["line"]: entry for entry in dead}
+    assert by_line[1]["stage"] == "create" and by_line[1]["kind"] == "variable" and by_line[1]["data"] == {"name": "flaky"}
+    assert by_line[2]["data"] == "x"
+    assert by_line[3]["row"] == "{not json"
+
+    monkeypatch.setattr(importer, "create_did", create_did)
+    report, _ = run(rows(by_line[1]))
+    assert report["created"] == 1
+
+
+def test_imported_groups_are_in_the_membership_index(fake_oydid, monkeypatch):
+    from app.services import importer
+    from app.services.membership import MembershipIndex
+
+    index = MembershipIndex()
+    monkeypatch.setattr(importer, "membership_index", index)
+    run(rows({"kind": "group", "data": {"name": "team", "members": [{"member": "did:oyd:alice", "role": "admin"}]}}))
+    assert [(g["name"], g["role"]) for g in index.groups_of("did:oyd:alice")] == [("team", "admin")]
@@ -0,0 +1,49 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services import jsonio
+
+
+def test_round_trip_matches_the_standard_library():
+    doc = {"did": "did:oyd:zQm1", "doc": {"title": "Schéma", "n": [1, 2.5, None, True]}, "log": [{"op": 0}]}
+    encoded = jsonio.dumps(doc)
+    assert json.loads(encoded) == doc
+    assert jsonio.loads(encoded) == doc
+    assert jsonio.loads(encoded.encode()) == doc
+
+
+def test_decode_errors_are_json_decode_errors():
+    with pytest.raises(json.JSONDecodeError):
+        jsonio.loads("{not json")
+
+
+def test_non_string_keys_are_stringified():
+    assert jsonio.loads(jsonio.dumps({1: "a"})) == {"1": "a"}
+
+
+def test_looks_like_json():
+    assert jsonio.looks_like_json(' {"did": "x"}\n')
+    assert jsonio.looks_like_json("[1, 2]")
+    assert not jsonio.looks_like_json("DID not found")
+    assert not jsonio.looks_like_json("")
+
+
+def test_values_orjson_rejects_fall_back_to_the_standard_library():
+    doc = {"@context": "https://schema.org", "population": 2 ** 70}
+    assert jsonio.dumps(doc) == '{"@context":"https://schema.org","population":1180591620717411303424}'
+    assert jsonio.loads(jsonio.dumps(doc))["population"] == 2 ** 70
+    assert jsonio.loads(jsonio.dumps_bytes({"n": -(2 ** 64) - 1}))["n"] == -(2 ** 64) - 1
+    assert isinstance(jsonio.loads(jsonio.dumps(doc))["population"], int)
+
+
+def test_oydid_input_with_a_large_integer(fake_oydid):
+    from app.services.oydid import run_oydid_command
+    result = run_oydid_command(["create", "--json-output"], input_data={"type": "Dataset", "size": 2 ** 70})
+    assert result.returncode == 0
+    did = json.loads(result.stdout)["did"]
+    assert fake_oydid.records[did]["doc"]["size"] == 2 ** 70
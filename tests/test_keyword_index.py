@@ -0,0 +1,51 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.services.keyword_index import KeywordIndex, reciprocal_rank_fusion
+
+
+def build_index():
+    index = KeywordIndex()
+    index.rebuild([
+        ("did:oyd:temp", "Air Temperature Temperature of the air Variable unit: Celsius symbol: °C",
+         {"type": "Variable", "name": "Air Temperature", "unit": {"name": "Celsius", "symbol": "°C"}}),
+        ("did:oyd:rain", "Precipitation Rainfall amount Variable",
+         {"type": "Variable", "name": "Precipitation", "unit": "mm"}),
+        ("did:oyd:policy", "{}",
+         {"type": "Offer", "odrl:uid": "ex:offer42"}),
+        ("did:oyd:page", "Example Domain",
+         {"url": "https://example.org/page", "title": "Example Domain"}),
+    ])
+    return index
+
+
+def test_exact_identifiers():
+    index = build_index()
+    assert index.exact("ex:offer42") == ["did:oyd:policy"]
+    assert index.exact("  HTTPS://example.org/page ") == ["did:oyd:page"]
+    assert index.exact("°c") == ["did:oyd:temp"]
+    assert index.exact("did:oyd:rain") == ["did:oyd:rain"]
+    assert index.exact("temperature") == []
+
+
+def test_bm25_ranking():
+    index = build_index()
+    ranked = index.search("air temperature")
+    assert ranked[0][0] == "did:oyd:temp"
+    assert all(did != "did:oyd:rain" for did, _ in ranked)
+
+
+def test_update_and_remove():
+    index = build_index()
+    index.add("did:oyd:rain", "Snowfall", {"name": "Snowfall"})
+    assert index.search("precipitation") == []
+    assert index.exact("snowfall") == ["did:oyd:rain"]
+    index.remove("did:oyd:rain")
+    assert index.exact("snowfall") == []
+    assert len(index) == 3
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]])
+    assert [key for key, _ in fused] == ["a", "c", "b"]
@@ -0,0 +1,42 @@
+import io
+import json
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.services.log import configure_logging, shutdown_logging, get_logger, debug_sampled, redact_command, SamplingFilter
+
+
+def test_secrets_are_redacted():
+    cmd = ["oydid", "decrypt", "did:oyd:abc", "--doc-pwd", "hunter2", "--doc-enc=z1S5secret", "--json-output"]
+    assert redact_command(cmd) == ["oydid", "decrypt", "did:oyd:abc", "--doc-pwd", "***", "--doc-enc=***", "--json-output"]
+    assert cmd[4] == "hunter2"
+
+
+def test_sampling_filter_only_drops_sampled_records():
+    never = SamplingFilter(0.0)
+    sampled = logging.LogRecord("odrl.x", logging.DEBUG, "", 0, "m", (), None)
+    sampled.sample = True
+    plain = logging.LogRecord("odrl.x", logging.DEBUG, "", 0, "m", (), None)
+    assert not never.filter(sampled)
+    assert never.filter(plain)
+    assert SamplingFilter(1.0).filter(sampled)
+
+
+def test_json_records_through_queue():
+    stream = io.StringIO()
+    shutdown_logging()
+    configure_logging(level="DEBUG", fmt="json", sample_rate=0.0, stream=stream)
+    try:
+        logger = get_logger("test")
+        logger.info("created", extra={"did": "did:oyd:abc"})
+        debug_sampled(logger, "dropped", did="did:oyd:abc")
+        logger.debug("kept")
+    finally:
+        shutdown_logging()
+    entries = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [e["msg"] for e in entries] == ["created", "kept"]
+    assert entries[0]["did"] == "did:oyd:abc"
+    assert entries[0]["logger"] == "odrl.test"
+    assert entries[0]["level"] == "info"
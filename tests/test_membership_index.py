@@ -0,0 +1,85 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.services.membership import MembershipIndex
+
+
+def group(name, members, type="Organization"):
+    return {
+        "type": type,
+        "name": name,
+        "hasMember": [{"type": "Membership", "member": m, "role": r} for m, r in members]
+    }
+
+
+def build_index():
+    index = MembershipIndex()
+    index.rebuild([
+        {"did": "did:oyd:org", "json_ld": group("Org", [("did:oyd:unit", "department"), ("did:oyd:boss", "director")])},
+        {"did": "did:oyd:unit", "json_ld": group("Unit", [("did:oyd:alice", "admin"), ("did:oyd:bob", "member")], type="OrganizationalUnit")},
+        {"did": "did:oyd:other", "json_ld": {"type": "Variable", "name": "not a group"}},
+    ])
+    return index
+
+
+def test_direct_lookups():
+    index = build_index()
+    assert index.stats() == {"groups": 2, "members": 4, "memberships": 4}
+    assert index.get_role("did:oyd:alice", "did:oyd:unit") == "admin"
+    assert [g["group"] for g in index.groups_of("did:oyd:alice")] == ["did:oyd:unit"]
+    assert {m["member"] for m in index.members_of("did:oyd:org")} == {"did:oyd:unit", "did:oyd:boss"}
+
+
+def test_transitive_membership():
+    index = build_index()
+    groups = {g["group"]: g for g in index.groups_of("did:oyd:alice", transitive=True)}
+    assert set(groups) == {"did:oyd:unit", "did:oyd:org"}
+    assert groups["did:oyd:org"]["via"] == ["did:oyd:unit"]
+    assert groups["did:oyd:org"]["role"] == "admin"
+    assert not groups["did:oyd:org"]["direct"]
+
+    members = {m["member"] for m in index.members_of("did:oyd:org", transitive=True)}
+    assert members == {"did:oyd:unit", "did:oyd:boss", "did:oyd:alice", "did:oyd:bob"}
+
+
+def test_update_replaces_membership():
+    index = build_index()
+    index.set_group("did:oyd:unit", group("Unit", [("did:oyd:carol", "admin")], type="OrganizationalUnit"))
+    assert index.groups_of("did:oyd:alice") == []
+    assert index.get_role("did:oyd:carol", "did:oyd:unit") == "admin"
+
+
+def test_cycles_terminate():
+    index = MembershipIndex()
+    index.set_group("did:oyd:a", group("A", [("did:oyd:b", "unit")]))
+    index.set_group("did:oyd:b", group("B", [("did:oyd:a", "unit")]))
+    assert [g["group"] for g in index.groups_of("did:oyd:a", transitive=True)] == ["did:oyd:b"]
+
+
+def test_rebuild_loads_paged_members():
+    index = MembershipIndex()
+    paged = {**group("Paged", []), "memberPages": ["did:oyd:page1"]}
+    index.rebuild([{"did": "did:oyd:paged", "json_ld": paged}], lambda did: {"did:oyd:carol": "admin"})
+    assert index.get_role("did:oyd:carol", "did:oyd:paged") == "admin"
+    assert index.built and index.built_at > 0
+
+
+def test_stale_index_picks_up_groups_written_by_another_worker(monkeypatch, fake_oydid):
+    from app.routers import groups
+    from app.services.qdrant_service import qdrant_service
+
+    index = MembershipIndex()
+    monkeypatch.setattr(groups, "membership_index", index)
+    groups.ensure_membership_index()
+    assert index.groups_of("did:oyd:refreshed-member") == []
+
+    # Written by another worker: in Qdrant, not in this worker's index
+    qdrant_service.upsert_document("did:oyd:zQmOtherWorkerGroup", group("Other", [("did:oyd:refreshed-member", "admin")]), collection="groups")
+    groups.ensure_membership_index()
+    assert index.groups_of("did:oyd:refreshed-member") == []
+
+    monkeypatch.setattr(groups, "MEMBERSHIP_INDEX_REFRESH", 1e-6)
+    groups.ensure_membership_index()
+    groups._refresh_thread.join(timeout=10)
+    assert [g["group"] for g in index.groups_of("did:oyd:refreshed-member")] == ["did:oyd:zQmOtherWorkerGroup"]
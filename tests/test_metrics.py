@@ -0,0 +1,41 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.services.metrics import oydid_subcommand, bounded, timed, KNOWN_COLLECTIONS
+
+
+class RecordingHistogram:
+    _labelnames = ("operation", "status")
+
+    def __init__(self):
+        self.observed = []
+
+    def labels(self, **labels):
+        self.observed.append(labels)
+        return self
+
+    def observe(self, value):
+        self.observed[-1]["seconds"] = value
+
+
+def test_subcommand_labels_are_bounded():
+    assert oydid_subcommand(["create", "--json-output"]) == "create"
+    assert oydid_subcommand(["--location", "https://oydid.ownyourdata.eu", "read", "did:oyd:abc"]) == "read"
+    assert oydid_subcommand(["--version"]) == "--version"
+    assert oydid_subcommand(["did:oyd:abc", "--json-output"]) == "other"
+    assert bounded("bookmarks", KNOWN_COLLECTIONS) == "bookmarks"
+    assert bounded("tenant-1234", KNOWN_COLLECTIONS) == "other"
+
+
+def test_timed_records_status():
+    histogram = RecordingHistogram()
+    with timed(histogram, operation="upsert"):
+        pass
+    try:
+        with timed(histogram, operation="search"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    assert [(o["operation"], o["status"]) for o in histogram.observed] == [("upsert", "ok"), ("search", "error")]
+    assert all(o["seconds"] >= 0 for o in histogram.observed)
@@ -0,0 +1,150 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services import qdrant_service as qdrant_module
+from app.services.embeddings import EmbeddingProvider
+from app.services.keyword_index import reciprocal_rank_fusion
+from app.services.qdrant_service import QdrantService
+
+PROMPTS = {
+    "did:oyd:zQmPromptA": "Summarize the quarterly revenue report for the board",
+    "did:oyd:zQmPromptB": "Translate the revenue summary into French",
+    "did:oyd:zQmPromptC": "List the zebrafish genes studied in the lab",
+    "did:oyd:zQmPromptD": "Draft an email inviting the board to the meeting",
+}
+
+
+class ConstantEmbedding(EmbeddingProvider):
+    """Every text gets the same vector, so vector search cannot tell documents apart"""
+    model_name = "constant"
+
+    def __init__(self, dimension):
+        self._dimension = dimension
+
+    @property
+    def dimension(self):
+        return self._dimension
+
+    def embed(self, texts):
+        return [[1.0] + [0.0] * (self._dimension - 1) for _ in texts]
+
+
+@pytest.fixture
+def service():
+    service = QdrantService()
+    for did, text in PROMPTS.items():
+        service.upsert_document(did, {"type": "Prompt", "name": f"prompt {did[-1]}", "description": text}, collection="prompts")
+    return service
+
+
+def ranked(results):
+    return [r["did"] for r in results]
+
+
+def test_hybrid_is_the_rank_fusion_of_vector_and_keyword(service):
+    query = "board revenue"
+    vector = service.search_documents(query, "prompts", limit=8, mode="vector")
+    keyword = service.search_documents(query, "prompts", limit=8, mode="keyword")
+    hybrid = service.search_documents(query, "prompts", limit=2, mode="hybrid")
+
+    expected = reciprocal_rank_fusion([[("prompts", r["did"]) for r in vector], [("prompts", r["did"]) for r in keyword]])[:2]
+    assert [("prompts", r["did"]) for r in hybrid] == [key for key, _ in expected]
+    assert all(r["match"] == "hybrid" for r in hybrid)
+    assert ranked(hybrid)[0] == "did:oyd:zQmPromptA"
+
+
+def test_keyword_evidence_ranks_a_match_vector_search_misses(service):
+    service.embedder = ConstantEmbedding(service.embedder.dimension)
+    vector = ranked(service.search_documents("zebrafish", "prompts", limit=4, mode="vector"))
+    hybrid = ranked(service.search_documents("zebrafish", "prompts", limit=4, mode="hybrid"))
+    assert sorted(vector) == sorted(PROMPTS)
+    assert hybrid[0] == "did:oyd:zQmPromptC"
+    assert ranked(service.search_documents("zebrafish", "prompts", limit=4, mode="keyword")) == ["did:oyd:zQmPromptC"]
+
+
+def test_identifier_queries_match_exactly(service):
+    results = service.search_documents("did:oyd:zQmPromptB", "prompts", mode="hybrid")
+    assert ranked(results) == ["did:oyd:zQmPromptB"]
+    assert results[0]["match"] == "exact"
+
+
+def test_indexes_are_built_up_front_and_follow_local_upserts(service):
+    service.build_keyword_indexes()
+    assert all(index.built for index in service.keyword_indexes.values())
+    service.upsert_document("did:oyd:zQmPromptE", {"type": "Prompt", "description": "okapi habitat notes"}, collection="prompts")
+    assert ranked(service.search_documents("okapi", "prompts", mode="keyword")) == ["did:oyd:zQmPromptE"]
+
+
+def test_refresh_picks_up_writes_of_another_worker(service, monkeypatch):
+    # A second "worker": its own keyword indexes, same Qdrant
+    other = QdrantService()
+    other.client = service.client
+    assert other.search_documents("okapi", "prompts", mode="keyword") == []
+
+    service.upsert_document("did:oyd:zQmPromptE", {"type": "Prompt", "description": "okapi habitat notes"}, collection="prompts")
+    assert other.search_documents("okapi", "prompts", mode="keyword") == []
+
+    monkeypatch.setattr(qdrant_module, "KEYWORD_INDEX_REFRESH", 1e-6)
+    other.search_documents("okapi", "prompts", mode="keyword")
+    other.keyword_refreshes["prompts"].join(timeout=10)
+    monkeypatch.setattr(qdrant_module, "KEYWORD_INDEX_REFRESH", 0)
+    assert ranked(other.search_documents("okapi", "prompts", mode="keyword")) == ["did:oyd:zQmPromptE"]
+
+
+def test_build_filter(service):
+    assert service._build_filter(None) is None
+    assert service._build_filter({"type": None}) is None
+    built = service._build_filter({"type": "Prompt", "creator": "alice", "timestamp_from": "2024-01-01T00:00:00"})
+    conditions = {condition.key: condition for condition in built.must}
+    assert conditions["type"].match.value == "Prompt"
+    assert conditions["creator"].match.value == "alice"
+    assert conditions["timestamp"].range.gte is not None and conditions["timestamp"].range.lte is None
+
+
+def test_matches_filters_mirrors_the_qdrant_filter(service):
+    fields = {"type": "Policy", "action": ["read", "use"], "timestamp": "2024-06-01T12:00:00"}
+    assert service._matches_filters(fields, {"action": "use"})
+    assert not service._matches_filters(fields, {"action": "delete"})
+    assert service._matches_filters(fields, {"timestamp_from": "2024-01-01T00:00:00", "timestamp_to": "2024-12-31T00:00:00"})
+    assert not service._matches_filters(fields, {"timestamp_from": "2025-01-01T00:00:00"})
+    assert not service._matches_filters({"type": "Policy"}, {"timestamp_to": "2025-01-01T00:00:00"})
+
+
+@pytest.fixture
+def crowded():
+    """Many strong matches by one creator, a few weaker ones by another"""
+    service = QdrantService()
+    for i in range(12):
+        service.upsert_document(f"did:oyd:zQmAlice{i:02d}", {
+            "type": "Prompt", "creator": "alice", "timestamp": f"2024-01-{i + 1:02d}T00:00:00",
+            "description": "revenue revenue revenue forecast"
+        }, collection="prompts")
+    for i in range(3):
+        service.upsert_document(f"did:oyd:zQmBob{i}", {
+            "type": "Prompt", "creator": "bob", "timestamp": f"2025-01-{i + 1:02d}T00:00:00",
+            "description": f"revenue notes number {i} with several unrelated words"
+        }, collection="prompts")
+    return service
+
+
+@pytest.mark.parametrize("mode", ["vector", "keyword", "hybrid"])
+def test_filtered_search_fills_the_limit(crowded, mode):
+    results = crowded.search_documents("revenue", "prompts", limit=2, mode=mode, filters={"creator": "bob"})
+    assert len(results) == 2
+    assert all(r["json_ld"]["creator"] == "bob" for r in results)
+
+
+@pytest.mark.parametrize("mode", ["vector", "keyword", "hybrid"])
+def test_timestamp_range_filter(crowded, mode):
+    results = crowded.search_documents("revenue", "prompts", limit=20, mode=mode, filters={"timestamp_from": "2024-12-31T00:00:00"})
+    assert sorted(r["did"] for r in results) == [f"did:oyd:zQmBob{i}" for i in range(3)]
+
+
+def test_keyword_filter_survives_an_index_rebuild(crowded):
+    crowded.keyword_indexes.clear()
+    results = crowded.search_documents("revenue", "prompts", limit=3, mode="keyword", filters={"creator": "bob"})
+    assert sorted(r["did"] for r in results) == [f"did:oyd:zQmBob{i}" for i in range(3)]
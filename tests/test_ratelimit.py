@@ -0,0 +1,61 @@
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.ratelimit import AsyncRateLimiter
+
+
+async def run_calls(limiter, calls, duration=0.02):
+    state = {"in_flight": 0, "peak": 0}
+
+    async def call():
+        async with limiter:
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+            await asyncio.sleep(duration)
+            state["in_flight"] -= 1
+
+    await asyncio.gather(*(call() for _ in range(calls)))
+    return state["peak"]
+
+
+def test_concurrency_is_capped():
+    assert asyncio.run(run_calls(AsyncRateLimiter(max_concurrency=3), 12)) == 3
+
+
+def test_rate_is_enforced_after_the_burst():
+    limiter = AsyncRateLimiter(max_concurrency=10, rate=50, burst=2)
+    start = time.monotonic()
+    asyncio.run(run_calls(limiter, 7, duration=0))
+    # 2 calls from the burst, the other 5 at 50/s
+    assert time.monotonic() - start >= 5 / 50 * 0.9
+
+
+def test_unlimited_rate_does_not_wait():
+    start = time.monotonic()
+    asyncio.run(run_calls(AsyncRateLimiter(max_concurrency=100), 50, duration=0))
+    assert time.monotonic() - start < 0.5
+
+
+def test_slot_is_released_when_cancelled_while_waiting_for_a_token():
+    async def scenario():
+        limiter = AsyncRateLimiter(max_concurrency=1, rate=0.5, burst=1)
+        async with limiter:
+            pass
+        waiter = asyncio.create_task(limiter.__aenter__())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        return limiter._semaphore.locked()
+
+    assert asyncio.run(scenario()) is False
+
+
+def test_limiter_can_be_shared_across_event_loops():
+    # Module-level limiters outlive the loop that first used them (e.g. one per TestClient)
+    limiter = AsyncRateLimiter(max_concurrency=2)
+    assert asyncio.run(run_calls(limiter, 6)) == 2
+    assert asyncio.run(run_calls(limiter, 6)) == 2
@@ -0,0 +1,67 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.singleflight import SingleFlight
+
+
+def run_concurrently(flight, key, fn, callers):
+    barrier = threading.Barrier(callers)
+    results = [None] * callers
+
+    def caller(i):
+        barrier.wait()
+        try:
+            results[i] = flight.do(key, fn)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(callers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    def slow_read():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"did": "did:oyd:zQm1"}
+
+    results = run_concurrently(flight, ("read", "did:oyd:zQm1"), slow_read, 8)
+    assert len(calls) == 1
+    assert all(result == {"did": "did:oyd:zQm1"} for result, _ in results)
+    assert sum(1 for _, shared in results if not shared) == 1
+    assert flight.in_flight() == 0
+
+
+def test_errors_are_shared_and_not_retained():
+    flight = SingleFlight()
+
+    def failing():
+        time.sleep(0.2)
+        raise RuntimeError("oydid failed")
+
+    results = run_concurrently(flight, "key", failing, 4)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    # Once the call has finished, the next caller executes again
+    assert flight.do("key", lambda: "fresh") == ("fresh", False)
+
+
+def test_different_keys_run_independently():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == (1, False)
+    assert flight.do("b", lambda: 2) == (2, False)
+    with pytest.raises(ValueError):
+        flight.do("c", lambda: int("x"))
@@ -0,0 +1,81 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.services.sshsig import SshSigError, verify_sshsig
+
+pytestmark = pytest.mark.skipif(shutil.which("ssh-keygen") is None, reason="ssh-keygen not installed")
+
+SUBJECT_DID = "did:oyd:zQmTestSubject1234567890"
+
+KEY_TYPES = [
+    ["-t", "ed25519"],
+    ["-t", "ecdsa", "-b", "256"],
+    ["-t", "ecdsa", "-b", "384"],
+    ["-t", "ecdsa", "-b", "521"],
+    ["-t", "rsa", "-b", "2048"],
+]
+
+
+def make_fixture(key_args, data, namespace="oydid"):
+    """Generate a key with ssh-keygen and sign data with -Y sign."""
+    with tempfile.TemporaryDirectory() as tmp:
+        key_file = os.path.join(tmp, "key")
+        data_file = os.path.join(tmp, "data")
+        subprocess.run(["ssh-keygen", "-q", *key_args, "-f", key_file, "-N", "", "-C", "oydid-user"],
+                       check=True, capture_output=True)
+        with open(data_file, "w") as f:
+            f.write(data)
+        subprocess.run(["ssh-keygen", "-Y", "sign", "-f", key_file, "-n", namespace, data_file],
+                       check=True, capture_output=True)
+        with open(f"{key_file}.pub") as f:
+            public_key = f.read().strip()
+        with open(f"{data_file}.sig") as f:
+            signature = f.read()
+    return public_key, signature
+
+
+def ssh_keygen_verify(public_key, signature, data, namespace="oydid"):
+    with tempfile.TemporaryDirectory() as tmp:
+        allowed = os.path.join(tmp, "allowed")
+        sig_file = os.path.join(tmp, "sig")
+        with open(allowed, "w") as f:
+            f.write(f"oydid-user {public_key}")
+        with open(sig_file, "w") as f:
+            f.write(signature)
+        proc = subprocess.run(
+            ["ssh-keygen", "-Y", "verify", "-f", allowed, "-I", "oydid-user", "-n", namespace, "-s", sig_file],
+            input=data, capture_output=True, text=True
+        )
+    return proc.returncode == 0
+
+
+@pytest.mark.parametrize("key_args", KEY_TYPES, ids=lambda a: "-".join(a[1::2]))
+def test_matches_ssh_keygen(key_args):
+    public_key, signature = make_fixture(key_args, SUBJECT_DID)
+
+    assert ssh_keygen_verify(public_key, signature, SUBJECT_DID)
+    verify_sshsig(public_key, signature, SUBJECT_DID.encode(), namespace="oydid")
+
+    tampered = SUBJECT_DID + "x"
+    assert not ssh_keygen_verify(public_key, signature, tampered)
+    with pytest.raises(SshSigError):
+        verify_sshsig(public_key, signature, tampered.encode(), namespace="oydid")
+
+
+def test_rejects_wrong_namespace():
+    public_key, signature = make_fixture(["-t", "ed25519"], SUBJECT_DID, namespace="file")
+    with pytest.raises(SshSigError):
+        verify_sshsig(public_key, signature, SUBJECT_DID.encode(), namespace="oydid")
+
+
+def test_rejects_other_key():
+    _, signature = make_fixture(["-t", "ed25519"], SUBJECT_DID)
+    other_key, _ = make_fixture(["-t", "ed25519"], SUBJECT_DID)
+    with pytest.raises(SshSigError):
+        verify_sshsig(other_key, signature, SUBJECT_DID.encode(), namespace="oydid")
@@ -0,0 +1,89 @@
+import gzip
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+pytest.importorskip("starlette")
+pytest.importorskip("httpx")
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from app.services import static_assets
+
+INDEX = b"<!doctype html><html><body><div id='root'></div>" + b"<!-- padding -->" * 200 + b"</body></html>"
+BUNDLE = b"console.log('app');\n" * 500
+
+
+@pytest.fixture
+def dist(tmp_path):
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "index.html").write_bytes(INDEX)
+    (tmp_path / "assets" / "index-BxT3k9aZ.js").write_bytes(BUNDLE)
+    (tmp_path / "vite.svg").write_bytes(b"<svg/>")
+    return tmp_path
+
+
+@pytest.fixture
+def client(dist):
+    static_assets.precompress(str(dist))
+    spa_index = static_assets.SpaIndex.load(str(dist))
+
+    async def fallback(request, _):
+        if request.url.path.startswith("/api"):
+            return JSONResponse({"detail": "Not Found"}, status_code=404)
+        return spa_index.response(request)
+
+    app = Starlette(routes=[Mount("/", static_assets.PrecompressedStaticFiles(directory=str(dist)))], exception_handlers={404: fallback})
+    return TestClient(app)
+
+
+def test_precompress_writes_smaller_variants_of_large_files(dist):
+    counts = static_assets.precompress(str(dist))
+    assert counts["files"] == 2
+    assert gzip.decompress((dist / "assets" / "index-BxT3k9aZ.js.gz").read_bytes()) == BUNDLE
+    assert not (dist / "vite.svg.gz").exists()
+
+
+def test_hashed_assets():
+    assert static_assets.is_hashed_asset("assets/index-BxT3k9aZ.js")
+    assert not static_assets.is_hashed_asset("assets/logo.svg")
+    assert not static_assets.is_hashed_asset("index.html")
+
+
+def test_precompressed_asset_is_served_per_accept_encoding(client):
+    response = client.get("/assets/index-BxT3k9aZ.js", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-type"].startswith("text/javascript")
+    assert response.headers["cache-control"] == static_assets.IMMUTABLE_CACHE_CONTROL
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.content == BUNDLE
+
+    identity = client.get("/assets/index-BxT3k9aZ.js", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    assert identity.content == BUNDLE
+    assert identity.headers["etag"] != response.headers["etag"]
+
+
+def test_unhashed_files_revalidate(client):
+    response = client.get("/vite.svg")
+    assert response.headers["cache-control"] == "no-cache"
+    assert "vary" not in response.headers
+
+
+def test_spa_fallback_is_served_from_memory(client, dist):
+    (dist / "index.html").unlink()
+    response = client.get("/groups/42", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["cache-control"] == "no-cache"
+    assert response.content == INDEX
+
+    cached = client.get("/groups/42", headers={"If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+    assert client.get("/api/missing").status_code == 404
@@ -0,0 +1,61 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.services.text_extraction import extract_text, chunk_text, humanize
+
+
+def test_policy_text_describes_rules():
+    policy = {
+        "@context": ["http://www.w3.org/ns/odrl.jsonld"],
+        "type": "Requirement",
+        "odrl:uid": "http://example.org/policy/1",
+        "dcterms:description": "Research use only",
+        "odrl:permission": [{
+            "target": "oac:Behavioral",
+            "action": "oac:Read",
+            "constraint": [{"leftOperand": "oac:Purpose", "operator": "odrl:isA", "rightOperand": "dpv:ResearchAndDevelopment"}]
+        }]
+    }
+    text = extract_text("policy", policy)
+    assert "Research use only" in text
+    assert "permits Read on Behavioral" in text
+    assert "Purpose is A Research And Development" in text
+    assert "{" not in text
+
+
+def test_croissant_text_lists_record_sets_and_fields():
+    dataset = {
+        "type": "Croissant",
+        "name": "Weather stations",
+        "description": "Hourly observations",
+        "keywords": ["climate", "weather"],
+        "recordSet": [{
+            "name": "observations",
+            "field": [
+                {"name": "temperature", "description": "Air temperature", "dataType": "sc:Float"},
+                {"name": "station_id", "dataType": "sc:Text"}
+            ]
+        }]
+    }
+    text = extract_text("croissant", dataset)
+    assert "keywords: climate, weather" in text
+    assert "record set observations" in text
+    assert "field temperature Air temperature Float" in text
+    assert "field station_id Text" in text
+
+
+def test_generic_fallback_uses_string_leaves():
+    text = extract_text("dids", {"@context": "http://example.org", "foo": {"bar": "hello"}, "n": 3, "tags": ["a", "b"]})
+    assert text == "hello a b"
+    assert extract_text("variables", {"name": "Air Temperature", "unit": {"symbol": "°C"}}) == "Air Temperature symbol: °C"
+
+
+def test_chunking_overlaps_and_is_bounded():
+    words = [f"w{i}" for i in range(500)]
+    chunks = chunk_text(" ".join(words), max_words=200, overlap=50)
+    assert [len(c.split()) for c in chunks] == [200, 200, 200]
+    assert chunks[1].split()[0] == "w150"
+    assert chunk_text("short text") == ["short text"]
+    assert len(chunk_text(" ".join(words), max_words=10, overlap=0, max_chunks=5)) == 5
+    assert humanize("http://example.org/ns#hasValue") == "has Value"
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.services import tracing
+
+
+def test_disabled_tracing_is_a_noop():
+    if tracing._tracer is not None:
+        pytest.skip("tracing already configured")
+    with tracing.span("noop", attr=1) as current:
+        assert current is None
+    assert tracing.trace_env() is None
+    assert tracing.trace_env({"A": "1"}) == {"A": "1"}
+
+
+def test_trace_context_is_passed_to_subprocess_env():
+    pytest.importorskip("opentelemetry.sdk")
+    tracing.configure_tracing("console")
+    with tracing.span("parent") as current:
+        env = tracing.trace_env({})
+        trace_id = format(current.get_span_context().trace_id, "032x")
+    assert env["TRACEPARENT"].split("-")[1] == trace_id
@@ -0,0 +1,105 @@
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, field_validator
+
+from app.routers import vcs
+from app.services.ratelimit import AsyncRateLimiter
+
+
+class StrictSshRequest(BaseModel):
+    subject_did: str
+    public_key: str
+
+    @field_validator("public_key")
+    @classmethod
+    def check_key(cls, value):
+        # Raising ValueError puts the exception object in the error's ctx
+        if not value.startswith("ssh-"):
+            raise ValueError("not an SSH public key")
+        return value
+
+
+@pytest.fixture
+def client(monkeypatch):
+    state = {"in_flight": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def verify(request):
+        if request.public_key == "ssh-rejected":
+            raise HTTPException(status_code=400, detail="Signature verification failed")
+        with lock:
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+        time.sleep(0.02)
+        with lock:
+            state["in_flight"] -= 1
+        return vcs.build_vc(request.subject_did, "SshKeyCredential", {"publicKey": request.public_key})
+
+    monkeypatch.setitem(vcs.VC_PROVIDERS, "ssh", (StrictSshRequest, verify))
+    monkeypatch.setitem(vcs.provider_limiters, "ssh", AsyncRateLimiter(max_concurrency=2))
+    monkeypatch.setattr(vcs, "signing_limiter", AsyncRateLimiter(max_concurrency=4))
+    monkeypatch.setattr(vcs, "require_issuer_did", lambda: "did:oyd:issuer")
+    monkeypatch.setattr(vcs, "issue_vc", lambda issuer_did, vc: {**vc, "issuer": issuer_did, "proof": {}})
+
+    app = FastAPI()
+    app.include_router(vcs.router, prefix="/api")
+    test_client = TestClient(app)
+    test_client.state = state
+    return test_client
+
+
+def post_batch(client, items):
+    response = client.post("/api/vc/batch", json={"items": items})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_every_item_gets_one_row_with_its_index(client):
+    items = [{"provider": "ssh", "request": {"subject_did": f"did:oyd:{i}", "public_key": f"ssh-ed25519 k{i}"}} for i in range(8)]
+    rows = post_batch(client, items)
+    assert sorted(row["index"] for row in rows) == list(range(8))
+    for row in rows:
+        assert row["status"] == "issued"
+        assert row["subject_did"] == f"did:oyd:{row['index']}"
+        assert row["credential"]["issuer"] == "did:oyd:issuer"
+
+
+def test_failures_are_error_rows(client):
+    rows = {row["index"]: row for row in post_batch(client, [
+        {"provider": "ssh", "request": {"subject_did": "did:oyd:a", "public_key": "ssh-ed25519 ok"}},
+        {"provider": "ssh", "request": {"subject_did": "did:oyd:b", "public_key": "not-a-key"}},
+        {"provider": "ssh", "request": {"subject_did": "did:oyd:c"}},
+        {"provider": "ssh", "request": {"subject_did": "did:oyd:d", "public_key": "ssh-rejected"}},
+    ])}
+    assert rows[0]["status"] == "issued"
+    assert rows[1]["status_code"] == 422
+    assert "not an SSH public key" in rows[1]["error"][0]["msg"]
+    assert rows[2]["status_code"] == 422
+    assert rows[2]["error"][0]["loc"] == ["public_key"]
+    assert rows[3]["status_code"] == 400
+    assert rows[3]["error"] == "Signature verification failed"
+
+
+def test_provider_concurrency_limit_holds(client):
+    items = [{"provider": "ssh", "request": {"subject_did": f"did:oyd:{i}", "public_key": "ssh-ed25519 k"}} for i in range(10)]
+    assert len(post_batch(client, items)) == 10
+    assert client.state["peak"] <= 2
+
+
+def test_oversized_batch_is_rejected(client, monkeypatch):
+    monkeypatch.setattr(vcs, "VC_BATCH_MAX_ITEMS", 1)
+    item = {"provider": "ssh", "request": {"subject_did": "did:oyd:a", "public_key": "ssh-ed25519 k"}}
+    assert client.post("/api/vc/batch", json={"items": [item, item]}).status_code == 413